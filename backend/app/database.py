@@ -17,8 +17,8 @@ async def init_pool():
     global _pool
     _pool = await asyncpg.create_pool(
         dsn=settings.database_url,
-        min_size=4,
-        max_size=20,
+        min_size=settings.db_pool_min_size,
+        max_size=settings.db_pool_max_size,
     )
 
 
@@ -2,8 +2,10 @@
 CIVITAS – FastAPI application entry point.
 """
 
+import logging
 from contextlib import asynccontextmanager
 
+import asyncpg
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -17,13 +19,21 @@ from backend.app.routers import neighborhood as neighborhood_router
 from backend.app.routers import property as property_router
 from backend.app.routers import qa as qa_router
 from backend.app.routers import report as report_router
+from backend.app.services.address import shutdown_parse_pool
+from backend.app.services.cache_events import CHANNEL as CACHE_CHANNEL
+from backend.app.services.cache_events import start_listener, stop_listener
+
+log = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_pool()
+    await start_listener()
     yield
+    await stop_listener()
     await close_pool()
+    shutdown_parse_pool()
 
 
 app = FastAPI(
@@ -74,17 +84,52 @@ async def health():
 
 @app.post("/api/v1/admin/refresh-matviews")
 async def refresh_materialized_views():
-    """Refresh the materialized summary view and clear the report cache."""
+    """
+    Run the refresh_scores sequence: bring the persisted property summary
+    and the community area view up to date, rebuild report snapshots (when
+    enabled) and announce the new generation.
+    """
     from backend.app.database import get_conn
-    from backend.app.services.report import clear_report_cache
     import time
 
     start = time.monotonic()
+    snapshots = None
     async with get_conn() as conn:
-        await conn.execute(
-            "REFRESH MATERIALIZED VIEW CONCURRENTLY view_property_summary"
+        row = await conn.fetchrow(
+            "SELECT refresh_id, mode, rows_recomputed FROM refresh_property_summary(FALSE)"
+        )
+        await conn.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY view_community_area_summary")
+        if app_settings.report_snapshots_enabled:
+            try:
+                snapshots = await conn.fetchrow(
+                    "SELECT snapshots_built, snapshots_removed"
+                    " FROM refresh_report_snapshots($1, $2)",
+                    app_settings.report_snapshot_top_n,
+                    app_settings.report_snapshot_recent_days,
+                )
+            except asyncpg.PostgresError as exc:
+                # Reports fall back to the live tables until the next run
+                log.warning("Report snapshot refresh failed: %s", exc)
+        # Delivered to every worker, this one included
+        await conn.fetchval(
+            "SELECT notify_data_refreshed($1, $2)", row["refresh_id"], CACHE_CHANNEL,
         )
     elapsed = round(time.monotonic() - start, 2)
-    clear_report_cache()
 
-    return {"status": "ok", "elapsed_seconds": elapsed}
+    return {
+        "status": "ok",
+        "elapsed_seconds": elapsed,
+        "refresh_id": row["refresh_id"],
+        "mode": row["mode"],
+        "rows_recomputed": row["rows_recomputed"],
+        "report_snapshots": dict(snapshots) if snapshots else None,
+    }
+
+
+@app.get("/api/v1/admin/cache-stats")
+async def cache_stats():
+    """Return hit/miss counters for the address and report caches."""
+    from backend.app.services.address import address_cache_stats
+    from backend.app.services.report import report_cache_stats
+
+    return {"address": address_cache_stats(), "report": report_cache_stats()}
@@ -2,22 +2,22 @@
 CIVITAS – Batch/Portfolio analysis router.
 
 POST /api/v1/batch/upload       Accept CSV, create batch_job + items
-GET  /api/v1/batch/{id}/stream  SSE endpoint — process each item, stream progress
+GET  /api/v1/batch/{id}/stream  SSE endpoint — stream progress made by the batch workers
 GET  /api/v1/batch/{id}         Return full batch summary
 GET  /api/v1/batch/my-batches   Return user's batch list
 """
 
 from __future__ import annotations
 
-import csv
-import io
 import json
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 
+from backend.app.config import settings
 from backend.app.database import get_conn
 from backend.app.dependencies import get_current_user
 from backend.app.constants import TIER_LABELS
@@ -27,25 +27,11 @@ from backend.app.schemas.batch import (
     BatchSummary,
     BatchUploadResponse,
 )
-from backend.app.services.address import resolve_address
 from backend.app.services.auth import decode_token, get_user_by_id
-from backend.app.services.report import generate_single_report
+from backend.app.services.batch import create_batch, parse_address_csv, tail_batch
 
 router = APIRouter(prefix="/api/v1/batch", tags=["batch"])
 
-MAX_ROWS = 50
-
-# Column names we recognise (case-insensitive)
-ADDRESS_COLUMNS = {"address", "property_address", "full_address", "street_address"}
-
-
-def _find_address_column(headers: list[str]) -> Optional[str]:
-    for h in headers:
-        if h.strip().lower() in ADDRESS_COLUMNS:
-            return h
-    return None
-
-
 # ── Upload CSV ──────────────────────────────────────────────────────────────
 
 @router.post("/upload", response_model=BatchUploadResponse)
@@ -57,66 +43,24 @@ async def upload_batch(
     if not file.filename or not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only CSV files are accepted")
 
-    raw = await file.read()
+    # Parsing a large file is CPU work; keep it off the event loop
     try:
-        text = raw.decode("utf-8-sig")
-    except UnicodeDecodeError:
-        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
-
-    reader = csv.DictReader(io.StringIO(text))
-    if not reader.fieldnames:
-        raise HTTPException(status_code=400, detail="CSV has no headers")
-
-    addr_col = _find_address_column(list(reader.fieldnames))
-    if addr_col is None:
-        raise HTTPException(
-            status_code=400,
-            detail="CSV must contain an address column (address, property_address, full_address, or street_address)",
+        addresses, rows = await run_in_threadpool(
+            parse_address_csv, file.file, settings.batch_max_rows,
         )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
-    rows = []
-    for i, row in enumerate(reader):
-        addr = (row.get(addr_col) or "").strip()
-        if addr:
-            rows.append(addr)
-        if len(rows) > MAX_ROWS:
-            raise HTTPException(
-                status_code=400,
-                detail=f"CSV exceeds maximum of {MAX_ROWS} rows",
-            )
-
-    if not rows:
+    if not addresses:
         raise HTTPException(status_code=400, detail="CSV contains no valid addresses")
 
-    # Create batch_job + items
-    async with get_conn() as conn:
-        batch_row = await conn.fetchrow(
-            """
-            INSERT INTO batch_job (user_id, batch_name, total_count)
-            VALUES ($1, $2, $3)
-            RETURNING batch_id
-            """,
-            user["user_id"],
-            batch_name or file.filename,
-            len(rows),
-        )
-        batch_id = str(batch_row["batch_id"])
-
-        for idx, addr in enumerate(rows):
-            await conn.execute(
-                """
-                INSERT INTO batch_job_item (batch_id, row_index, input_address)
-                VALUES ($1, $2, $3)
-                """,
-                batch_row["batch_id"],
-                idx,
-                addr,
-            )
+    batch_id = await create_batch(user["user_id"], batch_name or file.filename, addresses)
 
     return BatchUploadResponse(
         batch_id=batch_id,
         batch_name=batch_name or file.filename,
-        total_count=len(rows),
+        total_count=len(addresses),
+        duplicate_count=rows - len(addresses),
     )
 
 
@@ -126,9 +70,12 @@ async def upload_batch(
 async def stream_batch(
     batch_id: str,
     token: str = Query(...),
+    last_event_id: Optional[str] = Header(default=None),
 ):
     """
-    SSE endpoint that processes each batch item sequentially.
+    SSE endpoint that streams the batch's progress. Items are processed by
+    the batch workers (tasks/batch_worker.py); closing the stream does not
+    stop them, and a reconnecting EventSource resumes from Last-Event-ID.
     Uses ?token= query param because EventSource can't send headers.
     """
     # Validate JWT from query param
@@ -153,102 +100,13 @@ async def stream_batch(
         raise HTTPException(status_code=404, detail="Batch not found")
 
     async def event_generator():
-        async with get_conn() as conn:
-            items = await conn.fetch(
-                """
-                SELECT item_id, row_index, input_address
-                FROM batch_job_item
-                WHERE batch_id = $1
-                ORDER BY row_index
-                """,
-                batch_id,
-            )
-
-        completed = 0
-        failed = 0
-
-        for item in items:
-            row_index = item["row_index"]
-            item_id = item["item_id"]
-            input_address = item["input_address"]
-
-            # Emit processing event
-            yield f"data: {json.dumps({'type': 'processing', 'row_index': row_index})}\n\n"
-
-            try:
-                # Update item status to processing
-                async with get_conn() as conn:
-                    await conn.execute(
-                        "UPDATE batch_job_item SET status = 'processing', updated_at = NOW() WHERE item_id = $1",
-                        item_id,
-                    )
-
-                # Resolve address
-                resolution = await resolve_address(input_address)
-                if not resolution["resolved"]:
-                    raise ValueError(
-                        resolution.get("warning") or "Address could not be resolved"
-                    )
-
-                location_sk = resolution["location_sk"]
-                resolved_address = resolution["full_address"] or input_address
-
-                # Generate report
-                report = await generate_single_report(
-                    location_sk=location_sk,
-                    address=resolved_address,
-                    user_id=user_id,
-                )
-
-                # Update item as completed
-                async with get_conn() as conn:
-                    await conn.execute(
-                        """
-                        UPDATE batch_job_item
-                        SET status = 'completed', location_sk = $2,
-                            report_id = $3, updated_at = NOW()
-                        WHERE item_id = $1
-                        """,
-                        item_id,
-                        location_sk,
-                        report["report_id"],
-                    )
-
-                completed += 1
-
-                yield f"data: {json.dumps({'type': 'completed', 'row_index': row_index, 'report_id': report['report_id'], 'activity_score': report['activity_score'], 'activity_level': report['activity_level'], 'flag_count': len(report['triggered_flags'])})}\n\n"
-
-            except Exception as exc:
-                error_msg = str(exc)[:500]
-                async with get_conn() as conn:
-                    await conn.execute(
-                        """
-                        UPDATE batch_job_item
-                        SET status = 'failed', error_message = $2, updated_at = NOW()
-                        WHERE item_id = $1
-                        """,
-                        item_id,
-                        error_msg,
-                    )
-                failed += 1
-
-                yield f"data: {json.dumps({'type': 'failed', 'row_index': row_index, 'error': error_msg})}\n\n"
-
-        # Update batch job as completed
-        async with get_conn() as conn:
-            await conn.execute(
-                """
-                UPDATE batch_job
-                SET status = 'completed', completed_count = $2,
-                    failed_count = $3, completed_at = NOW()
-                WHERE batch_id = $1
-                """,
-                batch_id,
-                completed,
-                failed,
-            )
-
-        yield f"data: {json.dumps({'type': 'done', 'completed': completed, 'failed': failed})}\n\n"
+        async for event_id, event in tail_batch(batch_id, last_event_id):
+            if event is None:
+                yield ": heartbeat\n\n"
+            elif event_id is None:
+                yield f"data: {json.dumps(event)}\n\n"
+            else:
+                yield f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
 
     return StreamingResponse(
         event_generator(),
@@ -2,6 +2,7 @@
 CIVITAS – Property lookup router.
 
 POST /api/v1/property/lookup
+POST /api/v1/property/scores
 GET /api/v1/property/autocomplete?q={prefix}&limit=10
 GET /api/v1/property/neighbors?location_sk=...&radius=500
 GET /api/v1/property/assessment-history?pin=...
@@ -22,7 +23,10 @@ from backend.app.schemas.property import (
     NeighborProperty,
     PropertyLookupRequest,
     PropertyLookupResponse,
+    PropertyScore,
+    PropertyScoresRequest,
 )
+from backend.app.services import rule_engine
 from backend.app.services.address import resolve_address
 from backend.app.services.socrata_proxy import (
     get_assessment_history,
@@ -39,6 +43,22 @@ async def lookup_property(body: PropertyLookupRequest, user: dict = Depends(get_
     return PropertyLookupResponse(**result)
 
 
+@router.post("/scores", response_model=List[PropertyScore])
+async def property_scores(body: PropertyScoresRequest, user: dict = Depends(get_current_user)):
+    """Scores and flags for many locations; one query per layer, request order kept."""
+    scores, flags = await rule_engine.get_scores_and_flags(body.location_sks)
+    return [
+        PropertyScore(
+            location_sk=sk,
+            activity_score=int(score["raw_score"]),
+            activity_level=score["activity_level"],
+            flag_count=int(score["flag_count"]),
+            flags=flags[sk],
+        )
+        for sk, score in scores.items()
+    ]
+
+
 @router.get("/neighbors", response_model=List[NeighborProperty])
 async def get_neighbors(
     location_sk: int = Query(..., description="Subject property location_sk"),
@@ -72,7 +92,7 @@ async def get_neighbors(
             LEFT JOIN LATERAL (
                 SELECT description FROM view_property_flags
                 WHERE location_sk = n.location_sk
-                ORDER BY severity_score DESC
+                ORDER BY severity_score DESC, flag_code
                 LIMIT 1
             ) f ON TRUE
             ORDER BY n.distance_m
@@ -96,6 +116,20 @@ async def get_neighbors(
     ]
 
 
+def _autocomplete_prefix(q: str) -> tuple[str, str]:
+    """
+    Split a typed prefix into its complete words and the word still being
+    typed. Only complete words go through street-key alias folding: "BL" may
+    be the start of BLACKSTONE, not BLVD. Everything before a comma or a
+    trailing space is complete.
+    """
+    street, comma, _ = q.partition(",")
+    if comma or not street or street[-1].isspace():
+        return street, ""
+    *head, last = street.split()
+    return " ".join(head), last.upper()
+
+
 @router.get("/autocomplete", response_model=List[AutocompleteItem])
 async def autocomplete_address(
     q: str = Query(..., min_length=2, description="Address prefix"),
@@ -103,24 +137,34 @@ async def autocomplete_address(
     user: dict = Depends(get_current_user),
 ):
     async with get_conn() as conn:
+        # Prefix ranges over the street_key index: the key drops the city/zip
+        # suffix and folds street-type aliases, so variants collapse to one
+        # row. The word being typed is matched both as typed ("BL" →
+        # BLACKSTONE) and folded, in case it is already complete ("PKY" → PKWY).
+        complete, partial = _autocomplete_prefix(q)
         rows = await conn.fetch(
             """
-            SELECT DISTINCT ON (norm_addr)
+            WITH keys AS (
+                SELECT concat_ws(' ', normalize_street_key($1), NULLIF($3, '')) AS typed,
+                       normalize_street_key($1 || ' ' || $3) AS folded
+            ), prefix AS (
+                SELECT typed, left(typed, -1) || chr(ascii(right(typed, 1)) + 1) AS typed_end,
+                       folded, left(folded, -1) || chr(ascii(right(folded, 1)) + 1) AS folded_end
+                FROM keys
+            )
+            SELECT DISTINCT ON (street_key)
                    location_sk, full_address_standardized
-            FROM (
-                SELECT location_sk, full_address_standardized,
-                       REPLACE(
-                           REGEXP_REPLACE(full_address_standardized, ',\\s*CHICAGO.*$', ''),
-                           ' PKY', ' PKWY'
-                       ) AS norm_addr
-                FROM dim_location
-                WHERE full_address_standardized ILIKE $1
-            ) sub
-            ORDER BY norm_addr, LENGTH(full_address_standardized)
+            FROM dim_location
+            WHERE (street_key ~>=~ (SELECT typed FROM prefix)
+                   AND street_key ~<~ (SELECT typed_end FROM prefix))
+               OR (street_key ~>=~ (SELECT folded FROM prefix)
+                   AND street_key ~<~ (SELECT folded_end FROM prefix))
+            ORDER BY street_key, LENGTH(full_address_standardized)
             LIMIT $2
             """,
-            q + "%",
+            complete,
             limit,
+            partial,
         )
     return [
         AutocompleteItem(location_sk=r["location_sk"], full_address=r["full_address_standardized"])
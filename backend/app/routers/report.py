@@ -27,6 +27,7 @@ from backend.app.dependencies import get_current_user
 from backend.app.schemas.report import ReportHistoryItem, ReportRequest
 from fastapi.responses import StreamingResponse
 
+from backend.app.services import json_text
 from backend.app.services.pdf import generate_pdf
 from backend.app.services.report import (
     generate_report_brief,
@@ -57,7 +58,7 @@ async def generate_report(
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
     if format == "pdf":
-        pdf_bytes = generate_pdf(report)
+        pdf_bytes = generate_pdf(json_text.plain(report))
         return Response(
             content=pdf_bytes,
             media_type="application/pdf",
@@ -84,7 +85,8 @@ async def generate_report(
         if loc["parcel_id"]:
             report["parcel_id"] = loc["parcel_id"]
 
-    return report
+    # Supporting records are JSON text from Postgres; splice them in unparsed
+    return Response(content=json_text.dumps(report), media_type="application/json")
 
 
 @router.get("/{report_id}/summary")
@@ -196,16 +198,19 @@ async def compare_summary(
     if len(report_ids) < 2:
         raise HTTPException(status_code=400, detail="At least 2 report IDs required")
 
+    report_ids = report_ids[:5]  # Cap at 5
+    async with get_conn() as conn:
+        rows = await conn.fetch(
+            "SELECT report_id::text, report_json FROM report_audit WHERE report_id = ANY($1::uuid[])",
+            report_ids,
+        )
+    by_id = {r["report_id"]: r["report_json"] for r in rows}
+
     property_summaries = []
-    for rid in report_ids[:5]:  # Cap at 5
-        async with get_conn() as conn:
-            row = await conn.fetchrow(
-                "SELECT report_json FROM report_audit WHERE report_id = $1",
-                rid,
-            )
-        if not row:
+    for rid in report_ids:
+        raw = by_id.get(str(rid).lower())
+        if raw is None:
             continue
-        raw = row["report_json"]
         report = json.loads(raw) if isinstance(raw, str) else dict(raw)
         property_summaries.append({
             "address": report.get("property", {}).get("address", ""),
@@ -13,6 +13,7 @@ class BatchUploadResponse(BaseModel):
     batch_id: str
     batch_name: Optional[str]
     total_count: int
+    duplicate_count: int = 0       # repeated addresses queued once
 
 
 class BatchItemStatus(BaseModel):
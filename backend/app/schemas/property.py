@@ -3,7 +3,7 @@ CIVITAS – Property resolution Pydantic models.
 """
 
 from __future__ import annotations
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -43,3 +43,30 @@ class PropertyLookupResponse(BaseModel):
     parcel_id: Optional[str] = None
     match_confidence: str = "NO_MATCH"   # EXACT_PIN | EXACT_ADDRESS | STREET_ZIP | GEOSPATIAL | NO_MATCH
     warning: Optional[str] = None
+
+
+MAX_SCORE_LOCATIONS = 5000
+
+
+class PropertyScoresRequest(BaseModel):
+    location_sks: List[int] = Field(
+        ..., min_length=1, max_length=MAX_SCORE_LOCATIONS,
+        description="location_sk values to score (duplicates are collapsed)",
+    )
+
+
+class PropertyFlag(BaseModel):
+    flag_code: str
+    category: str
+    description: Optional[str] = None
+    severity_score: int = 0
+    supporting_count: int = 0
+    action_group: Optional[str] = None
+
+
+class PropertyScore(BaseModel):
+    location_sk: int
+    activity_score: int = 0
+    activity_level: str = "QUIET"
+    flag_count: int = 0
+    flags: List[PropertyFlag] = []
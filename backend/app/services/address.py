@@ -3,24 +3,41 @@ CIVITAS – Runtime address resolution service.
 
 Implements the address resolution hierarchy (read-only against dim_*):
   1.  Exact PIN match → dim_parcel → location_sk
-  2a. Street-only canonical match → dim_location (deduplicates city/zip variants)
+  2a. Street-only key match → dim_location.street_key (deduplicates city/zip variants)
   2b. Full standardized address match → dim_location
   2c. Component match (house + direction + street + type) → dim_location
   3.  house_number + street_name + zip match → dim_location
   4.  Geospatial fallback (if lat/lon present, within configured radius)
 
 Returns structured result including match_confidence code.
+
+resolve_address() resolves one address; resolve_addresses() applies the
+same tiers to a whole list with one unnest()-joined query per tier.
 """
 
 from __future__ import annotations
 
+import asyncio
+import multiprocessing
+import os
 import re
-from typing import Optional
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from typing import Optional, Sequence
 
+from backend.app.config import settings
 from backend.app.database import get_conn
-from backend.ingestion.base import AddressStandardizer
+from backend.ingestion.base import (
+    AddressStandardizer, ParsedAddress, new_parse_pool, parse_stream,
+)
+
+_std = AddressStandardizer(cache_size=settings.address_cache_size)
+
 
-_std = AddressStandardizer()
+def address_cache_stats() -> dict:
+    """Hit/miss/eviction counters for the shared address parse cache."""
+    return _std.cache_stats()
 
 
 def _normalize_pin(raw: str) -> Optional[str]:
@@ -28,6 +45,63 @@ def _normalize_pin(raw: str) -> Optional[str]:
     return digits if len(digits) == 14 else None
 
 
+_LOCATION_COLUMNS = """
+    l.location_sk, l.full_address_standardized,
+    l.house_number, l.street_direction, l.street_name,
+    l.street_type, l.zip, l.lat, l.lon,
+    l.community_area_id, p.parcel_id
+"""
+
+# Tiers 1–3 as one ranked query: 1 PIN, 2a street-only key (dim_location.
+# street_key, which ignores the ", CHICAGO IL 606xx" suffix and folds
+# street-type aliases; the input's zip breaks ties), 2b full parsed form, 2c components
+# without zip (direction and type only constrain when parsed), 3 house
+# number + street name + zip. Each branch returns at most one row (lowest
+# location_sk) and the first tier with a row wins. A NULL parameter disables
+# its tier: $1 pin, $2 street-only form, $3 full form (only when it differs
+# from $2), $4–$7 house number, direction, street name, type, $8 zip.
+_RESOLVE_SQL = f"""
+SELECT * FROM (
+    (SELECT 1 AS tier, 'EXACT_PIN' AS match_confidence, {_LOCATION_COLUMNS}
+     FROM dim_parcel p
+     JOIN dim_location l ON l.location_sk = p.location_sk
+     WHERE p.parcel_id = $1::text
+     ORDER BY l.location_sk LIMIT 1)
+    UNION ALL
+    (SELECT 2, 'EXACT_ADDRESS', {_LOCATION_COLUMNS}
+     FROM dim_location l
+     LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
+     WHERE l.street_key = normalize_street_key($2::text)
+     ORDER BY l.zip IS DISTINCT FROM $8::text, l.location_sk LIMIT 1)
+    UNION ALL
+    (SELECT 3, 'EXACT_ADDRESS', {_LOCATION_COLUMNS}
+     FROM dim_location l
+     LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
+     WHERE l.full_address_standardized = $3::text
+     ORDER BY l.location_sk LIMIT 1)
+    UNION ALL
+    (SELECT 4, 'COMPONENT_MATCH', {_LOCATION_COLUMNS}
+     FROM dim_location l
+     LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
+     WHERE l.house_number = $4::text
+       AND l.street_name  = $6::text
+       AND ($5::text IS NULL OR l.street_direction = $5::text)
+       AND ($7::text IS NULL OR l.street_type = $7::text)
+     ORDER BY l.location_sk LIMIT 1)
+    UNION ALL
+    (SELECT 5, 'STREET_ZIP', {_LOCATION_COLUMNS}
+     FROM dim_location l
+     LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
+     WHERE l.house_number = $4::text
+       AND l.street_name  = $6::text
+       AND l.zip          = $8::text
+     ORDER BY l.location_sk LIMIT 1)
+) AS tiers
+ORDER BY tier
+LIMIT 1
+"""
+
+
 async def resolve_address(
     address: str,
     pin: Optional[str] = None,
@@ -36,6 +110,8 @@ async def resolve_address(
     Returns a dict with keys:
       resolved, location_sk, full_address, house_number, street_direction,
       street_name, street_type, zip, lat, lon, parcel_id, match_confidence, warning
+
+    All tiers run as one query (_RESOLVE_SQL), so a lookup is one round trip.
     """
     result = {
         "resolved": False,
@@ -54,137 +130,273 @@ async def resolve_address(
         "warning": None,
     }
 
-    async with get_conn() as conn:
-        # ── Tier 1: Exact PIN match ──────────────────────────────────────────
-        if pin:
-            norm_pin = _normalize_pin(pin)
-            if norm_pin:
-                row = await conn.fetchrow(
-                    """
-                    SELECT p.parcel_sk, p.parcel_id,
-                           l.location_sk, l.full_address_standardized,
-                           l.house_number, l.street_direction, l.street_name,
-                           l.street_type, l.zip, l.lat, l.lon,
-                           l.community_area_id
-                    FROM dim_parcel p
-                    JOIN dim_location l ON l.location_sk = p.location_sk
-                    WHERE p.parcel_id = $1
-                    """,
-                    norm_pin,
-                )
-                if row:
-                    return _build_result(row, "EXACT_PIN", parcel_id=row["parcel_id"])
-
-        # Parse the address for tiers 2–4
-        parsed = _std.parse(raw_address=address)
-
-        if not parsed.full_address_standardized:
-            result["warning"] = "Address could not be parsed. Manual verification recommended."
-            return result
+    norm_pin = _normalize_pin(pin) if pin else None
 
-        # Build street-only canonical form (no city/state/zip) for dedup
+    # Parse the address for tiers 2–3; an unparseable address can still
+    # match on its PIN
+    parsed = _std.parse(raw_address=address)
+    parse_warning = "Address could not be parsed. Manual verification recommended."
+    if not parsed.full_address_standardized:
+        if not norm_pin:
+            result["warning"] = parse_warning
+            return result
+        params = [None] * 7
+    else:
+        # Street-only canonical form (no city/state/zip) for dedup
         parts = [parsed.house_number, parsed.street_direction,
                  parsed.street_name, parsed.street_type]
         street_only = " ".join(p for p in parts if p)
+        full_form = parsed.full_address_standardized
+        params = [
+            street_only or None,
+            full_form if full_form != street_only else None,
+            parsed.house_number or None,
+            parsed.street_direction or None,
+            parsed.street_name or None,
+            parsed.street_type or None,
+            parsed.zip or None,
+        ]
 
-        # ── Tier 2a: Street-only exact match ───────────────────────────────
-        # Matches the canonical ETL form without city/state/zip suffix
-        if street_only:
-            row = await conn.fetchrow(
-                """
-                SELECT l.location_sk, l.full_address_standardized,
-                       l.house_number, l.street_direction, l.street_name,
-                       l.street_type, l.zip, l.lat, l.lon,
-                       l.community_area_id, p.parcel_id
-                FROM dim_location l
-                LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
-                WHERE l.full_address_standardized = $1
-                LIMIT 1
-                """,
-                street_only,
+    # ── Tier 4: Geospatial fallback (if coords available in parsed) ──────────
+    # NOTE: usaddress doesn't give us lat/lon; this tier fires only when
+    # the caller passes a geocoded address string that usaddress has
+    # embedded coordinates for. In practice, most lookups end at tier 2/3.
+    # Geospatial lookup is available if lat/lon can be inferred.
+    # (Wired but requires external geocode pass – skipped if no coords)
+
+    async with get_conn() as conn:
+        row = await conn.fetchrow(_RESOLVE_SQL, norm_pin, *params)
+    if row:
+        return _build_result(row, row["match_confidence"], parcel_id=row["parcel_id"])
+
+    # No match
+    result["warning"] = (
+        parse_warning if not parsed.full_address_standardized
+        else "Address match uncertain – manual verification recommended."
+    )
+    return result
+
+
+# ── Bulk resolution ──────────────────────────────────────────────────────────
+
+# Lists up to this size are parsed on the event loop (cache hits are free,
+# a miss costs ~0.25 ms); longer ones in a thread
+_INLINE_PARSE_MAX = 100
+
+# Each tier takes parallel arrays keyed by input index and returns at most
+# one row per index (lowest location_sk, so results are deterministic)
+_PIN_TIER_SQL = f"""
+SELECT DISTINCT ON (u.idx) u.idx, {_LOCATION_COLUMNS}
+FROM unnest($1::int[], $2::text[]) AS u(idx, pin)
+JOIN dim_parcel p ON p.parcel_id = u.pin
+JOIN dim_location l ON l.location_sk = p.location_sk
+ORDER BY u.idx, l.location_sk
+"""
+
+_STREET_KEY_TIER_SQL = f"""
+SELECT DISTINCT ON (u.idx) u.idx, {_LOCATION_COLUMNS}
+FROM unnest($1::int[], $2::text[], $3::text[]) AS u(idx, street, zip)
+JOIN dim_location l ON l.street_key = normalize_street_key(u.street)
+LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
+ORDER BY u.idx, l.zip IS DISTINCT FROM u.zip, l.location_sk
+"""
+
+_EXACT_TIER_SQL = f"""
+SELECT DISTINCT ON (u.idx) u.idx, {_LOCATION_COLUMNS}
+FROM unnest($1::int[], $2::text[]) AS u(idx, address)
+JOIN dim_location l ON l.full_address_standardized = u.address
+LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
+ORDER BY u.idx, l.location_sk
+"""
+
+_COMPONENT_TIER_SQL = f"""
+SELECT DISTINCT ON (u.idx) u.idx, {_LOCATION_COLUMNS}
+FROM unnest($1::int[], $2::text[], $3::text[], $4::text[], $5::text[])
+     AS u(idx, house_number, street_direction, street_name, street_type)
+JOIN dim_location l
+  ON l.house_number = u.house_number
+ AND l.street_name  = u.street_name
+ AND (u.street_direction IS NULL OR l.street_direction = u.street_direction)
+ AND (u.street_type IS NULL OR l.street_type = u.street_type)
+LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
+ORDER BY u.idx, l.location_sk
+"""
+
+_STREET_ZIP_TIER_SQL = f"""
+SELECT DISTINCT ON (u.idx) u.idx, {_LOCATION_COLUMNS}
+FROM unnest($1::int[], $2::text[], $3::text[], $4::text[])
+     AS u(idx, house_number, street_name, zip)
+JOIN dim_location l
+  ON l.house_number = u.house_number
+ AND l.street_name  = u.street_name
+ AND l.zip          = u.zip
+LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
+ORDER BY u.idx, l.location_sk
+"""
+
+
+# One spawn-context pool per process, started on first use and reused by
+# every large resolve_addresses() call
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def _shared_parse_pool(workers: int):
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = new_parse_pool(workers, multiprocessing.get_context("spawn"))
+        return _parse_pool
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the shared parse pool, if one was started."""
+    global _parse_pool
+    with _parse_pool_lock:
+        pool, _parse_pool = _parse_pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def _parse_many(addresses: list[str]) -> list[Optional[ParsedAddress]]:
+    """Parse through the shared cache; cache misses in worker processes when large."""
+    workers = min(settings.address_parse_workers, os.cpu_count() or 1)
+    if len(addresses) < settings.address_parse_parallel_min:
+        workers = 1
+    pool = _shared_parse_pool(workers) if workers > 1 else None
+    try:
+        return [
+            parsed for _, parsed in parse_stream(
+                addresses,
+                lambda address: {"raw_address": address},
+                _std,
+                workers=workers,
+                pool=pool,
             )
-            if row:
-                return _build_result(row, "EXACT_ADDRESS", parcel_id=row["parcel_id"])
+        ]
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool on the next call
+        shutdown_parse_pool()
+        raise
+
+
+def _unresolved(warning: str) -> dict:
+    return {
+        "resolved": False,
+        "location_sk": None,
+        "full_address": None,
+        "house_number": None,
+        "street_direction": None,
+        "street_name": None,
+        "street_type": None,
+        "zip": None,
+        "lat": None,
+        "lon": None,
+        "parcel_id": None,
+        "community_area_id": None,
+        "match_confidence": "NO_MATCH",
+        "warning": warning,
+    }
+
+
+async def resolve_addresses(
+    addresses: Sequence[str],
+    pins: Optional[Sequence[Optional[str]]] = None,
+    conn=None,
+) -> list[dict]:
+    """
+    Resolve many addresses at once with the tiers of resolve_address():
+    every input is parsed first, then each tier runs as one query over all
+    inputs it still has to resolve. Returns one result dict (same keys and
+    match_confidence codes as resolve_address) per input, in input order.
+    Repeated inputs are resolved once. `conn` lets callers with their own
+    pool (the MCP servers) supply the connection.
+    """
+    pins = list(pins) if pins is not None else [None] * len(addresses)
+    keys: list[tuple[str, Optional[str]]] = []
+    index: dict[tuple[str, Optional[str]], int] = {}
+    for address, pin in zip(addresses, pins):
+        key = ((address or "").strip(), _normalize_pin(pin) if pin else None)
+        index.setdefault(key, len(index))
+        keys.append(key)
+    unique = list(index)
+    found: dict[int, dict] = {}
+
+    async with (nullcontext(conn) if conn is not None else get_conn()) as conn:
+
+        async def run_tier(sql: str, confidence: str, idxs: list[int], *columns: list) -> None:
+            if not idxs:
+                return
+            for row in await conn.fetch(sql, idxs, *columns):
+                found[row["idx"]] = _build_result(row, confidence, parcel_id=row["parcel_id"])
+
+        # ── Tier 1: Exact PIN match ──────────────────────────────────────────
+        with_pin = [i for i, (_, pin) in enumerate(unique) if pin]
+        await run_tier(_PIN_TIER_SQL, "EXACT_PIN", with_pin, [unique[i][1] for i in with_pin])
+
+        # Parse the rest for tiers 2–3
+        todo = [i for i in range(len(unique)) if i not in found]
+        raw = [unique[i][0] for i in todo]
+        if len(raw) <= _INLINE_PARSE_MAX:
+            parsed_list = [_std.parse(raw_address=a) for a in raw]
+        else:
+            parsed_list = await asyncio.to_thread(_parse_many, raw)
+
+        parsed: dict[int, ParsedAddress] = {}
+        unparseable: set[int] = set()
+        for i, p in zip(todo, parsed_list):
+            if p is None or not p.full_address_standardized:
+                unparseable.add(i)
+            else:
+                parsed[i] = p
+
+        def street_only(p: ParsedAddress) -> str:
+            parts = [p.house_number, p.street_direction, p.street_name, p.street_type]
+            return " ".join(x for x in parts if x)
+
+        def pending(pred) -> list[int]:
+            return [i for i, p in parsed.items() if i not in found and pred(p)]
+
+        # ── Tier 2a: Street-only exact match ───────────────────────────────
+        idxs = pending(lambda p: street_only(p))
+        await run_tier(_STREET_KEY_TIER_SQL, "EXACT_ADDRESS", idxs,
+                       [street_only(parsed[i]) for i in idxs],
+                       [parsed[i].zip or None for i in idxs])
 
         # ── Tier 2b: Full parsed form exact match ──────────────────────────
-        # Only if full form differs from street-only (has city/zip suffix)
-        if parsed.full_address_standardized != street_only:
-            row = await conn.fetchrow(
-                """
-                SELECT l.location_sk, l.full_address_standardized,
-                       l.house_number, l.street_direction, l.street_name,
-                       l.street_type, l.zip, l.lat, l.lon,
-                       l.community_area_id, p.parcel_id
-                FROM dim_location l
-                LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
-                WHERE l.full_address_standardized = $1
-                LIMIT 1
-                """,
-                parsed.full_address_standardized,
-            )
-            if row:
-                return _build_result(row, "EXACT_ADDRESS", parcel_id=row["parcel_id"])
+        idxs = pending(lambda p: p.full_address_standardized != street_only(p))
+        await run_tier(_EXACT_TIER_SQL, "EXACT_ADDRESS", idxs,
+                       [parsed[i].full_address_standardized for i in idxs])
 
         # ── Tier 2c: Component match (no zip) ──────────────────────────────
-        # Catches formatting variations by matching individual columns
-        if parsed.house_number and parsed.street_name:
-            conditions = ["l.house_number = $1", "l.street_name = $2"]
-            params = [parsed.house_number, parsed.street_name]
-            idx = 3
-            if parsed.street_direction:
-                conditions.append(f"l.street_direction = ${idx}")
-                params.append(parsed.street_direction)
-                idx += 1
-            if parsed.street_type:
-                conditions.append(f"l.street_type = ${idx}")
-                params.append(parsed.street_type)
-            where = " AND ".join(conditions)
-            row = await conn.fetchrow(
-                f"""
-                SELECT l.location_sk, l.full_address_standardized,
-                       l.house_number, l.street_direction, l.street_name,
-                       l.street_type, l.zip, l.lat, l.lon,
-                       l.community_area_id, p.parcel_id
-                FROM dim_location l
-                LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
-                WHERE {where}
-                LIMIT 1
-                """,
-                *params,
-            )
-            if row:
-                return _build_result(row, "COMPONENT_MATCH", parcel_id=row["parcel_id"])
+        idxs = pending(lambda p: p.house_number and p.street_name)
+        await run_tier(
+            _COMPONENT_TIER_SQL, "COMPONENT_MATCH", idxs,
+            [parsed[i].house_number for i in idxs],
+            [parsed[i].street_direction or None for i in idxs],
+            [parsed[i].street_name for i in idxs],
+            [parsed[i].street_type or None for i in idxs],
+        )
 
         # ── Tier 3: house_number + street_name + zip ─────────────────────────
-        if parsed.house_number and parsed.street_name and parsed.zip:
-            row = await conn.fetchrow(
-                """
-                SELECT l.location_sk, l.full_address_standardized,
-                       l.house_number, l.street_direction, l.street_name,
-                       l.street_type, l.zip, l.lat, l.lon,
-                       l.community_area_id, p.parcel_id
-                FROM dim_location l
-                LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
-                WHERE l.house_number = $1
-                  AND l.street_name  = $2
-                  AND l.zip          = $3
-                LIMIT 1
-                """,
-                parsed.house_number, parsed.street_name, parsed.zip,
-            )
-            if row:
-                return _build_result(row, "STREET_ZIP", parcel_id=row["parcel_id"])
-
-        # ── Tier 4: Geospatial fallback (if coords available in parsed) ──────
-        # NOTE: usaddress doesn't give us lat/lon; this tier fires only when
-        # the caller passes a geocoded address string that usaddress has
-        # embedded coordinates for. In practice, most lookups end at tier 2/3.
-        # Geospatial lookup is available if lat/lon can be inferred.
-        # (Wired but requires external geocode pass – skipped if no coords)
+        idxs = pending(lambda p: p.house_number and p.street_name and p.zip)
+        await run_tier(
+            _STREET_ZIP_TIER_SQL, "STREET_ZIP", idxs,
+            [parsed[i].house_number for i in idxs],
+            [parsed[i].street_name for i in idxs],
+            [parsed[i].zip for i in idxs],
+        )
 
-    # No match
-    result["warning"] = "Address match uncertain – manual verification recommended."
-    return result
+    results = []
+    for key in keys:
+        i = index[key]
+        if i in found:
+            results.append(dict(found[i]))
+        elif i in unparseable:
+            results.append(_unresolved("Address could not be parsed. Manual verification recommended."))
+        else:
+            results.append(_unresolved("Address match uncertain – manual verification recommended."))
+    return results
 
 
 def _build_result(row, confidence: str, parcel_id: Optional[str] = None) -> dict:
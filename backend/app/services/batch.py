@@ -0,0 +1,573 @@
+"""
+CIVITAS – Batch/portfolio processing.
+
+Uploads are parsed row by row and deduplicated (each address is queued,
+resolved and reported once), then written with one COPY (create_batch).
+
+batch_job_item doubles as a durable work queue (sql/10_batch_queue.sql).
+Worker processes started from the tasks runtime (tasks/batch_worker.py)
+run run_worker(), which claims pending items with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers share the
+queue without handing out the same item twice. A claim is a lease: items
+held by a worker that dies are claimed again once batch_item_lease_seconds
+pass. Transient failures (connection drops, timeouts, deadlocks) go back to
+pending with a doubling delay until batch_max_attempts; anything else fails
+the item right away.
+
+The API never processes items itself, so any number of streams (tabs,
+reconnects) can follow one batch without duplicating work. tail_batch()
+follows a batch's progress in the table and yields the events the SSE
+stream sends:
+
+  {"type": "processing", "row_index"}                  item picked up
+  {"type": "completed",  "row_index", "report_id", ...} report generated
+  {"type": "failed",     "row_index", "error"}         resolution/report error
+  {"type": "done", "completed", "failed", ...}         final summary, always last
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, BinaryIO, Optional
+
+import asyncpg
+
+from backend.app.config import settings
+from backend.app.constants import TIER_LABELS
+from backend.app.database import get_conn
+from backend.app.services.address import resolve_addresses
+from backend.app.services.report import generate_single_report
+
+log = logging.getLogger(__name__)
+
+# Worth another attempt: the item itself is fine, the environment was not
+TRANSIENT_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.InterfaceError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.InsufficientResourcesError,
+    asyncpg.TransactionRollbackError,
+    asyncpg.QueryCanceledError,
+)
+
+
+def batch_workers() -> int:
+    """Items processed at once by one worker process."""
+    return max(1, min(settings.batch_concurrency, settings.db_pool_max_size // 2))
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before retrying an item that has failed `attempts` times."""
+    return settings.batch_retry_delay_seconds * 2 ** max(0, attempts - 1)
+
+
+# ── Upload ───────────────────────────────────────────────────────────────────
+
+# Column names we recognise (case-insensitive)
+ADDRESS_COLUMNS = {"address", "property_address", "full_address", "street_address"}
+
+
+def _address_key(address: str) -> str:
+    return " ".join(address.upper().split())
+
+
+def parse_address_csv(stream: BinaryIO, max_rows: int) -> tuple[list[str], int]:
+    """
+    Read an uploaded CSV row by row. Returns the unique addresses in
+    first-seen order (case and whitespace ignored) and the number of rows
+    that had one. Raises ValueError with a user-facing message.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        if not reader.fieldnames:
+            raise ValueError("CSV has no headers")
+        column = next((h for h in reader.fieldnames if h and h.strip().lower() in ADDRESS_COLUMNS), None)
+        if column is None:
+            raise ValueError(
+                "CSV must contain an address column "
+                "(address, property_address, full_address, or street_address)"
+            )
+
+        unique: dict[str, str] = {}
+        rows = 0
+        for row in reader:
+            address = (row.get(column) or "").strip()
+            if not address:
+                continue
+            rows += 1
+            if rows > max_rows:
+                raise ValueError(f"CSV exceeds maximum of {max_rows} rows")
+            unique.setdefault(_address_key(address), address)
+    except UnicodeDecodeError:
+        raise ValueError("File must be UTF-8 encoded")
+    finally:
+        text.detach()  # leave the upload's file open for its owner
+    return list(unique.values()), rows
+
+
+async def create_batch(user_id, batch_name: Optional[str], addresses: list[str]) -> str:
+    """Insert the batch_job and one queue item per address in one transaction."""
+    async with get_conn() as conn:
+        async with conn.transaction():
+            batch_id = await conn.fetchval(
+                """
+                INSERT INTO batch_job (user_id, batch_name, total_count)
+                VALUES ($1, $2, $3)
+                RETURNING batch_id
+                """,
+                user_id,
+                batch_name,
+                len(addresses),
+            )
+            await conn.copy_records_to_table(
+                "batch_job_item",
+                columns=["batch_id", "row_index", "input_address"],
+                records=[(batch_id, idx, address) for idx, address in enumerate(addresses)],
+            )
+    return str(batch_id)
+
+
+# ── Queue ────────────────────────────────────────────────────────────────────
+
+# Round-robin across active batches: every batch offers its oldest due items
+# (locked, at most $2 each) and the claim takes each batch's first item, then
+# each batch's second, ... oldest batch first, so a 100k-row upload cannot hold
+# back batches submitted after it.
+_CLAIM_SQL = """
+WITH offered AS (
+    SELECT o.item_id, b.created_at,
+           row_number() OVER (PARTITION BY b.batch_id ORDER BY o.item_id) AS turn
+    FROM batch_job b
+    CROSS JOIN LATERAL (
+        SELECT i.item_id
+        FROM batch_job_item i
+        WHERE i.batch_id = b.batch_id
+          AND ((i.status = 'pending' AND (i.next_attempt_at IS NULL OR i.next_attempt_at <= NOW()))
+               OR (i.status = 'processing' AND i.locked_at < NOW() - make_interval(secs => $3)))
+        ORDER BY i.item_id
+        LIMIT $2
+        FOR UPDATE SKIP LOCKED
+    ) o
+    WHERE b.status IN ('pending', 'processing')
+), next AS (
+    SELECT item_id
+    FROM offered
+    ORDER BY turn, created_at, item_id
+    LIMIT $2
+), claimed AS (
+    UPDATE batch_job_item i
+    SET status     = 'processing',
+        attempts   = i.attempts + 1,
+        locked_by  = $1,
+        locked_at  = NOW(),
+        updated_at = NOW()
+    FROM next
+    WHERE i.item_id = next.item_id
+    RETURNING i.item_id, i.batch_id, i.row_index, i.input_address, i.attempts
+), started AS (
+    UPDATE batch_job b
+    SET status = 'processing'
+    WHERE b.batch_id IN (SELECT batch_id FROM claimed) AND b.status = 'pending'
+)
+SELECT c.item_id, c.batch_id, c.row_index, c.input_address, c.attempts, b.user_id
+FROM claimed c
+JOIN batch_job b ON b.batch_id = c.batch_id
+ORDER BY c.item_id
+"""
+
+
+async def claim_items(worker_id: str, limit: int) -> list:
+    """Lease up to `limit` due items to `worker_id`, round-robin across batches."""
+    async with get_conn() as conn:
+        return await conn.fetch(
+            _CLAIM_SQL, worker_id, limit, float(settings.batch_item_lease_seconds),
+        )
+
+
+async def release_items(worker_id: str, item_ids: list[int]) -> None:
+    """Hand unfinished items back to the queue (worker stopping or recovering)."""
+    if not item_ids:
+        return
+    async with get_conn() as conn:
+        await conn.execute(
+            """
+            UPDATE batch_job_item
+            SET status = 'pending', attempts = GREATEST(attempts - 1, 0),
+                locked_by = NULL, locked_at = NULL, updated_at = NOW()
+            WHERE item_id = ANY($1::int[]) AND locked_by = $2 AND status = 'processing'
+            """,
+            item_ids,
+            worker_id,
+        )
+
+
+class StatusWriter:
+    """
+    Buffers item outcomes; flush() writes them and the batch_job counters in
+    one statement. Only items still leased to this worker are updated, so a
+    worker whose lease expired cannot overwrite the item's new owner.
+    """
+
+    def __init__(self, worker_id: str):
+        self.worker_id = worker_id
+        self._pending: dict[int, tuple] = {}
+        self._last_flush = time.monotonic()
+        self.statements = 0
+
+    def add(
+        self,
+        item_id: int,
+        status: str,
+        location_sk: Optional[int] = None,
+        report_id: Optional[str] = None,
+        error_message: Optional[str] = None,
+        retry_in: Optional[float] = None,
+    ) -> None:
+        # A later status for the same item replaces an unflushed earlier one
+        self._pending[item_id] = (status, location_sk, report_id, error_message, retry_in)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._pending
+
+    def due(self) -> bool:
+        return bool(self._pending) and (
+            len(self._pending) >= settings.batch_status_flush_rows
+            or time.monotonic() - self._last_flush >= settings.batch_status_flush_seconds
+        )
+
+    async def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        ids = list(pending)
+        async with get_conn() as conn:
+            await conn.execute(
+                """
+                WITH done AS (
+                    UPDATE batch_job_item i
+                    SET status          = u.status,
+                        location_sk     = COALESCE(u.location_sk, i.location_sk),
+                        report_id       = COALESCE(u.report_id, i.report_id),
+                        error_message   = u.error_message,
+                        next_attempt_at = NOW() + make_interval(secs => u.retry_in),
+                        locked_by       = NULL,
+                        locked_at       = NULL,
+                        updated_at      = NOW()
+                    FROM unnest($1::int[], $2::text[], $3::int[], $4::uuid[], $5::text[], $6::float8[])
+                         AS u(item_id, status, location_sk, report_id, error_message, retry_in)
+                    WHERE i.item_id = u.item_id
+                      AND i.locked_by = $7
+                      AND i.status = 'processing'
+                    RETURNING i.batch_id, i.status
+                ), counts AS (
+                    SELECT batch_id,
+                           COUNT(*) FILTER (WHERE status = 'completed') AS completed,
+                           COUNT(*) FILTER (WHERE status = 'failed')    AS failed
+                    FROM done
+                    GROUP BY batch_id
+                )
+                UPDATE batch_job b
+                SET completed_count = b.completed_count + c.completed,
+                    failed_count    = b.failed_count + c.failed,
+                    status = CASE
+                        WHEN b.completed_count + c.completed + b.failed_count + c.failed >= b.total_count
+                        THEN 'completed' ELSE b.status END,
+                    completed_at = CASE
+                        WHEN b.completed_count + c.completed + b.failed_count + c.failed >= b.total_count
+                        THEN NOW() ELSE b.completed_at END
+                FROM counts c
+                WHERE b.batch_id = c.batch_id
+                """,
+                ids,
+                [pending[i][0] for i in ids],
+                [pending[i][1] for i in ids],
+                [pending[i][2] for i in ids],
+                [pending[i][3] for i in ids],
+                [pending[i][4] for i in ids],
+                self.worker_id,
+            )
+        self.statements += 1
+
+
+# ── Worker ───────────────────────────────────────────────────────────────────
+
+async def _process_item(item, resolution: dict, narrative_limiter: asyncio.Semaphore) -> dict:
+    location_sk = resolution["location_sk"]
+    report = await generate_single_report(
+        location_sk=location_sk,
+        address=resolution["full_address"] or item["input_address"],
+        user_id=item["user_id"],
+        narrative_limiter=narrative_limiter,
+    )
+    return {"location_sk": location_sk, "report_id": report["report_id"]}
+
+
+def _record_failure(writer: StatusWriter, item, exc: BaseException) -> None:
+    error = str(exc)[:500] or type(exc).__name__
+    if isinstance(exc, TRANSIENT_ERRORS) and item["attempts"] < settings.batch_max_attempts:
+        delay = retry_delay(item["attempts"])
+        log.warning("Batch item %d attempt %d failed (%s); retrying in %.0fs",
+                    item["item_id"], item["attempts"], error, delay)
+        writer.add(item["item_id"], "pending", error_message=error, retry_in=delay)
+    else:
+        writer.add(item["item_id"], "failed", error_message=error)
+
+
+async def _resolve_claimed(claimed: list, writer: StatusWriter) -> list[tuple]:
+    """
+    Resolve the addresses of freshly claimed items with one
+    resolve_addresses() call. Returns (item, resolution) pairs ready to run;
+    items that cannot run are recorded in `writer`.
+    """
+    runnable = []
+    for item in claimed:
+        if item["attempts"] > settings.batch_max_attempts:
+            # Leased repeatedly without finishing: its worker keeps dying
+            writer.add(item["item_id"], "failed",
+                       error_message=f"Gave up after {item['attempts'] - 1} attempts")
+        else:
+            runnable.append(item)
+    if not runnable:
+        return []
+
+    try:
+        resolutions = await resolve_addresses([item["input_address"] for item in runnable])
+    except TRANSIENT_ERRORS as exc:
+        for item in runnable:
+            _record_failure(writer, item, exc)
+        return []
+
+    ready = []
+    for item, resolution in zip(runnable, resolutions):
+        if resolution["resolved"]:
+            ready.append((item, resolution))
+        else:
+            writer.add(item["item_id"], "failed",
+                       error_message=resolution.get("warning") or "Address could not be resolved")
+    return ready
+
+
+async def run_worker(worker_id: str, stop: asyncio.Event) -> None:
+    """
+    Claim and process queue items until `stop` is set. Up to
+    batch_workers() items are in flight at once; they share one semaphore
+    bounding concurrent Claude calls. Items are claimed a round ahead
+    (twice the capacity) so their addresses resolve in bulk.
+    """
+    capacity = batch_workers()
+    narrative_limiter = asyncio.Semaphore(max(1, settings.batch_narrative_concurrency))
+    writer = StatusWriter(worker_id)
+    in_flight: dict[asyncio.Task, asyncpg.Record] = {}
+    ready: deque[tuple] = deque()
+    processed = 0
+    log.info("Batch worker %s started (%d items in flight)", worker_id, capacity)
+
+    try:
+        while not stop.is_set():
+            claimed = []
+            try:
+                if not ready and len(in_flight) < capacity:
+                    try:
+                        claimed = await claim_items(worker_id, 2 * capacity - len(in_flight))
+                        ready.extend(await _resolve_claimed(claimed, writer))
+                    except TRANSIENT_ERRORS as exc:
+                        log.warning("Batch worker %s: claim failed: %s", worker_id, exc)
+                while ready and len(in_flight) < capacity:
+                    item, resolution = ready.popleft()
+                    task = asyncio.create_task(_process_item(item, resolution, narrative_limiter))
+                    in_flight[task] = item
+
+                if in_flight:
+                    finished, _ = await asyncio.wait(
+                        in_flight, timeout=settings.batch_status_flush_seconds,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    for task in finished:
+                        item = in_flight.pop(task)
+                        processed += 1
+                        if task.exception() is not None:
+                            _record_failure(writer, item, task.exception())
+                        else:
+                            result = task.result()
+                            writer.add(item["item_id"], "completed",
+                                       result["location_sk"], result["report_id"])
+                elif not claimed:
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=settings.batch_poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+
+                if writer.due():
+                    try:
+                        await writer.flush()
+                    except TRANSIENT_ERRORS as exc:
+                        # Outcomes are lost; the leases expire and the items run again
+                        log.warning("Batch worker %s: status flush failed: %s", worker_id, exc)
+            except Exception:
+                # Anything unexpected: stay alive, hand back what has not
+                # started, and back off before the next round
+                log.exception("Batch worker %s: unexpected error", worker_id)
+                started = {item["item_id"] for item in in_flight.values()}
+                orphans = {item["item_id"] for item in claimed}
+                orphans |= {item["item_id"] for item, _ in ready}
+                ready.clear()
+                try:
+                    await release_items(worker_id, [
+                        i for i in orphans if i not in started and i not in writer
+                    ])
+                except Exception:
+                    log.exception("Batch worker %s: release failed; leases will expire", worker_id)
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=settings.batch_poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await asyncio.gather(*in_flight, return_exceptions=True)
+        await writer.flush()
+        unfinished = [item["item_id"] for item in in_flight.values()]
+        unfinished += [item["item_id"] for item, _ in ready]
+        await release_items(worker_id, unfinished)
+        log.info("Batch worker %s stopped: %d items processed, %d status updates",
+                 worker_id, processed, writer.statements)
+
+
+# ── Progress ─────────────────────────────────────────────────────────────────
+
+# updated_at is the writing transaction's start time, so a row can commit
+# slightly after later-stamped ones; each poll re-reads this window
+_TAIL_OVERLAP_SECONDS = 10.0
+
+
+def _event_id(cursor: datetime) -> str:
+    return str(int(cursor.timestamp() * 1_000_000))
+
+
+def _parse_event_id(value: Optional[str]) -> Optional[datetime]:
+    """Cursor from a Last-Event-ID header; None (replay everything) if unusable."""
+    try:
+        return datetime.fromtimestamp(int(value) / 1_000_000, tz=timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+async def _batch_summary(conn, batch_id: str, batch) -> dict:
+    rows = await conn.fetch(
+        """
+        SELECT ra.risk_tier, COUNT(*) AS n, SUM(ra.risk_score) AS score_sum,
+               COUNT(ra.risk_score) AS scored
+        FROM batch_job_item i
+        JOIN report_audit ra ON ra.report_id = i.report_id
+        WHERE i.batch_id = $1 AND i.status = 'completed'
+        GROUP BY ra.risk_tier
+        """,
+        batch_id,
+    )
+    levels: dict[str, int] = {}
+    for r in rows:
+        if r["risk_tier"]:
+            level = TIER_LABELS.get(r["risk_tier"], r["risk_tier"])
+            levels[level] = levels.get(level, 0) + r["n"]
+    scored = sum(r["scored"] for r in rows)
+    return {
+        "type": "done",
+        "completed": batch["completed_count"],
+        "failed": batch["failed_count"],
+        "total": batch["total_count"],
+        "avg_activity_score": round(sum(r["score_sum"] or 0 for r in rows) / scored, 1) if scored else None,
+        "level_distribution": levels,
+        "duration_s": round(float(batch["duration_s"] or 0), 1),
+    }
+
+
+async def tail_batch(
+    batch_id: str, last_event_id: Optional[str] = None,
+) -> AsyncIterator[tuple[Optional[str], Optional[dict]]]:
+    """
+    Yield (event_id, event) pairs for `batch_id` (see module doc) until it
+    completes. Finished items are replayed from batch_job_item/report_audit,
+    never recomputed. `last_event_id` resumes after an earlier stream: only
+    items changed since then (plus the overlap window) are sent again, so a
+    client may see an item's result twice but never misses one. (None, None)
+    is a heartbeat, yielded after batch_heartbeat_seconds without events.
+    """
+    since = _parse_event_id(last_event_id)
+    seen: dict[int, str] = {}
+    last_sent = time.monotonic()
+
+    while True:
+        async with get_conn() as conn:
+            # Batch first: once it reads completed, the item query sees every outcome
+            batch = await conn.fetchrow(
+                """
+                SELECT status, total_count, completed_count, failed_count,
+                       EXTRACT(EPOCH FROM completed_at - created_at) AS duration_s
+                FROM batch_job WHERE batch_id = $1
+                """,
+                batch_id,
+            )
+            if batch is None:
+                return
+            rows = await conn.fetch(
+                """
+                SELECT i.item_id, i.row_index, i.status, i.report_id, i.error_message,
+                       i.updated_at, ra.risk_score, ra.risk_tier,
+                       jsonb_array_length(ra.flags_json) AS flag_count
+                FROM batch_job_item i
+                LEFT JOIN report_audit ra ON ra.report_id = i.report_id
+                WHERE i.batch_id = $1
+                  AND i.status <> 'pending'
+                  AND ($2::timestamptz IS NULL
+                       OR i.updated_at > $2::timestamptz - make_interval(secs => $3))
+                ORDER BY i.updated_at, i.item_id
+                """,
+                batch_id,
+                since,
+                _TAIL_OVERLAP_SECONDS,
+            )
+            done = None
+            if batch["status"] in ("completed", "failed"):
+                done = await _batch_summary(conn, batch_id, batch)
+
+        for row in rows:
+            since = row["updated_at"] if since is None else max(since, row["updated_at"])
+            if seen.get(row["item_id"]) == row["status"]:
+                continue
+            seen[row["item_id"]] = row["status"]
+            if row["status"] == "processing":
+                event = {"type": "processing", "row_index": row["row_index"]}
+            elif row["status"] == "completed":
+                event = {
+                    "type": "completed",
+                    "row_index": row["row_index"],
+                    "report_id": str(row["report_id"]),
+                    "activity_score": row["risk_score"],
+                    "activity_level": TIER_LABELS.get(row["risk_tier"], row["risk_tier"]),
+                    "flag_count": row["flag_count"],
+                }
+            elif row["status"] == "failed":
+                event = {"type": "failed", "row_index": row["row_index"], "error": row["error_message"]}
+            else:
+                continue
+            yield _event_id(since), event
+            last_sent = time.monotonic()
+
+        if done:
+            yield (_event_id(since) if since else None), done
+            return
+
+        if time.monotonic() - last_sent >= settings.batch_heartbeat_seconds:
+            yield None, None
+            last_sent = time.monotonic()
+        await asyncio.sleep(settings.batch_poll_seconds)
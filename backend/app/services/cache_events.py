@@ -0,0 +1,93 @@
+"""
+CIVITAS – Cross-process cache invalidation via LISTEN/NOTIFY.
+
+The task layer sends NOTIFY civitas_data_refreshed after each property
+summary refresh (tasks/common/db.py notify_data_refreshed), with payload
+{"generation", "mode", "datasets"}. Every API worker keeps one dedicated
+LISTEN connection, started in the FastAPI lifespan. On a notification it
+retires report-cache entries from older generations and drops the Socrata
+freshness entries of the refreshed datasets, so cache TTLs can be hours
+rather than minutes.
+
+The listener connection sits outside the pool. If it drops, it is
+re-established after RECONNECT_DELAY seconds. A notification missed in that
+gap is harmless: report cache keys already carry the data generation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+import asyncpg
+
+from backend.app.config import settings
+from backend.app.services import socrata_proxy
+from backend.app.services.report import retire_report_cache
+
+log = logging.getLogger(__name__)
+
+CHANNEL = "civitas_data_refreshed"
+RECONNECT_DELAY = 5.0
+
+_task: Optional[asyncio.Task] = None
+
+
+def handle_data_refreshed(payload: str) -> dict[str, Any]:
+    """Apply one civitas_data_refreshed notification to this worker's caches."""
+    try:
+        event = json.loads(payload)
+        generation = int(event["generation"])
+    except (ValueError, KeyError, TypeError):
+        log.warning("Ignoring malformed %s payload: %r", CHANNEL, payload)
+        return {}
+
+    datasets = event.get("datasets") or []
+    result = {
+        "generation": generation,
+        "reports_retired": retire_report_cache(generation),
+        "socrata_entries_dropped": socrata_proxy.invalidate_datasets(datasets),
+    }
+    log.info("Data generation %d (%s): %s", generation, ", ".join(datasets) or "no new batches", result)
+    return result
+
+
+async def _listen_forever() -> None:
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(settings.database_url)
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _conn: lost.set())
+            await conn.add_listener(
+                CHANNEL, lambda _conn, _pid, _channel, payload: handle_data_refreshed(payload),
+            )
+            log.info("Listening on %s", CHANNEL)
+            await lost.wait()
+            log.warning("%s listener connection lost", CHANNEL)
+        except (OSError, asyncpg.PostgresError) as exc:
+            log.warning("%s listener unavailable: %s", CHANNEL, exc)
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(RECONNECT_DELAY)
+
+
+async def start_listener() -> None:
+    """Start the LISTEN loop for this worker (idempotent)."""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_listen_forever())
+
+
+async def stop_listener() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,82 @@
+"""
+CIVITAS – Pre-serialized JSON passthrough.
+
+Postgres can render large record arrays straight to JSON text (see
+rule_engine.get_report_data). RawJSON carries that text through the report
+dict so it is written into the API response and the report_audit insert
+as-is, instead of being decoded to Python objects and encoded again.
+
+dumps() produces exactly the bytes FastAPI's JSONResponse would for the
+equivalent plain dict (compact separators, ensure_ascii=False), so a
+response built from RawJSON is indistinguishable from the old one as long
+as the SQL emits the same compact form.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+class RawJSON:
+    """JSON text to be emitted verbatim; `.value` decodes it on first use."""
+
+    __slots__ = ("text", "_value")
+
+    def __init__(self, text: str):
+        self.text = text
+        self._value: Any = None
+
+    @property
+    def value(self) -> Any:
+        if self._value is None:
+            self._value = json.loads(self.text)
+        return self._value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access for callers that read one part (e.g. Claude payloads)."""
+        return self.value.get(key, default)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, RawJSON):
+            return self.text == other.text
+        return self.value == other
+
+    __hash__ = None
+
+
+def dumps(obj: Any) -> str:
+    """Serialize `obj` like JSONResponse, splicing RawJSON text in place."""
+    raw: list[str] = []
+
+    def _swap(o: Any) -> Any:
+        if isinstance(o, RawJSON):
+            raw.append(o.text)
+            return _marker(len(raw) - 1)
+        if isinstance(o, dict):
+            return {k: _swap(v) for k, v in o.items()}
+        if isinstance(o, (list, tuple)):
+            return [_swap(v) for v in o]
+        return o
+
+    text = json.dumps(
+        _swap(obj), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+    )
+    for i, chunk in enumerate(raw):
+        text = text.replace(json.dumps(_marker(i)), chunk, 1)
+    return text
+
+
+def plain(obj: Any) -> Any:
+    """Copy of `obj` with every RawJSON decoded, for templates and other consumers."""
+    if isinstance(obj, RawJSON):
+        return obj.value
+    if isinstance(obj, dict):
+        return {k: plain(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [plain(v) for v in obj]
+    return obj
+
+
+def _marker(i: int) -> str:
+    return f"\x00civitas-raw-json-{i}\x00"
@@ -72,10 +72,9 @@ async def get_neighborhood_properties(
 ) -> dict:
     """Return paginated property list for a community area.
 
-    Uses only the materialized view_property_summary (indexed) to avoid the
-    expensive view_property_score view which computes flags on-the-fly.
-    When activity_level filter is provided, joins view_property_score to filter
-    and includes score/level in the response.
+    Uses only view_property_summary unless an activity_level filter is
+    provided; then it joins view_property_score (stored, indexed on
+    activity_level) to filter and includes score/level in the response.
     """
     offset = (page - 1) * page_size
 
@@ -217,7 +216,11 @@ async def get_neighborhood_baselines(community_area_id: int) -> Optional[dict]:
 
     if not row:
         return None
+    return baselines_from_row(row)
 
+
+def baselines_from_row(row) -> dict:
+    """CHICAGO_BASELINES-shaped dict from a view_community_area_summary row."""
     property_count = row["property_count"] or 1
     return {
         "avg_violations_per_property": float(row["avg_violations"] or 0),
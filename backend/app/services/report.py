@@ -8,13 +8,14 @@ from __future__ import annotations
 
 import asyncio
 import json
-import time
 import uuid
+from contextlib import nullcontext
 from datetime import datetime, timezone
+from typing import Optional
 
 from backend.app.constants import CATEGORY_ACTIONS, TIER_LABELS
 from backend.app.database import get_conn
-from backend.app.services import rule_engine
+from backend.app.services import json_text, rule_engine
 from backend.app.services.baselines import CHICAGO_BASELINES
 from backend.app.services.claude_ai import (
     build_claude_payload,
@@ -22,34 +23,75 @@ from backend.app.services.claude_ai import (
     generate_narrative,
     generate_pdf_narrative,
 )
-from backend.app.services.neighborhood import get_neighborhood_baselines
+from backend.app.services.neighborhood import baselines_from_row
+from backend.app.services.report_cache import build_report_cache
 
 
 # ── Report cache ────────────────────────────────────────────────────────────────
-# In-memory TTL cache keyed by location_sk.  Reports change only on ETL
-# ingestion (infrequent), so a short TTL avoids redundant heavy queries when the
-# same property is searched multiple times in quick succession.
+# Bounded LRU keyed by (location_sk, data_generation); see report_cache.py.
+# The generation advances with every summary refresh, so entries never
+# outlive the data they were built from.
 
-_report_cache: dict[int, tuple[float, dict]] = {}
-_CACHE_TTL_SECONDS = 300  # 5 minutes
+_report_cache = build_report_cache()
 
 
-def _cache_get(location_sk: int) -> dict | None:
-    entry = _report_cache.get(location_sk)
-    if entry and (time.monotonic() - entry[0]) < _CACHE_TTL_SECONDS:
-        return entry[1]
-    # Expired — remove
-    _report_cache.pop(location_sk, None)
-    return None
-
+def clear_report_cache() -> None:
+    """Drop every cached report (superseded generations also age out alone)."""
+    _report_cache.clear()
 
-def _cache_set(location_sk: int, report: dict) -> None:
-    _report_cache[location_sk] = (time.monotonic(), report)
 
+def retire_report_cache(generation: int) -> int:
+    """Drop cached reports built before data generation `generation`."""
+    return _report_cache.retire(generation)
+
+
+def report_cache_stats() -> dict:
+    """Hit/miss/eviction counters and size of the report cache."""
+    return _report_cache.stats()
+
+
+# ── Report lookup ──────────────────────────────────────────────────────────────
+# One indexed statement per report: the location row, the current data
+# generation, the location's report_snapshot (only once the latest refresh
+# has been folded into the snapshots, see sql/views/06_report.sql) and its
+# community area baselines. With a snapshot, the rest of the report needs
+# no further queries before the audit insert.
+
+_REPORT_LOOKUP_SQL = """
+    SELECT l.*,
+           COALESCE(g.refresh_id, 0)    AS data_generation,
+           s.score::text                AS snapshot_score,
+           s.flags::text                AS snapshot_flags,
+           s.supporting_records::text   AS snapshot_supporting_records,
+           CASE WHEN s.location_sk IS NOT NULL
+                THEN (SELECT freshness FROM view_report_data_freshness)
+           END                          AS snapshot_freshness,
+           cas.community_area_name      AS ca_name,
+           cas.property_count           AS ca_property_count,
+           cas.avg_violations           AS ca_avg_violations,
+           cas.avg_311_12mo             AS ca_avg_311_12mo,
+           cas.avg_permit_processing_days  AS ca_avg_permit_processing_days,
+           cas.avg_failed_inspections_24mo AS ca_avg_failed_inspections_24mo,
+           cas.total_lien_amount        AS ca_total_lien_amount
+    FROM dim_location l
+    LEFT JOIN LATERAL (
+        SELECT r.refresh_id, r.snapshots_built_at
+        FROM property_summary_refresh r
+        ORDER BY r.refresh_id DESC
+        LIMIT 1
+    ) g ON TRUE
+    LEFT JOIN report_snapshot s
+           ON s.location_sk = l.location_sk AND g.snapshots_built_at IS NOT NULL
+    LEFT JOIN view_community_area_summary cas
+           ON cas.community_area_id = l.community_area_id
+    WHERE l.location_sk = $1
+"""
 
-def clear_report_cache() -> None:
-    """Clear the entire report cache (useful after ETL runs)."""
-    _report_cache.clear()
+_SNAPSHOT_PARTS = ("score", "flags", "supporting_records", "freshness")
+_AREA_COLUMNS = (
+    "name", "property_count", "avg_violations", "avg_311_12mo",
+    "avg_permit_processing_days", "avg_failed_inspections_24mo", "total_lien_amount",
+)
 
 
 # ── Normalization ───────────────────────────────────────────────────────────────
@@ -83,29 +125,36 @@ def normalize_report(report: dict) -> dict:
 
 
 async def generate_single_report(
-    location_sk: int, address: str, user_id, *, skip_narrative: bool = False
+    location_sk: int,
+    address: str,
+    user_id,
+    *,
+    skip_narrative: bool = False,
+    narrative_limiter: Optional[asyncio.Semaphore] = None,
 ) -> dict:
     """
     Generate a full report for a single property and store it in report_audit.
 
     If skip_narrative=True, the ai_summary field is set to "" and the Claude
     call is skipped.  Use generate_report_summary() to fill it in later.
+    `narrative_limiter` bounds concurrent Claude calls across callers that
+    share it (batch processing).
 
     Returns the assembled report dict.
     """
-    # ── 1. Validate location_sk ───────────────────────────────────────────────
+    # ── 1. Validate location_sk (location, snapshot, neighborhood) ──────────
     async with get_conn() as conn:
-        loc = await conn.fetchrow(
-            "SELECT * FROM dim_location WHERE location_sk = $1",
-            location_sk,
-        )
+        loc = await conn.fetchrow(_REPORT_LOOKUP_SQL, location_sk)
     if not loc:
         raise ValueError(f"location_sk {location_sk} not found")
 
     location_row = dict(loc)
+    generation = location_row.pop("data_generation", 0)
+    snapshot = {part: location_row.pop(f"snapshot_{part}", None) for part in _SNAPSHOT_PARTS}
+    area = {col: location_row.pop(f"ca_{col}", None) for col in _AREA_COLUMNS}
 
     # ── 2. Check cache ────────────────────────────────────────────────────────
-    cached = _cache_get(location_sk)
+    cached = await _report_cache.get_async(location_sk, generation)
     if cached:
         # Reuse cached report data but mint a new report_id and audit row
         report = {**cached}
@@ -126,7 +175,8 @@ async def generate_single_report(
                 freshness=report.get("data_freshness", {}),
                 match_confidence=address,
             )
-            report["ai_summary"] = await generate_narrative(claude_payload)
+            async with narrative_limiter or nullcontext():
+                report["ai_summary"] = await generate_narrative(claude_payload)
         else:
             report["ai_summary"] = ""
 
@@ -144,34 +194,30 @@ async def generate_single_report(
                 report["activity_score"],
                 report["activity_level"],
                 json.dumps(report["triggered_flags"]),
-                json.dumps(report),
+                json_text.dumps(report),
                 user_id,
             )
         return report
 
-    # ── 3. Rule engine + supporting records (parallelized) ────────────────────
-    (score, flags), records, freshness = await asyncio.gather(
-        rule_engine.get_score_and_flags(location_sk),
-        rule_engine.get_all_supporting_records(location_sk),
-        rule_engine.get_data_freshness(),
-    )
+    # ── 3. Report data: stored snapshot, else rule engine (one statement) ──
+    if snapshot["score"] is not None:
+        data = rule_engine.decode_report_data(snapshot)
+    else:
+        data = await rule_engine.get_report_data(location_sk)
+    score = data["score"]
+    flags = data["flags"]
+    records = data["supporting_records"]
+    freshness = data["freshness"]
 
     # ── 4. Neighborhood baselines (before Claude so we can pass context) ─────
     ca_id = location_row.get("community_area_id")
     neighborhood_data = None
-    if ca_id:
-        neighborhood_baselines = await get_neighborhood_baselines(ca_id)
-        if neighborhood_baselines:
-            async with get_conn() as conn:
-                ca_name = await conn.fetchval(
-                    "SELECT name FROM dim_community_area WHERE community_area_id = $1",
-                    ca_id,
-                )
-            neighborhood_data = {
-                "community_area_id": ca_id,
-                "community_area_name": ca_name,
-                "baselines": neighborhood_baselines,
-            }
+    if ca_id and area["property_count"] is not None:
+        neighborhood_data = {
+            "community_area_id": ca_id,
+            "community_area_name": area["name"],
+            "baselines": baselines_from_row(area),
+        }
 
     # ── 5. Claude narrative (optional) ────────────────────────────────────────
     if skip_narrative:
@@ -189,7 +235,8 @@ async def generate_single_report(
             match_confidence=address,
             neighborhood=neighborhood_data,
         )
-        narrative = await generate_narrative(claude_payload)
+        async with narrative_limiter or nullcontext():
+            narrative = await generate_narrative(claude_payload)
 
     # ── 6. Assemble report dict ───────────────────────────────────────────────
     report_id = str(uuid.uuid4())
@@ -225,7 +272,9 @@ async def generate_single_report(
     }
 
     # ── 7. Cache the report data ──────────────────────────────────────────────
-    _cache_set(location_sk, report)
+    # Serialized once: the audit row stores it and the cache sizes entries by it
+    report_json = json_text.dumps(report)
+    await _report_cache.set_async(location_sk, generation, report, report_json)
 
     # ── 8. Audit log (store full report JSON) ─────────────────────────────────
     async with get_conn() as conn:
@@ -241,7 +290,7 @@ async def generate_single_report(
             score.get("raw_score", 0),
             score.get("activity_level", "QUIET"),
             json.dumps(flags),
-            json.dumps(report),
+            report_json,
             user_id,
         )
 
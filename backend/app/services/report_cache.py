@@ -0,0 +1,288 @@
+"""
+CIVITAS – Report cache.
+
+Assembled report data (everything except report_id, timestamps and the
+narrative) is cached per (location_sk, data_generation). The generation is
+the latest property_summary_refresh.refresh_id, which advances every time
+refresh_scores completes, so an ETL refresh retires every older entry
+without explicit invalidation. Workers are also told about new generations
+(services/cache_events.py) and retire() older entries right away instead
+of waiting for them to age out of the LRU.
+
+Backends (settings.report_cache_backend):
+  memory  – per-process LRU bounded by entry count and serialized bytes
+  sqlite  – the same LRU in a local SQLite file, shared by every uvicorn
+            worker on the host
+  none    – caching disabled
+
+Both count hits, misses and evictions; stats() is served by
+/api/v1/admin/cache-stats. The request path uses get_async()/set_async(),
+which run the SQLite backend's blocking I/O in a worker thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from backend.app.config import settings
+from backend.app.services import json_text
+
+log = logging.getLogger(__name__)
+
+
+class ReportCache:
+    """Interface shared by the backends."""
+
+    backend = "none"
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+    def get(self, location_sk: int, generation: int) -> Optional[dict]:
+        self.misses += 1
+        return None
+
+    def set(
+        self, location_sk: int, generation: int, report: dict, body: Optional[str] = None,
+    ) -> None:
+        """Store `report`; `body` is its json_text.dumps() form if the caller has it."""
+
+    async def get_async(self, location_sk: int, generation: int) -> Optional[dict]:
+        return self.get(location_sk, generation)
+
+    async def set_async(
+        self, location_sk: int, generation: int, report: dict, body: Optional[str] = None,
+    ) -> None:
+        self.set(location_sk, generation, report, body)
+
+    def clear(self) -> None:
+        pass
+
+    def retire(self, generation: int) -> int:
+        """Drop entries older than `generation`; returns how many."""
+        return 0
+
+    def _usage(self) -> tuple[int, int]:
+        """(entries, bytes) currently stored."""
+        return 0, 0
+
+    def stats(self) -> dict:
+        entries, nbytes = self._usage()
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "size": entries,
+            "max_size": self.max_entries,
+            "bytes": nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MemoryReportCache(ReportCache):
+    """
+    In-process LRU; entry size is the length of the serialized report.
+    Entries are shallow copies, so callers may add keys to the report they
+    return without changing what was counted and cached.
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        super().__init__(max_entries, max_bytes, ttl_seconds)
+        self._entries: OrderedDict[tuple[int, int], tuple[float, int, dict]] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, location_sk: int, generation: int) -> Optional[dict]:
+        key = (location_sk, generation)
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+        if entry:
+            self._drop(key)
+        self.misses += 1
+        return None
+
+    def set(
+        self, location_sk: int, generation: int, report: dict, body: Optional[str] = None,
+    ) -> None:
+        if self.max_entries <= 0:
+            return
+        size = len((json_text.dumps(report) if body is None else body).encode())
+        if size > self.max_bytes:
+            return
+        key = (location_sk, generation)
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic(), size, {**report})
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def retire(self, generation: int) -> int:
+        stale = [key for key in self._entries if key[1] < generation]
+        for key in stale:
+            self._drop(key)
+        return len(stale)
+
+    def _drop(self, key: tuple[int, int]) -> None:
+        self._bytes -= self._entries.pop(key)[1]
+
+    def _usage(self) -> tuple[int, int]:
+        return len(self._entries), self._bytes
+
+
+class SqliteReportCache(ReportCache):
+    """
+    LRU in a SQLite file (WAL mode) so all workers on a host share entries.
+    Reports are stored serialized; hit/miss/eviction counters are
+    per-process, size and bytes are for the shared store.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int, ttl_seconds: float):
+        super().__init__(max_entries, max_bytes, ttl_seconds)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS report_cache (
+                location_sk INTEGER NOT NULL,
+                generation  INTEGER NOT NULL,
+                body        TEXT    NOT NULL,
+                size        INTEGER NOT NULL,
+                stored_at   REAL    NOT NULL,
+                used_at     REAL    NOT NULL,
+                PRIMARY KEY (location_sk, generation)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS report_cache_used ON report_cache(used_at)")
+
+    def get(self, location_sk: int, generation: int) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body FROM report_cache"
+                " WHERE location_sk = ? AND generation = ? AND stored_at > ?",
+                (location_sk, generation, now - self.ttl_seconds),
+            ).fetchone()
+            if row:
+                self._db.execute(
+                    "UPDATE report_cache SET used_at = ? WHERE location_sk = ? AND generation = ?",
+                    (now, location_sk, generation),
+                )
+                self.hits += 1
+            else:
+                self.misses += 1
+        return json.loads(row[0]) if row else None
+
+    def set(
+        self, location_sk: int, generation: int, report: dict, body: Optional[str] = None,
+    ) -> None:
+        if body is None:
+            body = json_text.dumps(report)
+        size = len(body.encode())
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                self._db.execute(
+                    "INSERT OR REPLACE INTO report_cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (location_sk, generation, body, size, now, now),
+                )
+                # Expired entries go first, then least recently used
+                self._db.execute(
+                    "DELETE FROM report_cache WHERE stored_at <= ?", (now - self.ttl_seconds,),
+                )
+                entries, nbytes = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM report_cache"
+                ).fetchone()
+                if entries > self.max_entries or nbytes > self.max_bytes:
+                    victims = []
+                    for key_sk, key_gen, vsize in self._db.execute(
+                        "SELECT location_sk, generation, size FROM report_cache ORDER BY used_at"
+                    ):
+                        if entries <= self.max_entries and nbytes <= self.max_bytes:
+                            break
+                        victims.append((key_sk, key_gen))
+                        entries -= 1
+                        nbytes -= vsize
+                    self._db.executemany(
+                        "DELETE FROM report_cache WHERE location_sk = ? AND generation = ?", victims,
+                    )
+                    self.evictions += len(victims)
+                self._db.execute("COMMIT")
+            except sqlite3.Error as exc:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                log.warning("Report cache write failed: %s", exc)
+
+    # BEGIN IMMEDIATE can wait up to the 5 s busy timeout for another
+    # worker's write, so the request path never runs these on the event loop
+    async def get_async(self, location_sk: int, generation: int) -> Optional[dict]:
+        return await asyncio.to_thread(self.get, location_sk, generation)
+
+    async def set_async(
+        self, location_sk: int, generation: int, report: dict, body: Optional[str] = None,
+    ) -> None:
+        await asyncio.to_thread(self.set, location_sk, generation, report, body)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM report_cache")
+
+    def retire(self, generation: int) -> int:
+        # Every worker receives the notification; the deletes are idempotent
+        with self._lock:
+            return self._db.execute(
+                "DELETE FROM report_cache WHERE generation < ?", (generation,),
+            ).rowcount
+
+    def _usage(self) -> tuple[int, int]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM report_cache"
+            ).fetchone()
+
+
+def build_report_cache() -> ReportCache:
+    """Construct the backend selected in settings."""
+    args = (
+        settings.report_cache_max_entries,
+        settings.report_cache_max_bytes,
+        settings.report_cache_ttl_seconds,
+    )
+    if settings.report_cache_backend == "sqlite":
+        return SqliteReportCache(settings.report_cache_path, *args)
+    if settings.report_cache_backend == "memory":
+        return MemoryReportCache(*args)
+    return ReportCache(*args)
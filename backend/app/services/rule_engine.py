@@ -3,22 +3,31 @@ CIVITAS – Rule engine service.
 
 Queries the three SQL view layers and assembles structured report data.
 No scoring logic lives in Python – all computation is in the SQL views.
+
+get_report_data() fetches everything a report needs (score, flags, the six
+supporting-record arrays and data freshness) in one statement on one pooled
+connection, with the JSON built server-side; the record arrays come back as
+ready-to-send text. The per-part functions below remain for callers that
+need only one piece.
 """
 
 from __future__ import annotations
 
 import asyncio
+import json
 from typing import Any
 
 from backend.app.database import get_conn
+from backend.app.services.json_text import RawJSON
 
 
 async def get_score_and_flags(location_sk: int) -> tuple[dict[str, Any], list[dict[str, Any]]]:
     """
     Fetch score and flags in parallel using separate connections.
 
-    Both views read from the materialized view_property_summary, so running
-    them concurrently is safe and avoids sequential latency.
+    Both views read the persisted property_score / property_flag tables
+    (kept current by refresh_property_summary()), so running them
+    concurrently is safe and avoids sequential latency.
     """
     score_task, flags_task = await asyncio.gather(
         get_score(location_sk),
@@ -43,7 +52,7 @@ async def get_score(location_sk: int) -> dict[str, Any]:
         )
 
     if not row:
-        return {"raw_score": 0, "activity_level": "QUIET", "flag_count": 0, "triggered_flags": []}
+        return _default_score()
 
     return dict(row)
 
@@ -60,7 +69,7 @@ async def get_flags(location_sk: int) -> list[dict[str, Any]]:
                    supporting_count, action_group
             FROM view_property_flags
             WHERE location_sk = $1
-            ORDER BY category, severity_score DESC
+            ORDER BY category, severity_score DESC, flag_code
             """,
             location_sk,
         )
@@ -78,6 +87,129 @@ async def get_summary(location_sk: int) -> dict[str, Any]:
     return dict(row) if row else {}
 
 
+# ── Bulk (many locations, one query per layer) ─────────────────────────────
+
+async def get_scores_and_flags(
+    location_sks: list[int],
+) -> tuple[dict[int, dict[str, Any]], dict[int, list[dict[str, Any]]]]:
+    """Bulk counterpart of get_score_and_flags(); both queries run in parallel."""
+    scores, flags = await asyncio.gather(
+        get_scores(location_sks),
+        get_flags_many(location_sks),
+    )
+    return scores, flags
+
+
+async def get_scores(location_sks: list[int]) -> dict[int, dict[str, Any]]:
+    """
+    Query VIEW_PROPERTY_SCORE for many locations in one round-trip.
+    Every requested location_sk is a key; locations without a score row get
+    the same QUIET default as get_score().
+    """
+    sks = _unique(location_sks)
+    if not sks:
+        return {}
+    async with get_conn() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT location_sk, raw_score, activity_level, flag_count, triggered_flags
+            FROM view_property_score
+            WHERE location_sk = ANY($1::int[])
+            """,
+            sks,
+        )
+
+    found = {r["location_sk"]: {k: v for k, v in dict(r).items() if k != "location_sk"} for r in rows}
+    return {sk: found.get(sk) or _default_score() for sk in sks}
+
+
+async def get_flags_many(location_sks: list[int]) -> dict[int, list[dict[str, Any]]]:
+    """
+    Query VIEW_PROPERTY_FLAGS for many locations in one round-trip.
+    Every requested location_sk is a key (empty list when nothing fired);
+    each list is ordered as in get_flags().
+    """
+    sks = _unique(location_sks)
+    if not sks:
+        return {}
+    async with get_conn() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT location_sk, flag_code, category, description, severity_score,
+                   supporting_count, action_group
+            FROM view_property_flags
+            WHERE location_sk = ANY($1::int[])
+            ORDER BY location_sk, category, severity_score DESC, flag_code
+            """,
+            sks,
+        )
+
+    result: dict[int, list[dict[str, Any]]] = {sk: [] for sk in sks}
+    for r in rows:
+        flag = _date_dict(r)
+        result[flag.pop("location_sk")].append(flag)
+    return result
+
+
+async def get_summaries(location_sks: list[int]) -> dict[int, dict[str, Any]]:
+    """
+    Query VIEW_PROPERTY_SUMMARY for many locations in one round-trip.
+    Locations without a summary row are omitted, matching get_summary()'s {}.
+    """
+    sks = _unique(location_sks)
+    if not sks:
+        return {}
+    async with get_conn() as conn:
+        rows = await conn.fetch(
+            "SELECT * FROM view_property_summary WHERE location_sk = ANY($1::int[])",
+            sks,
+        )
+    return {r["location_sk"]: dict(r) for r in rows}
+
+
+def _unique(location_sks: list[int]) -> list[int]:
+    """De-duplicate while keeping the caller's order."""
+    return list(dict.fromkeys(location_sks))
+
+
+def _default_score() -> dict[str, Any]:
+    return {"raw_score": 0, "activity_level": "QUIET", "flag_count": 0, "triggered_flags": []}
+
+
+# ── Single-statement report data ────────────────────────────────────────────
+# The JSON is rendered by report_location_data() and view_report_data_freshness
+# (sql/views/06_report.sql), which the report_snapshot stage also builds from.
+
+_REPORT_DATA_SQL = """
+    SELECT d.score, d.flags, d.supporting_records, f.freshness
+    FROM report_location_data($1, $2) d, view_report_data_freshness f
+"""
+
+
+async def get_report_data(location_sk: int, limit: int = 50) -> dict[str, Any]:
+    """
+    Score, flags, supporting records and freshness for one location in a
+    single round-trip. Returns {"score", "flags", "supporting_records",
+    "freshness"} shaped as get_score(), get_flags(),
+    get_all_supporting_records() and get_data_freshness() return them,
+    except that supporting_records is RawJSON: compact JSON text rendered
+    by Postgres, passed through to the response and report_audit as-is.
+    """
+    async with get_conn() as conn:
+        row = await conn.fetchrow(_REPORT_DATA_SQL, location_sk, limit)
+    return decode_report_data(row)
+
+
+def decode_report_data(row) -> dict[str, Any]:
+    """get_report_data() result from a row of score/flags/supporting_records/freshness text."""
+    return {
+        "score": json.loads(row["score"]),
+        "flags": json.loads(row["flags"]),
+        "supporting_records": RawJSON(row["supporting_records"]),
+        "freshness": json.loads(row["freshness"]),
+    }
+
+
 async def get_all_supporting_records(location_sk: int, limit: int = 50) -> dict[str, list[dict]]:
     """
     Fetch all 6 supporting record types in parallel using asyncio.gather().
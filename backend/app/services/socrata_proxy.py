@@ -61,6 +61,28 @@ def _cache_set(key: str, value: Any) -> None:
     _cache[key] = (time.monotonic(), value)
 
 
+# ingestion_batch.source_dataset → KNOWN_DATASETS keys it is loaded from
+SOURCE_DATASET_KEYS = {
+    "building_violations": ("violations",),
+    "food_inspections": ("inspections",),
+    "building_permits": ("permits",),
+    "311_service_requests": ("311",),
+    "vacant_building_violations": ("vacant_buildings",),
+    "cook_county_tax_liens": ("tax_annual", "tax_scavenger"),
+}
+
+
+def invalidate_datasets(source_datasets: list[str]) -> int:
+    """Drop cached freshness entries for freshly ingested datasets; returns how many."""
+    keys = {
+        f"freshness:{key}"
+        for src in source_datasets
+        for key in SOURCE_DATASET_KEYS.get(src, ())
+    }
+    dropped = [k for k in keys if _cache.pop(k, None) is not None]
+    return len(dropped)
+
+
 # ── Async Socrata client ─────────────────────────────────────────────────────
 
 def _get_headers() -> dict[str, str]:
@@ -132,9 +154,12 @@ async def get_assessment_history(pin: str) -> list[dict[str, Any]]:
 
 
 async def get_dataset_freshness(dataset_key: str) -> dict[str, Any]:
-    """Check Socrata portal freshness for a known dataset (cached 30 min)."""
+    """
+    Check Socrata portal freshness for a known dataset (cached 3 h; dropped
+    early when an ETL refresh of that dataset is announced).
+    """
     cache_key = f"freshness:{dataset_key}"
-    cached = _cache_get(cache_key, ttl_seconds=1800)
+    cached = _cache_get(cache_key, ttl_seconds=10800)
     if cached is not None:
         return cached
 
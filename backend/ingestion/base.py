@@ -1,19 +1,36 @@
 """
-CIVITAS ETL Base – BatchTracker and AddressStandardizer.
+CIVITAS ETL Base – BatchTracker, AddressStandardizer, parse_stream,
+LocationResolver and CopyLoader.
 
-BatchTracker: opens/closes ingestion_batch records.
+BatchTracker: opens/closes ingestion_batch records and stores the
+high-water mark used by incremental Socrata loads.
 AddressStandardizer: normalizes raw address components into
 a canonical full_address_standardized string and returns
-structured fields for dim_location upsert.
+structured fields for dim_location upsert. Results are memoized
+in a bounded LRU keyed on the raw input.
+parse_stream: optional process-pool address parsing stage that
+yields results in input order.
+LocationResolver: in-process address → location_sk map that inserts
+unseen addresses one buffer at a time.
+CopyLoader: bulk-loads fact rows via COPY into a staging table and
+merges them into the target fact table in one statement.
 """
 
 from __future__ import annotations
 
+import io
 import os
 import re
+import time
 import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass
-from typing import Optional
+from datetime import date
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
 
 import psycopg2
 import psycopg2.extras
@@ -62,24 +79,47 @@ class BatchTracker:
         # rows_loaded is set explicitly via complete()
         return False
 
-    def complete(self, rows_loaded: int):
-        self._finalize("complete", rows_loaded)
+    def complete(self, rows_loaded: int, watermark: Optional[dict] = None):
+        """Mark the batch complete; `watermark` is the high-water mark for the next run."""
+        self._finalize("complete", rows_loaded, watermark)
 
-    def _finalize(self, status: str, rows: int):
+    def _finalize(self, status: str, rows: int, watermark: Optional[dict] = None):
         with self._conn.cursor() as cur:
             cur.execute(
                 """
                 UPDATE ingestion_batch
-                   SET status = %s, rows_loaded = %s, completed_at = NOW()
+                   SET status = %s, rows_loaded = %s, completed_at = NOW(),
+                       watermark = %s
                  WHERE ingestion_batch_id = %s
                 """,
-                (status, rows, self.batch_id),
+                (
+                    status, rows,
+                    psycopg2.extras.Json(watermark) if watermark else None,
+                    self.batch_id,
+                ),
             )
         self._conn.commit()
         self._conn.close()
         log.info("Batch %d closed: %s (%d rows)", self.batch_id, status, rows)
 
 
+def last_watermark(conn, source_dataset: str) -> dict:
+    """Watermark of the latest completed batch for a dataset ({} if none)."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT watermark FROM ingestion_batch
+             WHERE source_dataset = %s AND status = 'complete'
+               AND watermark IS NOT NULL
+             ORDER BY ingestion_batch_id DESC
+             LIMIT 1
+            """,
+            (source_dataset,),
+        )
+        row = cur.fetchone()
+    return row[0] if row else {}
+
+
 # ─── Street-type and direction normalization tables ───────────────────────────
 
 _STREET_TYPE = {
@@ -111,7 +151,7 @@ def _norm_dir(val: Optional[str]) -> Optional[str]:
 
 # ─── ParsedAddress dataclass ──────────────────────────────────────────────────
 
-@dataclass
+@dataclass(frozen=True)
 class ParsedAddress:
     house_number: Optional[str]
     street_direction: Optional[str]
@@ -125,6 +165,9 @@ class ParsedAddress:
 
 # ─── AddressStandardizer ──────────────────────────────────────────────────────
 
+DEFAULT_ADDRESS_CACHE_SIZE = int(os.environ.get("ADDRESS_CACHE_SIZE", "200000"))
+
+
 class AddressStandardizer:
     """
     Produces ParsedAddress from raw CSV fields.
@@ -132,8 +175,22 @@ class AddressStandardizer:
     Strategy 1 (preferred): use structured columns (STREET NUMBER, DIRECTION,
     STREET NAME, STREET TYPE) when available – avoids parser ambiguity.
     Strategy 2: parse the free-form ADDRESS string with usaddress.
+
+    Results are memoized in an LRU of at most `cache_size` entries keyed on
+    the whitespace-stripped input fields (0 disables the cache). The same
+    addresses recur across datasets, so most rows skip the CRF tagger.
+    The cache and its counters are locked, so one instance can be shared
+    by the event loop and worker threads.
     """
 
+    def __init__(self, cache_size: Optional[int] = None):
+        self.cache_size = DEFAULT_ADDRESS_CACHE_SIZE if cache_size is None else cache_size
+        self._cache: OrderedDict[tuple, ParsedAddress] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
     def parse(
         self,
         raw_address: str = "",
@@ -144,6 +201,86 @@ class AddressStandardizer:
         zip_code: str = "",
         unit: str = "",
     ) -> ParsedAddress:
+        key = self.cache_key(
+            raw_address, street_number, street_direction, street_name,
+            street_type, zip_code, unit,
+        )
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+
+        self.count_misses()
+        parsed = self._parse(*key)
+        self.store(key, parsed)
+        return parsed
+
+    @staticmethod
+    def cache_key(*fields: str) -> tuple:
+        """Normalize parse() arguments (positional order) into a cache key."""
+        return tuple((f or "").strip() for f in fields)
+
+    def lookup(self, key: tuple) -> Optional[ParsedAddress]:
+        """Return the cached result for `key` (counting a hit), else None."""
+        if self.cache_size <= 0:
+            return None
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+        return cached
+
+    def store(self, key: tuple, parsed: ParsedAddress) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = parsed
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+    def count_hits(self, n: int = 1) -> None:
+        with self._lock:
+            self.hits += n
+
+    def count_misses(self, n: int = 1) -> None:
+        with self._lock:
+            self.misses += n
+
+    def cache_stats(self) -> dict:
+        """Hit/miss/eviction counters and current size of the parse cache."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            size, evictions = len(self._cache), self.evictions
+        lookups = hits + misses
+        return {
+            "size": size,
+            "max_size": self.cache_size,
+            "hits": hits,
+            "misses": misses,
+            "evictions": evictions,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def log_cache_stats(self, label: str) -> None:
+        stats = self.cache_stats()
+        log.info(
+            "%s: address cache %d hits / %d misses (%.1f%% hit rate), "
+            "%d evictions, %d entries",
+            label, stats["hits"], stats["misses"], stats["hit_rate"] * 100,
+            stats["evictions"], stats["size"],
+        )
+
+    def _parse(
+        self,
+        raw_address: str,
+        street_number: str,
+        street_direction: str,
+        street_name: str,
+        street_type: str,
+        zip_code: str,
+        unit: str,
+    ) -> ParsedAddress:
 
         # ── Strategy 1: structured columns ──────────────────────────────────
         if street_number.strip() and street_name.strip():
@@ -226,6 +363,157 @@ class AddressStandardizer:
         )
 
 
+# ─── Parallel parse stage ─────────────────────────────────────────────────────
+
+PARSE_WORKERS    = int(os.environ.get("ETL_PARSE_WORKERS", "0"))
+PARSE_CHUNK_SIZE = 2_000
+
+_worker_std: Optional[AddressStandardizer] = None
+
+
+def _init_parse_worker() -> None:
+    global _worker_std
+    # The parent process filters cache hits, so workers only see misses.
+    _worker_std = AddressStandardizer(cache_size=0)
+
+
+def _parse_keys(keys: list[tuple]) -> list[Optional[ParsedAddress]]:
+    """Worker: parse a chunk of cache keys; None marks a row that raised."""
+    out: list[Optional[ParsedAddress]] = []
+    for key in keys:
+        try:
+            out.append(_worker_std._parse(*key))
+        except Exception as exc:
+            log.warning("Address parse failed for %r: %s", key[0] or key[3], exc)
+            out.append(None)
+    return out
+
+
+def new_parse_pool(workers: int, mp_context=None) -> ProcessPoolExecutor:
+    """Process pool whose workers parse cache misses for parse_stream()."""
+    return ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_parse_worker, mp_context=mp_context,
+    )
+
+
+def parse_stream(
+    rows: Iterable[Any],
+    fields: Callable[[Any], Optional[dict]],
+    std: AddressStandardizer,
+    workers: Optional[int] = None,
+    chunk_size: int = PARSE_CHUNK_SIZE,
+    mp_context=None,
+    pool: Optional[Executor] = None,
+) -> Iterator[tuple[Any, Optional[ParsedAddress]]]:
+    """
+    Yield (row, ParsedAddress) for every row, in input order.
+
+    `fields(row)` returns the keyword arguments for AddressStandardizer.parse,
+    or None to skip parsing that row. Rows that are skipped or fail to parse
+    are yielded with None.
+
+    With workers > 1 (default: ETL_PARSE_WORKERS) rows are read in chunks and
+    cache misses are parsed in a ProcessPoolExecutor. Up to two chunks per
+    worker are kept in flight, so parsing continues while the caller is busy
+    flushing to the database. Results go through `std`'s cache either way,
+    and an address already queued in an earlier chunk is parsed once and
+    counted as a hit, so the output and the logged cache stats match the
+    serial path (as long as the cache does not evict mid-stream).
+    `mp_context` selects the multiprocessing start method for the pool
+    (callers inside a threaded server pass a spawn context). Long-lived
+    callers pass their own `pool` (see new_parse_pool()) instead of paying
+    for a new one per call; it is left running.
+    """
+    workers = PARSE_WORKERS if workers is None else workers
+
+    if workers <= 1:
+        for row in rows:
+            kwargs = fields(row)
+            if kwargs is None:
+                yield row, None
+                continue
+            try:
+                yield row, std.parse(**kwargs)
+            except Exception as exc:
+                log.warning("Address parse failed: %s", exc)
+                yield row, None
+        return
+
+    it       = iter(rows)
+    inflight = deque()   # (rows, keys, results, miss_keys, future, parsed, sources)
+    # Miss keys queued in a chunk not yet consumed → that chunk's parsed dict
+    # (filled when it is consumed, always before any later chunk)
+    queued: dict[tuple, dict] = {}
+
+    def count_repeat() -> None:
+        # The serial path would find the first parse in the cache
+        if std.cache_size > 0:
+            std.count_hits()
+        else:
+            std.count_misses()
+
+    with nullcontext(pool) if pool is not None else new_parse_pool(workers, mp_context) as pool:
+
+        def submit() -> bool:
+            chunk = list(islice(it, chunk_size))
+            if not chunk:
+                return False
+            keys: list[Optional[tuple]] = []
+            results: list[Optional[ParsedAddress]] = []
+            misses: dict[tuple, None] = {}
+            parsed: dict[tuple, Optional[ParsedAddress]] = {}
+            sources: dict[tuple, dict] = {}   # key → parsed dict of the chunk parsing it
+            for row in chunk:
+                kwargs = fields(row)
+                if kwargs is None:
+                    keys.append(None)
+                    results.append(None)
+                    continue
+                key = std.cache_key(
+                    kwargs.get("raw_address", ""),
+                    kwargs.get("street_number", ""),
+                    kwargs.get("street_direction", ""),
+                    kwargs.get("street_name", ""),
+                    kwargs.get("street_type", ""),
+                    kwargs.get("zip_code", ""),
+                    kwargs.get("unit", ""),
+                )
+                keys.append(key)
+                cached = std.lookup(key)
+                results.append(cached)
+                if cached is None:
+                    if key in misses or key in queued:
+                        count_repeat()   # served by the parse already queued
+                        sources[key] = queued[key]
+                    else:
+                        misses[key] = None
+                        queued[key] = sources[key] = parsed
+            miss_keys = list(misses)
+            future = pool.submit(_parse_keys, miss_keys) if miss_keys else None
+            inflight.append((chunk, keys, results, miss_keys, future, parsed, sources))
+            return True
+
+        while len(inflight) < workers * 2 and submit():
+            pass
+
+        while inflight:
+            chunk, keys, results, miss_keys, future, parsed, sources = inflight.popleft()
+            if future is not None:
+                parsed.update(zip(miss_keys, future.result()))
+                std.count_misses(len(miss_keys))
+                for key in miss_keys:
+                    if parsed[key] is not None:
+                        std.store(key, parsed[key])
+                    del queued[key]
+            # Keys queued by this chunk or an earlier one are all parsed now
+            results = [
+                sources[key].get(key) if res is None and key is not None else res
+                for key, res in zip(keys, results)
+            ]
+            submit()
+            yield from zip(chunk, results)
+
+
 # ─── Location upsert ──────────────────────────────────────────────────────────
 
 def upsert_location(
@@ -236,6 +524,8 @@ def upsert_location(
 ) -> Optional[int]:
     """
     Returns location_sk from dim_location.
+    New rows get their street_key (sql/11_street_key.sql) from the
+    standardized address.
     Uses INSERT ... ON CONFLICT DO NOTHING RETURNING + fallback SELECT
     to safely handle concurrent inserts without deadlocks.
     Returns None if the address could not be standardized.
@@ -250,10 +540,10 @@ def upsert_location(
                 INSERT INTO dim_location
                     (full_address_standardized, house_number, street_direction,
                      street_name, street_type, unit, zip, lat, lon, geom,
-                     source_address_raw, city_id)
+                     source_address_raw, city_id, street_key)
                 VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,
                         ST_SetSRID(ST_MakePoint(%s,%s),4326),
-                        %s, 1)
+                        %s, 1, normalize_street_key(%s))
                 ON CONFLICT (full_address_standardized) DO NOTHING
                 RETURNING location_sk
                 """,
@@ -264,6 +554,7 @@ def upsert_location(
                     parsed.unit, parsed.zip,
                     lat, lon, lon, lat,
                     parsed.full_address_standardized,
+                    parsed.full_address_standardized,
                 ),
             )
         else:
@@ -272,8 +563,8 @@ def upsert_location(
                 INSERT INTO dim_location
                     (full_address_standardized, house_number, street_direction,
                      street_name, street_type, unit, zip,
-                     source_address_raw, city_id)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,1)
+                     source_address_raw, city_id, street_key)
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,1,normalize_street_key(%s))
                 ON CONFLICT (full_address_standardized) DO NOTHING
                 RETURNING location_sk
                 """,
@@ -283,6 +574,7 @@ def upsert_location(
                     parsed.street_name, parsed.street_type,
                     parsed.unit, parsed.zip,
                     parsed.full_address_standardized,
+                    parsed.full_address_standardized,
                 ),
             )
         row = cur.fetchone()
@@ -295,3 +587,255 @@ def upsert_location(
         )
         row = cur.fetchone()
         return row[0] if row else None
+
+
+# ─── Bulk location resolution ─────────────────────────────────────────────────
+
+class LocationResolver:
+    """
+    Resolves location_sk for whole buffers of parsed addresses.
+
+    Keeps an in-process full_address_standardized → location_sk map, seeded
+    from dim_location at start.  resolve() inserts every address not yet in
+    the map with one multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING,
+    so fact rows get their location_sk without per-row SQL.  Keys that come
+    back empty (inserted concurrently by another process) are fetched with a
+    single follow-up SELECT.
+
+    Pass seed=False for small datasets: unknown keys are then looked up in
+    the same two statements instead of preloading the whole dimension.
+    """
+
+    def __init__(self, conn, seed: bool = True):
+        self.conn = conn
+        self._keys: dict[str, int] = {}
+        if seed:
+            self._seed()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _seed(self):
+        with self.conn.cursor(name="location_seed") as cur:
+            cur.itersize = 50_000
+            cur.execute("SELECT full_address_standardized, location_sk FROM dim_location")
+            for addr, sk in cur:
+                self._keys[addr] = sk
+        self.conn.commit()
+        log.info("Location map seeded with %d addresses", len(self._keys))
+
+    def resolve(
+        self,
+        items: Sequence[tuple[ParsedAddress, Optional[float], Optional[float]]],
+    ) -> list[Optional[int]]:
+        """Return location_sk per (parsed, lat, lon), in input order."""
+        missing: dict[str, tuple[ParsedAddress, Optional[float], Optional[float]]] = {}
+        for parsed, lat, lon in items:
+            key = parsed.full_address_standardized
+            if key and key not in self._keys and key not in missing:
+                missing[key] = (parsed, lat, lon)
+
+        if missing:
+            self._insert(missing)
+
+        return [
+            self._keys.get(parsed.full_address_standardized)
+            if parsed.full_address_standardized else None
+            for parsed, _, _ in items
+        ]
+
+    def attach(self, pending: Sequence[tuple]) -> list[tuple]:
+        """
+        Resolve a buffer of (parsed, lat, lon, fact_values) entries into
+        fact rows shaped (location_sk, *fact_values).  Unresolvable entries
+        are dropped.
+        """
+        sks = self.resolve([(parsed, lat, lon) for parsed, lat, lon, _ in pending])
+        return [
+            (sk, *values)
+            for sk, (_, _, _, values) in zip(sks, pending)
+            if sk is not None
+        ]
+
+    def _insert(self, missing: dict):
+        rows = []
+        # Sorted so concurrent loaders take row locks in the same order
+        for key in sorted(missing):
+            parsed, lat, lon = missing[key]
+            if not (lat and lon):
+                lat = lon = None
+            rows.append((
+                key,
+                parsed.house_number, parsed.street_direction,
+                parsed.street_name, parsed.street_type,
+                parsed.unit, parsed.zip,
+                lat, lon, lon, lat,
+                key, key,
+            ))
+
+        with self.conn.cursor() as cur:
+            returned = psycopg2.extras.execute_values(
+                cur,
+                """
+                INSERT INTO dim_location
+                    (full_address_standardized, house_number, street_direction,
+                     street_name, street_type, unit, zip, lat, lon, geom,
+                     source_address_raw, city_id, street_key)
+                VALUES %s
+                ON CONFLICT (full_address_standardized) DO NOTHING
+                RETURNING full_address_standardized, location_sk
+                """,
+                rows,
+                template="(%s,%s,%s,%s,%s,%s,%s,%s,%s,"
+                         " ST_SetSRID(ST_MakePoint(%s,%s),4326), %s, 1,"
+                         " normalize_street_key(%s))",
+                page_size=len(rows),
+                fetch=True,
+            )
+            self._keys.update(returned)
+
+            # Already present (seed=False) or inserted concurrently
+            unresolved = [k for k in missing if k not in self._keys]
+            if unresolved:
+                cur.execute(
+                    """
+                    SELECT full_address_standardized, location_sk
+                    FROM dim_location
+                    WHERE full_address_standardized = ANY(%s)
+                    """,
+                    (unresolved,),
+                )
+                self._keys.update(cur.fetchall())
+        # Commit now so a later fact-load rollback cannot orphan cached keys
+        self.conn.commit()
+
+
+# ─── Bulk fact loader ─────────────────────────────────────────────────────────
+
+def _copy_value(val) -> str:
+    """Render one Python value as a COPY text-format field."""
+    if val is None:
+        return r"\N"
+    if isinstance(val, bool):
+        return "t" if val else "f"
+    if isinstance(val, date):          # also covers datetime
+        return val.isoformat()
+    return (
+        str(val)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class CopyLoader:
+    """
+    Streams buffered fact tuples into a fact table.
+
+    Each load() writes the rows with COPY ... FROM STDIN into a session-local
+    staging table (temp tables are never WAL-logged), then merges them into
+    the target with a single INSERT ... SELECT ... ON CONFLICT DO NOTHING and
+    commits.  The staging table is emptied automatically on commit.
+
+    With `replace_on` key columns, rows from earlier batches that share a key
+    with a staged row are deleted first, so re-fetched (changed) source rows
+    replace their previous version instead of accumulating next to it.
+
+    When the fact table carries location_sk and ingestion_batch_id, the
+    locations each batch inserts or replaces are recorded in
+    ingestion_batch_location so the property summary can be refreshed for
+    just those rows.
+
+    Tracks rows loaded and wall-clock time since construction so each
+    ingestion script can report its throughput.
+    """
+
+    def __init__(
+        self, conn, table: str, columns: Sequence[str], replace_on: Sequence[str] = (),
+    ):
+        self.conn = conn
+        self.table = table
+        self.columns = tuple(columns)
+        self.replace_on = tuple(replace_on)
+        self.staging = f"stage_{table}"
+        self.tracks_locations = {"location_sk", "ingestion_batch_id"} <= set(self.columns)
+        self.rows_loaded = 0
+        self._started = time.monotonic()
+
+    def load(self, rows: Iterable[tuple]) -> int:
+        """COPY rows into staging, merge into the target, commit. Returns rows merged."""
+        buf = io.StringIO()
+        for row in rows:
+            buf.write("\t".join(_copy_value(v) for v in row))
+            buf.write("\n")
+        buf.seek(0)
+
+        cols = ", ".join(self.columns)
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"""
+                CREATE TEMP TABLE IF NOT EXISTS {self.staging}
+                ON COMMIT DELETE ROWS
+                AS SELECT {cols} FROM {self.table} WITH NO DATA
+                """
+            )
+            cur.copy_expert(f"COPY {self.staging} ({cols}) FROM STDIN", buf)
+            if self.replace_on:
+                cur.execute(self._replace_sql())
+            cur.execute(
+                f"""
+                INSERT INTO {self.table} ({cols})
+                SELECT {cols} FROM {self.staging}
+                ON CONFLICT DO NOTHING
+                """
+            )
+            merged = cur.rowcount
+            if self.tracks_locations:
+                cur.execute(
+                    f"""
+                    INSERT INTO ingestion_batch_location (ingestion_batch_id, location_sk)
+                    SELECT DISTINCT ingestion_batch_id, location_sk FROM {self.staging}
+                     WHERE ingestion_batch_id IS NOT NULL AND location_sk IS NOT NULL
+                    ON CONFLICT DO NOTHING
+                    """
+                )
+        self.conn.commit()
+        self.rows_loaded += merged
+        return merged
+
+    def _replace_sql(self) -> str:
+        # Leading key column uses = so an index on it applies; the rest may be NULL.
+        first, *rest = self.replace_on
+        match = [f"t.{first} = s.{first}"]
+        match += [f"t.{c} IS NOT DISTINCT FROM s.{c}" for c in rest]
+        match.append("t.ingestion_batch_id IS DISTINCT FROM s.ingestion_batch_id")
+        delete = (
+            f"DELETE FROM {self.table} t USING {self.staging} s WHERE "
+            + " AND ".join(match)
+        )
+        if not self.tracks_locations:
+            return delete
+        # A replaced row may have pointed at a different location; mark it too
+        return f"""
+            WITH gone AS ({delete} RETURNING s.ingestion_batch_id, t.location_sk)
+            INSERT INTO ingestion_batch_location (ingestion_batch_id, location_sk)
+            SELECT DISTINCT ingestion_batch_id, location_sk FROM gone
+             WHERE ingestion_batch_id IS NOT NULL AND location_sk IS NOT NULL
+            ON CONFLICT DO NOTHING
+            """
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows_loaded / elapsed if elapsed > 0 else 0.0
+
+    def log_throughput(self, label: str):
+        log.info(
+            "%s: %d rows in %.1fs (%.0f rows/s)",
+            label, self.rows_loaded, self.elapsed, self.rows_per_second,
+        )
@@ -15,10 +15,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-import psycopg2.extras
-
 from backend.ingestion.base import (
-    AddressStandardizer, BatchTracker, get_conn, upsert_location,
+    AddressStandardizer, BatchTracker, CopyLoader, LocationResolver, get_conn,
+    parse_stream,
 )
 
 log = logging.getLogger(__name__)
@@ -28,6 +27,12 @@ SOURCE   = "311_service_requests"
 BATCH_SZ = 10_000
 LOG_EVERY = 100_000
 
+COLUMNS = (
+    "location_sk", "source_id", "sr_type", "sr_short_code", "status",
+    "created_date", "closed_date",
+    "source_dataset", "ingestion_batch_id",
+)
+
 
 def _parse_ts(val: str) -> Optional[datetime]:
     val = (val or "").strip()
@@ -39,28 +44,45 @@ def _parse_ts(val: str) -> Optional[datetime]:
     return None
 
 
+def _address_fields(row: dict) -> Optional[dict]:
+    """parse() arguments for a row, or None for duplicates / rows without a street."""
+    # Skip duplicates
+    if (row.get("DUPLICATE") or "").strip().lower() in ("true", "1", "yes"):
+        return None
+
+    # Require at least a street address or street name
+    street_name = row.get("STREET_NAME", "").strip()
+    street_addr = row.get("STREET_ADDRESS", "").strip()
+    if not street_name and not street_addr:
+        return None
+
+    return dict(
+        raw_address=street_addr,
+        street_number=row.get("STREET_NUMBER", ""),
+        street_direction=row.get("STREET_DIRECTION", ""),
+        street_name=street_name,
+        street_type=row.get("STREET_TYPE", ""),
+        zip_code=row.get("ZIP_CODE", ""),
+    )
+
+
 def run():
-    std  = AddressStandardizer()
-    conn = get_conn()
+    std    = AddressStandardizer()
+    conn   = get_conn()
+    loader = CopyLoader(conn, "fact_311", COLUMNS)
+    locs   = LocationResolver(conn)
 
     with BatchTracker(SOURCE, str(CSV_PATH)) as batch:
         total   = 0
         skipped = 0
-        buf: list[tuple] = []
+        pending: list[tuple] = []   # (parsed, lat, lon, fact values)
 
         with open(CSV_PATH, encoding="utf-8-sig", newline="") as fh:
             reader = csv.DictReader(fh)
 
-            for row in reader:
-                # Skip duplicates
-                if (row.get("DUPLICATE") or "").strip().lower() in ("true", "1", "yes"):
-                    skipped += 1
-                    continue
-
-                # Require at least a street address or street name
-                street_name = row.get("STREET_NAME", "").strip()
-                street_addr = row.get("STREET_ADDRESS", "").strip()
-                if not street_name and not street_addr:
+            # Address parsing runs ahead in worker processes when ETL_PARSE_WORKERS > 1
+            for row, parsed in parse_stream(reader, _address_fields, std):
+                if parsed is None or not parsed.full_address_standardized:
                     skipped += 1
                     continue
 
@@ -68,22 +90,7 @@ def run():
                     lat = float(row.get("LATITUDE") or 0) or None
                     lon = float(row.get("LONGITUDE") or 0) or None
 
-                    parsed = std.parse(
-                        raw_address=street_addr,
-                        street_number=row.get("STREET_NUMBER", ""),
-                        street_direction=row.get("STREET_DIRECTION", ""),
-                        street_name=street_name,
-                        street_type=row.get("STREET_TYPE", ""),
-                        zip_code=row.get("ZIP_CODE", ""),
-                    )
-
-                    loc_sk = upsert_location(conn, parsed, lat, lon)
-                    if loc_sk is None:
-                        skipped += 1
-                        continue
-
-                    buf.append((
-                        loc_sk,
+                    pending.append((parsed, lat, lon, (
                         row.get("SR_NUMBER"),
                         row.get("SR_TYPE"),
                         row.get("SR_SHORT_CODE"),
@@ -92,12 +99,11 @@ def run():
                         _parse_ts(row.get("CLOSED_DATE", "")),
                         SOURCE,
                         batch.batch_id,
-                    ))
+                    )))
 
-                    if len(buf) >= BATCH_SZ:
-                        _flush(conn, buf)
-                        total += len(buf)
-                        buf.clear()
+                    if len(pending) >= BATCH_SZ:
+                        total += _flush(conn, locs, loader, pending)
+                        pending.clear()
                         if total % LOG_EVERY < BATCH_SZ:
                             log.info("311: %d loaded …", total)
 
@@ -106,35 +112,23 @@ def run():
                     conn.rollback()   # reset aborted-transaction state
                     skipped += 1
 
-            if buf:
-                _flush(conn, buf)
-                total += len(buf)
+            if pending:
+                total += _flush(conn, locs, loader, pending)
 
         conn.close()
         batch.complete(total)
         log.info("311 complete. Loaded=%d  Skipped=%d", total, skipped)
+        loader.log_throughput("311")
+        std.log_cache_stats("311")
 
 
-def _flush(conn, rows: list[tuple]):
+def _flush(conn, locs: LocationResolver, loader: CopyLoader, pending: list[tuple]) -> int:
     try:
-        with conn.cursor() as cur:
-            psycopg2.extras.execute_values(
-                cur,
-                """
-                INSERT INTO fact_311
-                    (location_sk, source_id, sr_type, sr_short_code, status,
-                     created_date, closed_date,
-                     source_dataset, ingestion_batch_id)
-                VALUES %s
-                ON CONFLICT DO NOTHING
-                """,
-                rows,
-                page_size=2000,
-            )
-        conn.commit()
+        return loader.load(locs.attach(pending))
     except Exception as exc:
         conn.rollback()
-        log.warning("Batch flush failed (%d rows dropped): %s", len(rows), exc)
+        log.warning("Batch flush failed (%d rows dropped): %s", len(pending), exc)
+        return 0
 
 
 if __name__ == "__main__":
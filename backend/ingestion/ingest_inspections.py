@@ -12,10 +12,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-import psycopg2.extras
-
 from backend.ingestion.base import (
-    AddressStandardizer, BatchTracker, get_conn, upsert_location,
+    AddressStandardizer, BatchTracker, CopyLoader, LocationResolver, get_conn,
+    parse_stream,
 )
 
 log = logging.getLogger(__name__)
@@ -24,6 +23,12 @@ CSV_PATH = Path(__file__).parents[2] / "chicago_datasets" / "food_inspections.cs
 SOURCE   = "food_inspections"
 BATCH_SZ = 5_000
 
+COLUMNS = (
+    "location_sk", "source_id", "dba_name", "facility_type", "risk_level",
+    "inspection_date", "inspection_type", "results", "violations_text",
+    "source_dataset", "ingestion_batch_id",
+)
+
 
 def _parse_date(val: str) -> Optional[datetime.date]:
     val = (val or "").strip()
@@ -35,36 +40,35 @@ def _parse_date(val: str) -> Optional[datetime.date]:
     return None
 
 
+def _address_fields(row: dict) -> dict:
+    return dict(raw_address=row.get("Address", ""), zip_code=row.get("Zip", ""))
+
+
 def run():
-    std  = AddressStandardizer()
-    conn = get_conn()
+    std    = AddressStandardizer()
+    conn   = get_conn()
+    loader = CopyLoader(conn, "fact_inspection", COLUMNS)
+    locs   = LocationResolver(conn)
 
     with BatchTracker(SOURCE, str(CSV_PATH)) as batch:
         total = 0
         skipped = 0
-        buf: list[tuple] = []
+        pending: list[tuple] = []   # (parsed, lat, lon, fact values)
 
         with open(CSV_PATH, encoding="utf-8-sig", newline="") as fh:
             reader = csv.DictReader(fh)
 
-            for row in reader:
+            # Address parsing runs ahead in worker processes when ETL_PARSE_WORKERS > 1
+            for row, parsed in parse_stream(reader, _address_fields, std):
+                if parsed is None or not parsed.full_address_standardized:
+                    skipped += 1
+                    continue
+
                 try:
                     lat = float(row.get("Latitude") or 0) or None
                     lon = float(row.get("Longitude") or 0) or None
-                    zip_code = row.get("Zip", "")
-
-                    parsed = std.parse(
-                        raw_address=row.get("Address", ""),
-                        zip_code=zip_code,
-                    )
-
-                    loc_sk = upsert_location(conn, parsed, lat, lon)
-                    if loc_sk is None:
-                        skipped += 1
-                        continue
 
-                    buf.append((
-                        loc_sk,
+                    pending.append((parsed, lat, lon, (
                         row.get("Inspection ID"),
                         row.get("DBA Name"),
                         row.get("Facility Type"),
@@ -75,43 +79,25 @@ def run():
                         row.get("Violations"),
                         SOURCE,
                         batch.batch_id,
-                    ))
+                    )))
 
-                    if len(buf) >= BATCH_SZ:
-                        _flush(conn, buf)
-                        total += len(buf)
-                        buf.clear()
+                    if len(pending) >= BATCH_SZ:
+                        total += loader.load(locs.attach(pending))
+                        pending.clear()
                         log.info("Inspections: %d loaded …", total)
 
                 except Exception as exc:
                     log.warning("Row skipped: %s", exc)
                     skipped += 1
 
-            if buf:
-                _flush(conn, buf)
-                total += len(buf)
+            if pending:
+                total += loader.load(locs.attach(pending))
 
         conn.close()
         batch.complete(total)
         log.info("Inspections complete. Loaded=%d  Skipped=%d", total, skipped)
-
-
-def _flush(conn, rows: list[tuple]):
-    with conn.cursor() as cur:
-        psycopg2.extras.execute_values(
-            cur,
-            """
-            INSERT INTO fact_inspection
-                (location_sk, source_id, dba_name, facility_type, risk_level,
-                 inspection_date, inspection_type, results, violations_text,
-                 source_dataset, ingestion_batch_id)
-            VALUES %s
-            ON CONFLICT DO NOTHING
-            """,
-            rows,
-            page_size=1000,
-        )
-    conn.commit()
+        loader.log_throughput("Inspections")
+        std.log_cache_stats("Inspections")
 
 
 if __name__ == "__main__":
@@ -13,10 +13,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-import psycopg2.extras
-
 from backend.ingestion.base import (
-    AddressStandardizer, BatchTracker, get_conn, upsert_location,
+    AddressStandardizer, BatchTracker, CopyLoader, LocationResolver, get_conn,
 )
 
 log = logging.getLogger(__name__)
@@ -25,6 +23,14 @@ CSV_PATH = Path(__file__).parents[2] / "chicago_datasets" / "building_permits.cs
 SOURCE   = "building_permits"
 BATCH_SZ = 5_000
 
+COLUMNS = (
+    "location_sk", "parcel_sk", "source_id", "permit_number",
+    "permit_status", "permit_type",
+    "application_start_date", "issue_date", "processing_time",
+    "total_fee", "work_description",
+    "source_dataset", "ingestion_batch_id",
+)
+
 
 def _parse_date(val: str) -> Optional[datetime.date]:
     val = (val or "").strip()
@@ -58,13 +64,15 @@ def upsert_parcel(conn, pin: str, loc_sk: int) -> Optional[int]:
 
 
 def run():
-    std  = AddressStandardizer()
-    conn = get_conn()
+    std    = AddressStandardizer()
+    conn   = get_conn()
+    loader = CopyLoader(conn, "fact_permit", COLUMNS)
+    locs   = LocationResolver(conn)
 
     with BatchTracker(SOURCE, str(CSV_PATH)) as batch:
         total = 0
         skipped = 0
-        buf: list[tuple] = []
+        pending: list[tuple] = []   # (parsed, lat, lon, (pin, fact values))
 
         with open(CSV_PATH, encoding="utf-8-sig", newline="") as fh:
             reader = csv.DictReader(fh)
@@ -80,19 +88,17 @@ def run():
                         street_name=row.get("STREET_NAME", ""),
                     )
 
-                    loc_sk = upsert_location(conn, parsed, lat, lon)
-                    if loc_sk is None:
+                    if not parsed.full_address_standardized:
                         skipped += 1
                         continue
 
-                    # PIN / parcel linkage
-                    parcel_sk = None
+                    # PIN / parcel linkage (parcel upserted at flush, once location_sk is known)
+                    pin = None
                     pin_raw = row.get("PIN_LIST", "")
                     # PIN_LIST may be blank or contain multiple PINs; take the first valid one
                     for candidate in re.split(r"[;,\s]+", pin_raw):
                         pin = _normalize_pin(candidate)
                         if pin:
-                            parcel_sk = upsert_parcel(conn, pin, loc_sk)
                             break
 
                     proc_time = row.get("PROCESSING_TIME", "")
@@ -107,9 +113,8 @@ def run():
                     except (ValueError, AttributeError):
                         tf = None
 
-                    buf.append((
-                        loc_sk,
-                        parcel_sk,
+                    pending.append((parsed, lat, lon, (
+                        pin,
                         row.get("ID"),
                         row.get("PERMIT#"),
                         row.get("PERMIT_STATUS"),
@@ -121,45 +126,34 @@ def run():
                         row.get("WORK_DESCRIPTION"),
                         SOURCE,
                         batch.batch_id,
-                    ))
+                    )))
 
-                    if len(buf) >= BATCH_SZ:
-                        _flush(conn, buf)
-                        total += len(buf)
-                        buf.clear()
+                    if len(pending) >= BATCH_SZ:
+                        total += _flush(conn, locs, loader, pending)
+                        pending.clear()
                         log.info("Permits: %d loaded …", total)
 
                 except Exception as exc:
                     log.warning("Row skipped: %s", exc)
                     skipped += 1
 
-            if buf:
-                _flush(conn, buf)
-                total += len(buf)
+            if pending:
+                total += _flush(conn, locs, loader, pending)
 
         conn.close()
         batch.complete(total)
         log.info("Permits complete. Loaded=%d  Skipped=%d", total, skipped)
+        loader.log_throughput("Permits")
+        std.log_cache_stats("Permits")
 
 
-def _flush(conn, rows: list[tuple]):
-    with conn.cursor() as cur:
-        psycopg2.extras.execute_values(
-            cur,
-            """
-            INSERT INTO fact_permit
-                (location_sk, parcel_sk, source_id, permit_number,
-                 permit_status, permit_type,
-                 application_start_date, issue_date, processing_time,
-                 total_fee, work_description,
-                 source_dataset, ingestion_batch_id)
-            VALUES %s
-            ON CONFLICT DO NOTHING
-            """,
-            rows,
-            page_size=1000,
-        )
-    conn.commit()
+def _flush(conn, locs: LocationResolver, loader: CopyLoader, pending: list[tuple]) -> int:
+    """Resolve locations for the buffer, link parcels, and bulk-load fact_permit."""
+    rows = []
+    for loc_sk, pin, *values in locs.attach(pending):
+        parcel_sk = upsert_parcel(conn, pin, loc_sk) if pin else None
+        rows.append((loc_sk, parcel_sk, *values))
+    return loader.load(rows)
 
 
 if __name__ == "__main__":
@@ -4,8 +4,13 @@ CIVITAS ETL – Tax Lien ingestion from Cook County Socrata API.
 Downloads both Annual and Scavenger tax sale datasets, normalizes PINs,
 matches to dim_parcel (and dim_location via parcel), and loads fact_tax_lien.
 
+Incremental by default: each dataset's max Socrata :updated_at is stored as
+the batch watermark and later runs fetch only rows changed since then.
+Rows are keyed on their Socrata row id (:id), so a re-fetched row replaces
+exactly its previous version.
+
 Usage:
-    python -m backend.ingestion.ingest_tax_liens
+    python -m backend.ingestion.ingest_tax_liens [--full]
 
 Environment:
     SOCRATA_APP_TOKEN  – optional Cook County Socrata API token (raises rate limit)
@@ -14,15 +19,14 @@ Environment:
 
 from __future__ import annotations
 
+import argparse
 import logging
 import os
 import re
-from typing import Optional
-
-import psycopg2.extras
-import requests
+from typing import Iterator, Optional
 
-from backend.ingestion.base import BatchTracker, get_conn
+from backend.ingestion.base import BatchTracker, CopyLoader, get_conn, last_watermark
+from backend.ingestion.socrata import iter_rows
 
 log = logging.getLogger(__name__)
 
@@ -33,6 +37,15 @@ SOCRATA_ENDPOINTS = {
 PAGE_SIZE = 50_000
 SOURCE    = "cook_county_tax_liens"
 
+COLUMNS = (
+    "parcel_sk", "location_sk", "source_id",
+    "tax_sale_year", "lien_type", "from_year", "to_year",
+    "sold_at_sale",
+    "tax_amount_offered", "penalty_amount_offered",
+    "total_amount_offered", "total_amount_forfeited",
+    "buyer_name", "source_dataset", "ingestion_batch_id",
+)
+
 # Column mapping for each dataset type
 COLUMN_MAP = {
     "annual": {
@@ -79,44 +92,71 @@ def _get_parcel_and_location(conn, pin: str):
     return None, None
 
 
-def _fetch_pages(url: str, token: Optional[str]) -> list[dict]:
-    """Paginate through Socrata CSV endpoint, return all rows as dicts."""
-    headers = {}
-    if token:
-        headers["X-App-Token"] = token
-    offset = 0
-    all_rows: list[dict] = []
-
-    while True:
-        resp = requests.get(
-            url,
-            params={"$limit": PAGE_SIZE, "$offset": offset},
-            headers=headers,
-            timeout=60,
+# Keys written before rows were keyed on :id (PIN-YEAR-TYPE)
+_LEGACY_KEY = r"^[0-9]{14}-"
+
+
+def _has_legacy_rows(conn) -> bool:
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT EXISTS (SELECT 1 FROM fact_tax_lien WHERE source_id ~ %s)",
+            (_LEGACY_KEY,),
+        )
+        return cur.fetchone()[0]
+
+
+def _drop_legacy_rows(conn, batch_id: int) -> None:
+    """
+    Delete PIN-YEAR-TYPE keyed rows once a full load has re-added every lien
+    under its :id, marking their locations for the summary refresh.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            WITH gone AS (
+                DELETE FROM fact_tax_lien WHERE source_id ~ %s RETURNING location_sk
+            )
+            INSERT INTO ingestion_batch_location (ingestion_batch_id, location_sk)
+            SELECT DISTINCT %s, location_sk FROM gone WHERE location_sk IS NOT NULL
+            ON CONFLICT DO NOTHING
+            """,
+            (_LEGACY_KEY, batch_id),
         )
-        resp.raise_for_status()
-        import csv
-        import io
-        reader = csv.DictReader(io.StringIO(resp.text))
-        page = list(reader)
-        all_rows.extend(page)
-        log.info("  fetched %d rows (offset=%d)", len(page), offset)
-        if len(page) < PAGE_SIZE:
-            break
-        offset += PAGE_SIZE
+    conn.commit()
 
-    return all_rows
 
+def _fetch_rows(url: str, token: Optional[str], since: Optional[str] = None) -> Iterator[dict]:
+    """Stream rows from a Socrata CSV endpoint.
+
+    `:*` adds the system fields (:id, :updated_at) to each row; with `since`
+    only rows updated at or after that timestamp are requested. The bound is
+    inclusive so rows stamped with the watermark time after the previous
+    fetch are not skipped; the rows fetched twice replace themselves.
+    """
+    params = {"$select": ":*, *"}
+    if since:
+        params["$where"] = f":updated_at >= '{since}'"
+    return iter_rows(url, params, token, page_size=PAGE_SIZE)
 
-def _run_dataset(conn, batch_id: int, lien_type: str, url: str, token: Optional[str]):
-    cm = COLUMN_MAP[lien_type]
-    rows_raw = _fetch_pages(url, token)
-    log.info("%s: %d rows downloaded", lien_type, len(rows_raw))
 
+def _run_dataset(
+    conn, loader: CopyLoader, batch_id: int, lien_type: str, url: str, token: Optional[str],
+    since: Optional[str] = None,
+) -> tuple[int, Optional[str]]:
+    """Load one dataset; returns (rows merged, max :updated_at seen)."""
+    cm = COLUMN_MAP[lien_type]
     buf: list[tuple] = []
+    fetched = 0
     skipped = 0
+    loaded  = 0
+    high = since
+
+    for row in _fetch_rows(url, token, since):
+        fetched += 1
+        updated_at = row.get(":updated_at") or None
+        if updated_at and (high is None or updated_at > high):
+            high = updated_at
 
-    for row in rows_raw:
         pin_raw = row.get(cm["pin"], "")
         pin = _normalize_pin(pin_raw)
         if not pin:
@@ -159,9 +199,10 @@ def _run_dataset(conn, batch_id: int, lien_type: str, url: str, token: Optional[
             val = (row.get(col, "") or "").strip().upper()
             return val in ("Y", "YES", "TRUE", "1") if val else None
 
-        # Synthetic source_id: PIN-YEAR-TYPE[-row_index]
+        # Several liens can share a PIN, year and type; only the Socrata
+        # row id identifies one
         year_val = _int("year")
-        source_id = f"{pin}-{year_val or 'X'}-{lien_type.upper()}"
+        source_id = row.get(":id") or None
 
         buf.append((
             parcel_sk,
@@ -182,53 +223,52 @@ def _run_dataset(conn, batch_id: int, lien_type: str, url: str, token: Optional[
         ))
 
         if len(buf) >= 5_000:
-            _flush(conn, buf)
+            loaded += loader.load(buf)
             buf.clear()
 
     if buf:
-        _flush(conn, buf)
-
-    log.info("%s: loaded %d rows, skipped %d", lien_type, len(rows_raw) - skipped, skipped)
-    return len(rows_raw) - skipped
+        loaded += loader.load(buf)
 
-
-def _flush(conn, rows: list[tuple]):
-    with conn.cursor() as cur:
-        psycopg2.extras.execute_values(
-            cur,
-            """
-            INSERT INTO fact_tax_lien
-                (parcel_sk, location_sk, source_id,
-                 tax_sale_year, lien_type, from_year, to_year,
-                 sold_at_sale,
-                 tax_amount_offered, penalty_amount_offered,
-                 total_amount_offered, total_amount_forfeited,
-                 buyer_name, source_dataset, ingestion_batch_id)
-            VALUES %s
-            ON CONFLICT DO NOTHING
-            """,
-            rows,
-            page_size=1000,
-        )
-    conn.commit()
+    log.info("%s: fetched %d rows, loaded %d, skipped %d", lien_type, fetched, loaded, skipped)
+    return loaded, high
 
 
-def run():
+def run(full: bool = False):
+    """Load both tax sale datasets; `full` ignores the stored watermark."""
     token = os.environ.get("SOCRATA_APP_TOKEN")
-    conn  = get_conn()
-    total = 0
+    conn   = get_conn()
+    loader = CopyLoader(conn, "fact_tax_lien", COLUMNS, replace_on=("source_id",))
+    total  = 0
+    if not full and _has_legacy_rows(conn):
+        # Old keys cannot be matched to :id; reload once and drop them
+        log.info("Tax liens still keyed on PIN-YEAR-TYPE; running a full load")
+        full = True
+    prior  = {} if full else last_watermark(conn, SOURCE)
+    watermark: dict[str, str] = {}
 
     with BatchTracker(SOURCE) as batch:
         for lien_type, url in SOCRATA_ENDPOINTS.items():
-            log.info("Fetching %s tax liens …", lien_type)
-            n = _run_dataset(conn, batch.batch_id, lien_type, url, token)
+            since = prior.get(lien_type)
+            log.info(
+                "Fetching %s tax liens (%s) …",
+                lien_type, f"updated after {since}" if since else "full",
+            )
+            n, high = _run_dataset(conn, loader, batch.batch_id, lien_type, url, token, since)
             total += n
+            if high:
+                watermark[lien_type] = high
 
+        if full:
+            _drop_legacy_rows(conn, batch.batch_id)
         conn.close()
-        batch.complete(total)
+        batch.complete(total, watermark=watermark)
         log.info("Tax liens complete. Total loaded=%d", total)
+        loader.log_throughput("Tax liens")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load Cook County tax liens")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the stored watermark and reload everything")
     logging.basicConfig(level=logging.INFO)
-    run()
+    run(full=parser.parse_args().full)
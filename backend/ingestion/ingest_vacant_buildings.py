@@ -5,8 +5,11 @@ Dataset: kc9i-wq85 (~5K rows)
 Downloads JSON via Socrata API, parses free-form addresses,
 and loads fact_vacant_building.
 
+Incremental by default: the max Socrata :updated_at is stored as the batch
+watermark and later runs fetch only rows changed since then.
+
 Usage:
-    python -m backend.ingestion.ingest_vacant_buildings
+    python -m backend.ingestion.ingest_vacant_buildings [--full]
 
 Environment:
     SOCRATA_APP_TOKEN  – optional (raises rate limit)
@@ -15,20 +18,21 @@ Environment:
 
 from __future__ import annotations
 
+import argparse
 import logging
 import os
 from datetime import datetime
-from typing import Optional
-
-import psycopg2.extras
-import requests
+from typing import Iterator, Optional
 
 from backend.ingestion.base import (
     AddressStandardizer,
     BatchTracker,
+    CopyLoader,
+    LocationResolver,
     get_conn,
-    upsert_location,
+    last_watermark,
 )
+from backend.ingestion.socrata import iter_rows
 
 log = logging.getLogger(__name__)
 
@@ -36,6 +40,14 @@ ENDPOINT  = "https://data.cityofchicago.org/resource/kc9i-wq85.json"
 PAGE_SIZE = 50_000
 SOURCE    = "vacant_building_violations"
 
+COLUMNS = (
+    "location_sk", "source_id", "docket_number", "violation_number",
+    "issued_date", "last_hearing_date", "violation_type",
+    "entity_or_person", "disposition_description",
+    "total_fines", "current_amount_due", "total_paid",
+    "source_dataset", "ingestion_batch_id",
+)
+
 addr_std = AddressStandardizer()
 
 
@@ -58,66 +70,45 @@ def _num(val: Optional[str]) -> Optional[float]:
         return None
 
 
-def _fetch_pages(token: Optional[str]) -> list[dict]:
-    """Paginate through Socrata JSON endpoint."""
-    headers = {}
-    if token:
-        headers["X-App-Token"] = token
-    offset = 0
-    all_rows: list[dict] = []
-
-    while True:
-        resp = requests.get(
-            ENDPOINT,
-            params={"$limit": PAGE_SIZE, "$offset": offset},
-            headers=headers,
-            timeout=60,
-        )
-        resp.raise_for_status()
-        page = resp.json()
-        all_rows.extend(page)
-        log.info("  fetched %d rows (offset=%d)", len(page), offset)
-        if len(page) < PAGE_SIZE:
-            break
-        offset += PAGE_SIZE
-
-    return all_rows
-
-
-def _flush(conn, rows: list[tuple]):
-    with conn.cursor() as cur:
-        psycopg2.extras.execute_values(
-            cur,
-            """
-            INSERT INTO fact_vacant_building
-                (location_sk, source_id, docket_number, violation_number,
-                 issued_date, last_hearing_date, violation_type,
-                 entity_or_person, disposition_description,
-                 total_fines, current_amount_due, total_paid,
-                 source_dataset, ingestion_batch_id)
-            VALUES %s
-            ON CONFLICT DO NOTHING
-            """,
-            rows,
-            page_size=1000,
-        )
-    conn.commit()
+def _fetch_rows(token: Optional[str], since: Optional[str] = None) -> Iterator[dict]:
+    """
+    Stream rows from the Socrata JSON endpoint (updated at or after `since`,
+    if given; rows at the watermark are fetched again and replace themselves).
+    """
+    params = {"$select": ":*, *"}
+    if since:
+        params["$where"] = f":updated_at >= '{since}'"
+    return iter_rows(ENDPOINT, params, token, page_size=PAGE_SIZE)
 
 
-def run():
+def run(full: bool = False):
+    """Load vacant building violations; `full` ignores the stored watermark."""
     token = os.environ.get("SOCRATA_APP_TOKEN")
-    conn  = get_conn()
-    total = 0
+    conn   = get_conn()
+    loader = CopyLoader(
+        conn, "fact_vacant_building", COLUMNS,
+        replace_on=("source_id", "violation_number"),
+    )
+    locs   = LocationResolver(conn, seed=False)   # ~5K rows; not worth preloading
+    total  = 0
     skipped = 0
+    since  = None if full else last_watermark(conn, SOURCE).get(SOURCE)
+    high   = since
 
     with BatchTracker(SOURCE) as batch:
-        log.info("Fetching vacant building violations …")
-        rows_raw = _fetch_pages(token)
-        log.info("Downloaded %d rows", len(rows_raw))
+        log.info(
+            "Fetching vacant building violations (%s) …",
+            f"updated after {since}" if since else "full",
+        )
+        pending: list[tuple] = []   # (parsed, lat, lon, fact values)
+        fetched = 0
 
-        buf: list[tuple] = []
+        for row in _fetch_rows(token, since):
+            fetched += 1
+            updated_at = row.get(":updated_at") or None
+            if updated_at and (high is None or updated_at > high):
+                high = updated_at
 
-        for row in rows_raw:
             # Parse address — dataset has free-form property_address
             raw_addr = row.get("property_address", "")
             lat = _num(row.get("latitude"))
@@ -129,8 +120,7 @@ def run():
                 skipped += 1
                 continue
 
-            location_sk = upsert_location(conn, parsed, lat=lat, lon=lon)
-            if not location_sk:
+            if not parsed.full_address_standardized:
                 skipped += 1
                 continue
 
@@ -138,8 +128,7 @@ def run():
             violation_num = (row.get("violation_number") or "").strip() or None
             source_id = docket or violation_num
 
-            buf.append((
-                location_sk,
+            pending.append((parsed, lat, lon, (
                 source_id,
                 docket,
                 violation_num,
@@ -153,21 +142,26 @@ def run():
                 _num(row.get("total_paid")),
                 SOURCE,
                 batch.batch_id,
-            ))
+            )))
 
-            if len(buf) >= 5_000:
-                _flush(conn, buf)
-                buf.clear()
+            if len(pending) >= 5_000:
+                total += loader.load(locs.attach(pending))
+                pending.clear()
 
-        if buf:
-            _flush(conn, buf)
+        if pending:
+            total += loader.load(locs.attach(pending))
 
-        total = len(rows_raw) - skipped
+        log.info("Downloaded %d rows", fetched)
         conn.close()
-        batch.complete(total)
+        batch.complete(total, watermark={SOURCE: high} if high else None)
         log.info("Vacant buildings complete. Loaded=%d, skipped=%d", total, skipped)
+        loader.log_throughput("Vacant buildings")
+        addr_std.log_cache_stats("Vacant buildings")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load vacant building violations")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the stored watermark and reload everything")
     logging.basicConfig(level=logging.INFO)
-    run()
+    run(full=parser.parse_args().full)
@@ -13,7 +13,7 @@ from pathlib import Path
 from typing import Optional
 
 from backend.ingestion.base import (
-    AddressStandardizer, BatchTracker, get_conn, upsert_location,
+    AddressStandardizer, BatchTracker, CopyLoader, LocationResolver, get_conn,
 )
 
 log = logging.getLogger(__name__)
@@ -22,6 +22,15 @@ CSV_PATH = Path(__file__).parents[2] / "chicago_datasets" / "building_violations
 SOURCE   = "building_violations"
 BATCH_SZ = 10_000
 
+COLUMNS = (
+    "location_sk", "source_id",
+    "violation_date", "violation_last_modified",
+    "violation_code", "violation_status", "violation_status_date",
+    "violation_description", "violation_ordinance", "inspector_comments",
+    "inspection_number", "inspection_status", "inspection_category",
+    "department_bureau", "source_dataset", "ingestion_batch_id",
+)
+
 
 def _parse_date(val: str) -> Optional[datetime.date]:
     val = (val or "").strip()
@@ -43,13 +52,15 @@ def _parse_bool(val: str) -> Optional[bool]:
 
 
 def run():
-    std  = AddressStandardizer()
-    conn = get_conn()
+    std    = AddressStandardizer()
+    conn   = get_conn()
+    loader = CopyLoader(conn, "fact_violation", COLUMNS)
+    locs   = LocationResolver(conn)
 
     with BatchTracker(SOURCE, str(CSV_PATH)) as batch:
         total = 0
         skipped = 0
-        buf: list[tuple] = []
+        pending: list[tuple] = []   # (parsed, lat, lon, fact values)
 
         with open(CSV_PATH, encoding="utf-8-sig", newline="") as fh:
             reader = csv.DictReader(fh)
@@ -67,13 +78,11 @@ def run():
                         street_type=row.get("STREET TYPE", ""),
                     )
 
-                    loc_sk = upsert_location(conn, parsed, lat, lon)
-                    if loc_sk is None:
+                    if not parsed.full_address_standardized:
                         skipped += 1
                         continue
 
-                    buf.append((
-                        loc_sk,
+                    pending.append((parsed, lat, lon, (
                         row.get("ID"),
                         _parse_date(row.get("VIOLATION DATE", "")),
                         _parse_date(row.get("VIOLATION LAST MODIFIED DATE", "")),
@@ -89,51 +98,25 @@ def run():
                         row.get("DEPARTMENT BUREAU"),
                         SOURCE,
                         batch.batch_id,
-                    ))
+                    )))
 
-                    if len(buf) >= BATCH_SZ:
-                        _flush(conn, buf)
-                        total += len(buf)
-                        buf.clear()
+                    if len(pending) >= BATCH_SZ:
+                        total += loader.load(locs.attach(pending))
+                        pending.clear()
                         log.info("Violations: %d loaded …", total)
 
                 except Exception as exc:
                     log.warning("Row skipped: %s", exc)
                     skipped += 1
 
-            if buf:
-                _flush(conn, buf)
-                total += len(buf)
+            if pending:
+                total += loader.load(locs.attach(pending))
 
         conn.close()
         batch.complete(total)
         log.info("Violations complete. Loaded=%d  Skipped=%d", total, skipped)
-
-
-def _flush(conn, rows: list[tuple]):
-    with conn.cursor() as cur:
-        psycopg2_extras_execute_values(cur, rows)
-    conn.commit()
-
-
-def psycopg2_extras_execute_values(cur, rows):
-    import psycopg2.extras
-    psycopg2.extras.execute_values(
-        cur,
-        """
-        INSERT INTO fact_violation
-            (location_sk, source_id,
-             violation_date, violation_last_modified,
-             violation_code, violation_status, violation_status_date,
-             violation_description, violation_ordinance, inspector_comments,
-             inspection_number, inspection_status, inspection_category,
-             department_bureau, source_dataset, ingestion_batch_id)
-        VALUES %s
-        ON CONFLICT DO NOTHING
-        """,
-        rows,
-        page_size=1000,
-    )
+        loader.log_throughput("Violations")
+        std.log_cache_stats("Violations")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,145 @@
+"""
+CIVITAS ETL – Streaming Socrata (SODA) page iterator.
+
+iter_rows() yields dataset rows one at a time, page by page, instead of
+accumulating the whole download in memory. While the caller works through
+page N (parsing addresses, flushing to the DB), page N+1 is fetched on a
+background thread, so network and insert time overlap. At most two pages
+are held at once, whatever the dataset size.
+
+Pages are requested by keyset rather than $offset: `$order=:id` with
+`$where=:id > '<last id seen>'`. Each request is an index seek on the
+server, and rows added or removed mid-download cannot shift later pages
+(no skipped or duplicated rows). A failed page is retried from the last
+seen id; if retries run out, SocrataDownloadError carries that id so the
+caller can resume with `after_id`.
+
+CSV endpoints (*.csv) are parsed with csv.DictReader, everything else as a
+JSON array; either way rows are plain dicts of strings that include `:id`.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+import requests
+
+log = logging.getLogger(__name__)
+
+PAGE_SIZE   = 50_000
+MAX_RETRIES = 3
+RETRY_DELAY = 5.0   # seconds, doubled after each failed attempt
+
+
+class SocrataDownloadError(Exception):
+    """A page could not be fetched; `last_id` is where to resume from."""
+
+    def __init__(self, message: str, last_id: Optional[str]):
+        super().__init__(message)
+        self.last_id = last_id
+
+
+def _fetch_page(
+    session: requests.Session,
+    url: str,
+    params: dict,
+    headers: dict,
+    timeout: int,
+) -> list[dict]:
+    resp = session.get(url, params=params, headers=headers, timeout=timeout)
+    resp.raise_for_status()
+    if url.endswith(".csv"):
+        return list(csv.DictReader(io.StringIO(resp.text)))
+    return resp.json()
+
+
+def _with_id(select: Optional[str]) -> str:
+    """Make sure the :id system field is part of $select."""
+    if not select:
+        return ":id, *"
+    fields = {f.strip() for f in select.split(",")}
+    if ":id" in fields or ":*" in fields:
+        return select
+    return f":id, {select}"
+
+
+def _page_params(base: dict, where: Optional[str], after_id: Optional[str]) -> dict:
+    clauses = []
+    if where:
+        clauses.append(f"({where})")
+    if after_id is not None:
+        escaped = after_id.replace("'", "''")
+        clauses.append(f":id > '{escaped}'")
+    params = dict(base)
+    if clauses:
+        params["$where"] = " AND ".join(clauses)
+    return params
+
+
+def iter_rows(
+    url: str,
+    params: Optional[dict] = None,
+    token: Optional[str] = None,
+    page_size: int = PAGE_SIZE,
+    timeout: int = 60,
+    after_id: Optional[str] = None,
+    max_retries: int = MAX_RETRIES,
+    retry_delay: float = RETRY_DELAY,
+) -> Iterator[dict]:
+    """
+    Yield every row of a Socrata query, fetching `page_size` rows per request.
+
+    `params` carries the SoQL clauses ($select, $where); ordering and paging
+    are added here. `after_id` starts the download after that :id, e.g. to
+    resume from SocrataDownloadError.last_id. A short page ends the iteration.
+    """
+    params  = dict(params or {})
+    where   = params.pop("$where", None)
+    headers = {"X-App-Token": token} if token else {}
+    base    = {
+        **params,
+        "$select": _with_id(params.get("$select")),
+        "$order": ":id",
+        "$limit": page_size,
+    }
+
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=1) as pool:
+
+        def fetch(last_id: Optional[str]) -> list[dict]:
+            page_params = _page_params(base, where, last_id)
+            delay = retry_delay
+            for attempt in range(max_retries + 1):
+                try:
+                    return _fetch_page(session, url, page_params, headers, timeout)
+                except (requests.RequestException, ValueError) as exc:
+                    if attempt == max_retries:
+                        raise SocrataDownloadError(
+                            f"{url}: page after :id {last_id!r} failed: {exc}", last_id,
+                        ) from exc
+                    log.warning(
+                        "  page after :id %r failed (%s); retry %d/%d in %.0fs",
+                        last_id, exc, attempt + 1, max_retries, delay,
+                    )
+                    time.sleep(delay)
+                    delay *= 2
+
+        pending = pool.submit(fetch, after_id)
+        fetched = 0
+        while pending is not None:
+            page = pending.result()
+            fetched += len(page)
+            log.info("  fetched %d rows (total=%d)", len(page), fetched)
+
+            # Prefetch the next page while the caller consumes this one
+            if len(page) >= page_size:
+                pending = pool.submit(fetch, page[-1][":id"])
+            else:
+                pending = None
+
+            yield from page
+            del page
@@ -6,7 +6,9 @@ import pytest
 from contextlib import asynccontextmanager
 from unittest.mock import patch
 
-from backend.app.services.address import _normalize_pin, _build_result, resolve_address
+from backend.app.services.address import (
+    _normalize_pin, _build_result, resolve_address, resolve_addresses,
+)
 
 
 class TestNormalizePin:
@@ -64,22 +66,37 @@ class TestBuildResult:
         assert result["parcel_id"] is None
 
 
-# ── Helper for sequential fetchrow returns ──────────────────────────────────
+# ── Helper for scripted tier results ────────────────────────────────────────
 
 class SequentialConnection:
-    """FakeConnection that returns different values on successive fetchrow calls."""
+    """
+    FakeConnection for resolve_address's ranked tier query. `returns` are
+    the results of the tiers the query enables (non-NULL parameters), in
+    tier order; like ORDER BY tier LIMIT 1, the first non-None one wins.
+    """
+
+    # (match_confidence, parameter positions that must all be set)
+    TIERS = [
+        ("EXACT_PIN", (0,)),
+        ("EXACT_ADDRESS", (1,)),
+        ("EXACT_ADDRESS", (2,)),
+        ("COMPONENT_MATCH", (3, 5)),
+        ("STREET_ZIP", (3, 5, 7)),
+    ]
 
     def __init__(self, returns):
         self._returns = list(returns)
-        self._call_idx = 0
+        self.calls = []
 
     async def fetchrow(self, query, *args):
-        if self._call_idx < len(self._returns):
-            val = self._returns[self._call_idx]
-        else:
-            val = None
-        self._call_idx += 1
-        return val
+        self.calls.append(args)
+        returns = iter(self._returns)
+        for confidence, required in self.TIERS:
+            if all(args[i] is not None for i in required):
+                row = next(returns, None)
+                if row is not None:
+                    return {**row, "match_confidence": confidence}
+        return None
 
     async def fetch(self, query, *args):
         return []
@@ -157,3 +174,147 @@ class TestResolveAddressTier2:
         assert result["resolved"] is True
         assert result["location_sk"] == 77
         assert result["match_confidence"] == "COMPONENT_MATCH"
+
+    @pytest.mark.asyncio
+    async def test_tier3_street_zip_match(self):
+        """Tier 3 fires when only house number, street name and zip agree."""
+        row = _make_loc_row(location_sk=55)
+        conn = SequentialConnection([None, None, None, row])
+        with _patch_conn(conn):
+            result = await resolve_address("3500 N HOYNE AVE, CHICAGO IL 60618")
+        assert result["location_sk"] == 55
+        assert result["match_confidence"] == "STREET_ZIP"
+
+    @pytest.mark.asyncio
+    async def test_all_tiers_in_one_round_trip(self):
+        """A clean miss costs one query, with the PIN and parsed forms as parameters."""
+        conn = SequentialConnection([])
+        with _patch_conn(conn):
+            result = await resolve_address("3500 N HOYNE AVE, CHICAGO IL 60618",
+                                           pin="12-34-567-890-1234")
+        assert result["resolved"] is False
+        assert result["warning"].startswith("Address match uncertain")
+        [args] = conn.calls
+        assert args[0] == "12345678901234"
+        assert args[1] == "3500 N HOYNE AVE"
+        assert args[3:8] == ("3500", "N", "HOYNE", "AVE", "60618")
+
+
+class TestResolveAddressPin:
+
+    @pytest.mark.asyncio
+    async def test_pin_wins_over_address_tiers(self):
+        pin_row = _make_loc_row(location_sk=5, parcel_id="12345678901234")
+        conn = SequentialConnection([pin_row, _make_loc_row(location_sk=6)])
+        with _patch_conn(conn):
+            result = await resolve_address("3500 N HOYNE AVE", pin="12345678901234")
+        assert result["location_sk"] == 5
+        assert result["match_confidence"] == "EXACT_PIN"
+        assert result["parcel_id"] == "12345678901234"
+
+    @pytest.mark.asyncio
+    async def test_unparseable_address_still_matches_pin(self):
+        conn = SequentialConnection([_make_loc_row(parcel_id="12345678901234")])
+        with _patch_conn(conn):
+            result = await resolve_address("", pin="12345678901234")
+        assert result["match_confidence"] == "EXACT_PIN"
+        assert conn.calls[0][1:] == (None,) * 7
+
+    @pytest.mark.asyncio
+    async def test_unparseable_address_without_pin_skips_query(self):
+        conn = SequentialConnection([])
+        with _patch_conn(conn):
+            result = await resolve_address("")
+        assert result["warning"].startswith("Address could not be parsed")
+        assert conn.calls == []
+
+
+# ── Bulk resolution ─────────────────────────────────────────────────────────
+
+class TierConnection:
+    """FakeConnection answering each tier query from a {tier: handler} map."""
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.calls = []
+
+    async def fetch(self, query, idxs, *columns):
+        tier = ("pin" if "dim_parcel p ON p.parcel_id" in query
+                else "street" if "normalize_street_key" in query
+                else "zip" if "l.zip          = u.zip" in query
+                else "component" if "u.street_type IS NULL" in query
+                else "exact")
+        self.calls.append((tier, list(idxs), [list(c) for c in columns]))
+        handler = self.handlers.get(tier)
+        return handler(idxs, *columns) if handler else []
+
+
+class TestResolveAddresses:
+
+    @pytest.mark.asyncio
+    async def test_results_in_input_order_with_tier_codes(self):
+        def street(idxs, streets, zips):
+            return [_make_loc_row(location_sk=10) | {"idx": i}
+                    for i, a in zip(idxs, streets) if a == "3500 N HOYNE AVE"]
+
+        def pin(idxs, pins):
+            return [_make_loc_row(location_sk=20, parcel_id=p) | {"idx": i}
+                    for i, p in zip(idxs, pins)]
+
+        conn = TierConnection({"street": street, "pin": pin})
+        with _patch_conn(conn):
+            results = await resolve_addresses(
+                ["1 W NOWHERE ST", "3500 N HOYNE AVE", "9 S ELSEWHERE AVE"],
+                [None, None, "12-34-567-890-1234"],
+            )
+
+        assert [r["match_confidence"] for r in results] == ["NO_MATCH", "EXACT_ADDRESS", "EXACT_PIN"]
+        assert [r["location_sk"] for r in results] == [None, 10, 20]
+        assert results[2]["parcel_id"] == "12345678901234"
+        assert results[0]["warning"].startswith("Address match uncertain")
+
+    @pytest.mark.asyncio
+    async def test_one_query_per_tier_for_the_whole_list(self):
+        conn = TierConnection({})
+        addresses = [f"{n} N HOYNE AVE, CHICAGO IL 60618" for n in range(100, 150)]
+        with _patch_conn(conn):
+            results = await resolve_addresses(addresses)
+
+        # No PINs: tiers 2a, 2b, 2c and 3, each once over all 50 inputs
+        assert [c[0] for c in conn.calls] == ["street", "exact", "component", "zip"]
+        assert all(len(c[1]) == 50 for c in conn.calls)
+        assert conn.calls[0][2][1][0] == "60618"   # zip breaks street-key ties
+        assert all(not r["resolved"] for r in results)
+
+    @pytest.mark.asyncio
+    async def test_later_tiers_only_see_unresolved_inputs(self):
+        def street(idxs, streets, zips):
+            return [_make_loc_row() | {"idx": idxs[0]}]
+
+        conn = TierConnection({"street": street})
+        with _patch_conn(conn):
+            await resolve_addresses(["3500 N HOYNE AVE", "3600 N HOYNE AVE"])
+
+        tiers = {c[0]: c[1] for c in conn.calls}
+        assert tiers["component"] == [1]
+
+    @pytest.mark.asyncio
+    async def test_repeated_inputs_resolve_once(self):
+        conn = TierConnection({"street": lambda idxs, s, z: [_make_loc_row() | {"idx": idxs[0]}]})
+        with _patch_conn(conn):
+            results = await resolve_addresses(["3500 N HOYNE AVE", " 3500 N HOYNE AVE "])
+
+        assert conn.calls[0][1] == [0]
+        assert [r["location_sk"] for r in results] == [1, 1]
+        results[0]["location_sk"] = 5
+        assert results[1]["location_sk"] == 1  # independent copies
+
+    @pytest.mark.asyncio
+    async def test_unparseable_input(self):
+        conn = TierConnection({})
+        with _patch_conn(conn):
+            [result] = await resolve_addresses([""])
+
+        assert result["resolved"] is False
+        assert result["warning"].startswith("Address could not be parsed")
+        assert conn.calls == []
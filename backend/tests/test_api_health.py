@@ -25,3 +25,64 @@ async def test_health_ok(client):
     data = resp.json()
     assert data["status"] == "ok"
     assert data["db_connected"] is True
+
+
+@pytest.mark.asyncio
+async def test_cache_stats(client):
+    resp = await client.get("/api/v1/admin/cache-stats")
+
+    assert resp.status_code == 200
+    stats = resp.json()["address"]
+    assert {"hits", "misses", "evictions", "size", "hit_rate"} <= stats.keys()
+
+
+class _RefreshConnection(FakeConnection):
+    def __init__(self):
+        super().__init__(execute_return="REFRESH MATERIALIZED VIEW")
+        self.queries: list[tuple] = []
+
+    async def fetchrow(self, query, *args):
+        self.queries.append((query, args))
+        if "refresh_report_snapshots" in query:
+            return {"snapshots_built": 12, "snapshots_removed": 1}
+        return {"refresh_id": 7, "mode": "incremental", "rows_recomputed": 40}
+
+    async def execute(self, query, *args):
+        self.queries.append((query, args))
+        return self.execute_return
+
+    async def fetchval(self, query, *args):
+        self.queries.append((query, args))
+        return '{"generation" : 7}'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("snapshots_enabled", [True, False])
+async def test_refresh_matviews_runs_the_refresh_scores_sequence(client, snapshots_enabled):
+    conn = _RefreshConnection()
+
+    @asynccontextmanager
+    async def _get_conn():
+        yield conn
+
+    with patch("backend.app.database.get_conn", _get_conn), \
+         patch("backend.app.main.app_settings.report_snapshots_enabled", snapshots_enabled), \
+         patch("backend.app.main.app_settings.report_snapshot_top_n", 500), \
+         patch("backend.app.main.app_settings.report_snapshot_recent_days", 7):
+        resp = await client.post("/api/v1/admin/refresh-matviews")
+
+    assert resp.status_code == 200
+    steps = [q.split("(")[0].split()[-1] for q, _ in conn.queries]
+    expected = ["refresh_property_summary", "view_community_area_summary"]
+    if snapshots_enabled:
+        expected.append("refresh_report_snapshots")
+        assert conn.queries[2][1] == (500, 7)
+    expected.append("notify_data_refreshed")
+    assert steps == expected
+    assert conn.queries[-1][1] == (7, "civitas_data_refreshed")
+
+    data = resp.json()
+    assert (data["refresh_id"], data["rows_recomputed"]) == (7, 40)
+    assert data["report_snapshots"] == (
+        {"snapshots_built": 12, "snapshots_removed": 1} if snapshots_enabled else None
+    )
@@ -68,7 +68,14 @@ async def test_autocomplete(client):
         {"location_sk": 1, "full_address_standardized": "100 N STATE ST 60602"},
         {"location_sk": 2, "full_address_standardized": "101 N STATE ST 60602"},
     ]
-    conn = FakeConnection(fetch_return=rows)
+    queries = []
+
+    class _Conn(FakeConnection):
+        async def fetch(self, query, *args):
+            queries.append((query, args))
+            return rows
+
+    conn = _Conn()
 
     @asynccontextmanager
     async def _get_conn():
@@ -81,6 +88,72 @@ async def test_autocomplete(client):
     data = resp.json()
     assert len(data) == 2
     assert data[0]["full_address"] == "100 N STATE ST 60602"
+    [(query, args)] = queries
+    assert "street_key ~>=~" in query     # prefix range on the indexed key
+    assert args == ("100", 10, "N")
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_does_not_fold_the_word_being_typed(client):
+    queries = []
+
+    class _Conn(FakeConnection):
+        async def fetch(self, query, *args):
+            queries.append(args)
+            return []
+
+    @asynccontextmanager
+    async def _get_conn():
+        yield _Conn()
+
+    with patch("backend.app.routers.property.get_conn", _get_conn):
+        for q in ("5400 S BL", "3000 n av", "5400 S BL ", "500 W MADISON ST, CHI"):
+            resp = await client.get("/api/v1/property/autocomplete", params={"q": q})
+            assert resp.status_code == 200
+
+    # (complete words, folded in SQL; word being typed, kept as typed)
+    assert [(a[0], a[2]) for a in queries] == [
+        ("5400 S", "BL"),                    # BLACKSTONE, not only BLVD
+        ("3000 n", "AV"),                    # AVONDALE, not only AVE
+        ("5400 S BL ", ""),                  # trailing space: BL is complete
+        ("500 W MADISON ST", ""),            # city suffix dropped
+    ]
+
+
+# ── Bulk scores ─────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_scores_bulk(client):
+    scores = {
+        5: {"raw_score": 30, "activity_level": "ACTIVE", "flag_count": 1, "triggered_flags": ["X"]},
+        9: {"raw_score": 0, "activity_level": "QUIET", "flag_count": 0, "triggered_flags": []},
+    }
+    flags = {
+        5: [{"flag_code": "X", "category": "A", "description": "Open violations",
+             "severity_score": 30, "supporting_count": 2, "action_group": "Review Recommended"}],
+        9: [],
+    }
+
+    with patch(
+        "backend.app.routers.property.rule_engine.get_scores_and_flags",
+        new_callable=AsyncMock,
+        return_value=(scores, flags),
+    ) as bulk:
+        resp = await client.post("/api/v1/property/scores", json={"location_sks": [5, 9]})
+
+    assert resp.status_code == 200
+    bulk.assert_awaited_once_with([5, 9])
+    data = resp.json()
+    assert [d["location_sk"] for d in data] == [5, 9]
+    assert data[0]["activity_score"] == 30
+    assert data[0]["flags"][0]["flag_code"] == "X"
+    assert data[1]["flags"] == []
+
+
+@pytest.mark.asyncio
+async def test_scores_bulk_rejects_empty_list(client):
+    resp = await client.post("/api/v1/property/scores", json={"location_sks": []})
+    assert resp.status_code == 422
 
 
 # ── Assessment history ──────────────────────────────────────────────────────
@@ -7,7 +7,7 @@ from __future__ import annotations
 import io
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import UUID
 
 
@@ -26,22 +26,29 @@ def upload_form(csv_bytes: bytes, filename: str = "test.csv"):
     return {"file": (filename, io.BytesIO(csv_bytes), "text/csv")}
 
 
-# ── Upload Tests ─────────────────────────────────────────────────────────────
+def _patch_batch_conn(conn):
+    @asynccontextmanager
+    async def _gc():
+        yield conn
 
-async def test_upload_valid_csv(client):
-    csv = make_csv(["123 N MAIN ST", "456 S OAK AVE"])
+    return patch("backend.app.services.batch.get_conn", _gc)
 
-    with patch("backend.app.routers.batch.get_conn") as mock_gc:
-        conn = AsyncMock()
-        conn.fetchrow = AsyncMock(return_value={"batch_id": UUID(MOCK_BATCH_ID)})
-        conn.execute = AsyncMock()
 
-        @asynccontextmanager
-        async def _gc():
-            yield conn
+# ── Upload Tests ─────────────────────────────────────────────────────────────
 
-        mock_gc.side_effect = _gc
+def _upload_conn():
+    conn = AsyncMock()
+    conn.fetchval = AsyncMock(return_value=UUID(MOCK_BATCH_ID))
+    conn.copy_records_to_table = AsyncMock()
+    conn.transaction = MagicMock(return_value=AsyncMock())
+    return conn
+
+
+async def test_upload_valid_csv(client):
+    csv = make_csv(["123 N MAIN ST", "456 S OAK AVE"])
+    conn = _upload_conn()
 
+    with _patch_batch_conn(conn):
         resp = await client.post(
             "/api/v1/batch/upload",
             files={"file": ("test.csv", io.BytesIO(csv), "text/csv")},
@@ -51,6 +58,37 @@ async def test_upload_valid_csv(client):
     data = resp.json()
     assert data["batch_id"] == MOCK_BATCH_ID
     assert data["total_count"] == 2
+    conn.transaction.assert_called_once()
+    conn.copy_records_to_table.assert_awaited_once()
+
+
+async def test_upload_dedupes_addresses_and_copies_once(client):
+    csv = make_csv(["123 N MAIN ST", "456 S OAK AVE", " 123  n main st", "", "789 W ELM ST"])
+    conn = _upload_conn()
+
+    with _patch_batch_conn(conn):
+        resp = await client.post(
+            "/api/v1/batch/upload",
+            files={"file": ("test.csv", io.BytesIO(csv), "text/csv")},
+        )
+
+    assert resp.status_code == 200
+    assert (resp.json()["total_count"], resp.json()["duplicate_count"]) == (3, 1)
+    assert conn.fetchval.await_args.args[3] == 3
+    kwargs = conn.copy_records_to_table.await_args.kwargs
+    assert [r[1:] for r in kwargs["records"]] == [
+        (0, "123 N MAIN ST"), (1, "456 S OAK AVE"), (2, "789 W ELM ST"),
+    ]
+
+
+async def test_upload_rejects_non_utf8(client):
+    resp = await client.post(
+        "/api/v1/batch/upload",
+        files={"file": ("test.csv", io.BytesIO(b"address\n12 \xff ST\n"), "text/csv")},
+    )
+
+    assert resp.status_code == 400
+    assert "utf-8" in resp.json()["detail"].lower()
 
 
 async def test_upload_missing_address_column(client):
@@ -81,7 +119,8 @@ async def test_upload_exceeds_row_limit(client):
     rows = [f"{i} N TEST ST" for i in range(51)]
     csv = make_csv(rows)
 
-    with patch("backend.app.routers.batch.get_conn") as mock_gc:
+    with patch("backend.app.routers.batch.get_conn") as mock_gc, \
+         patch("backend.app.routers.batch.settings.batch_max_rows", 50):
         conn = AsyncMock()
 
         @asynccontextmanager
@@ -221,3 +260,294 @@ async def test_my_batches(client):
     data = resp.json()
     assert len(data) == 1
     assert data[0]["batch_id"] == MOCK_BATCH_ID
+
+
+# ── Batch processing (services/batch.py) ─────────────────────────────────────
+
+def _batch_items(n: int, attempts: int = 1) -> list[dict]:
+    return [
+        {"item_id": 100 + i, "batch_id": UUID(MOCK_BATCH_ID), "row_index": i,
+         "input_address": f"{i} N TEST ST", "attempts": attempts, "user_id": "user"}
+        for i in range(n)
+    ]
+
+
+def _flushed(conn) -> dict[int, tuple]:
+    """item_id -> (status, error_message, retry_in) over every StatusWriter flush."""
+    out = {}
+    for call in conn.execute.await_args_list:
+        if "WITH done AS" in call.args[0]:
+            ids, statuses, _, _, errors, retries = call.args[1:7]
+            out.update({i: (s, e, r) for i, s, e, r in zip(ids, statuses, errors, retries)})
+    return out
+
+
+async def test_run_worker_bounded_concurrency_and_outcomes():
+    import asyncio
+
+    import asyncpg
+
+    from backend.app.services.batch import run_worker
+
+    queue = _batch_items(10)
+    stop = asyncio.Event()
+    conn = AsyncMock()
+    in_flight = 0
+    peak = 0
+
+    async def fake_fetch(sql, worker_id, limit, lease):
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        claimed = queue[:limit]
+        del queue[:limit]
+        if not claimed and not in_flight:
+            stop.set()
+        return claimed
+
+    conn.fetch = fake_fetch
+    resolve_calls = []
+
+    async def fake_resolve(addresses):
+        resolve_calls.append(len(addresses))
+        return [{"resolved": not a.startswith("3 "), "location_sk": 7,
+                 "full_address": a, "warning": "no match"} for a in addresses]
+
+    async def fake_report(location_sk, address, user_id, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if address.startswith("5 "):
+            raise asyncpg.PostgresConnectionError("connection reset")
+        return {"report_id": f"r-{address}"}
+
+    with _patch_batch_conn(conn), \
+         patch("backend.app.services.batch.resolve_addresses", fake_resolve), \
+         patch("backend.app.services.batch.generate_single_report", fake_report), \
+         patch("backend.app.services.batch.settings.batch_concurrency", 3), \
+         patch("backend.app.services.batch.settings.batch_poll_seconds", 0.01):
+        await asyncio.wait_for(run_worker("host:1", stop), timeout=5)
+
+    assert peak == 3
+    # Addresses resolve per claimed group (two rounds of capacity), not per item
+    assert resolve_calls == [6, 4]
+    outcomes = _flushed(conn)
+    assert len(outcomes) == 10
+    assert outcomes[103] == ("failed", "no match", None)           # permanent
+    assert outcomes[105][0] == "pending" and outcomes[105][2] > 0  # transient → retry
+    assert sum(1 for o in outcomes.values() if o[0] == "completed") == 8
+
+    # Outcomes are batched: far fewer statements than the 10 items
+    flushes = [c for c in conn.execute.await_args_list if "WITH done AS" in c.args[0]]
+    assert 1 <= len(flushes) < 5
+    assert all(c.args[7] == "host:1" for c in flushes)
+
+
+async def test_run_worker_fails_item_after_max_attempts():
+    import asyncio
+
+    from backend.app.services.batch import run_worker
+
+    queue = _batch_items(1, attempts=4)
+    stop = asyncio.Event()
+    conn = AsyncMock()
+
+    async def fake_fetch(sql, *args):
+        if not queue:
+            stop.set()
+        return [queue.pop()] if queue else []
+
+    conn.fetch = fake_fetch
+    report = AsyncMock()
+
+    with _patch_batch_conn(conn), \
+         patch("backend.app.services.batch.generate_single_report", report), \
+         patch("backend.app.services.batch.settings.batch_max_attempts", 3):
+        await asyncio.wait_for(run_worker("host:1", stop), timeout=5)
+
+    report.assert_not_awaited()
+    assert _flushed(conn)[100][0] == "failed"
+
+
+async def test_run_worker_survives_unexpected_error_and_releases_claim():
+    import asyncio
+
+    from backend.app.services.batch import run_worker
+
+    queue = _batch_items(4)
+    stop = asyncio.Event()
+    conn = AsyncMock()
+
+    async def fake_fetch(sql, worker_id, limit, lease):
+        claimed = queue[:limit]
+        del queue[:limit]
+        if not claimed:
+            stop.set()
+        return claimed
+
+    conn.fetch = fake_fetch
+    resolve_calls = 0
+
+    async def fake_resolve(addresses):
+        nonlocal resolve_calls
+        resolve_calls += 1
+        if resolve_calls == 1:
+            raise RuntimeError("geocoder bug")
+        return [{"resolved": True, "location_sk": 7, "full_address": a} for a in addresses]
+
+    report = AsyncMock(return_value={"report_id": "r"})
+
+    with _patch_batch_conn(conn), \
+         patch("backend.app.services.batch.resolve_addresses", fake_resolve), \
+         patch("backend.app.services.batch.generate_single_report", report), \
+         patch("backend.app.services.batch.settings.batch_concurrency", 1), \
+         patch("backend.app.services.batch.settings.batch_poll_seconds", 0.01):
+        await asyncio.wait_for(run_worker("host:1", stop), timeout=5)
+
+    # The first claim is handed back straight away rather than left leased
+    releases = [c.args[1] for c in conn.execute.await_args_list
+                if "SET status = 'pending'" in c.args[0]]
+    assert releases[0] == [100, 101]
+    # ...and the worker kept going with the rest of the queue
+    assert _flushed(conn) == {102: ("completed", None, None), 103: ("completed", None, None)}
+
+
+async def test_status_writer_keeps_latest_status_per_item():
+    from backend.app.services.batch import StatusWriter
+
+    conn = AsyncMock()
+    writer = StatusWriter("host:1")
+    writer.add(1, "pending", error_message="timeout", retry_in=30.0)
+    writer.add(2, "failed", error_message="no match")
+    writer.add(1, "completed", 7, "11111111-1111-1111-1111-111111111111")
+    with _patch_batch_conn(conn):
+        await writer.flush()
+        await writer.flush()
+
+    conn.execute.assert_awaited_once()
+    args = conn.execute.await_args.args
+    assert args[1] == [1, 2]
+    assert args[2] == ["completed", "failed"]
+    assert args[3] == [7, None]
+    assert args[6] == [None, None]
+    assert args[7] == "host:1"
+
+
+def _tail_conn(polls, summary_rows=()):
+    """Connection serving (batch_row, item_rows) per poll, then the summary rows."""
+    conn = AsyncMock()
+    conn.fetchrow = AsyncMock(side_effect=[p[0] for p in polls])
+    item_rows = iter(p[1] for p in polls)
+
+    async def fetch(sql, *args):
+        return list(summary_rows) if "GROUP BY" in sql else next(item_rows)
+
+    conn.fetch = AsyncMock(side_effect=fetch)
+    return conn
+
+
+def _batch_row(status, duration_s=None, completed=0, failed=0):
+    return {"status": status, "total_count": 2, "completed_count": completed,
+            "failed_count": failed, "duration_s": duration_s}
+
+
+def _item_row(item_id, status, seconds=0, **extra):
+    return {"item_id": item_id, "row_index": item_id, "status": status,
+            "updated_at": datetime(2025, 6, 1, 0, 0, seconds, tzinfo=timezone.utc),
+            "report_id": None, "error_message": None, "risk_score": None,
+            "risk_tier": None, "flag_count": None, **extra}
+
+
+async def test_tail_batch_streams_each_transition_once():
+    from backend.app.services.batch import tail_batch
+
+    polls = [
+        (_batch_row("processing"), [_item_row(0, "processing"), _item_row(1, "processing")]),
+        (_batch_row("completed", 12.34, completed=1, failed=1),
+         [_item_row(0, "completed", 1, report_id=UUID(MOCK_BATCH_ID), risk_score=40,
+                    risk_tier="ELEVATED", flag_count=2),
+          _item_row(1, "processing"),
+          _item_row(1, "failed", 2, error_message="no match")]),
+    ]
+    conn = _tail_conn(polls, [{"risk_tier": "ELEVATED", "n": 1, "score_sum": 40, "scored": 1}])
+
+    with _patch_batch_conn(conn), \
+         patch("backend.app.services.batch.settings.batch_poll_seconds", 0):
+        pairs = [p async for p in tail_batch(MOCK_BATCH_ID)]
+
+    ids = [p[0] for p in pairs]
+    events = [p[1] for p in pairs]
+    assert [e["type"] for e in events] == ["processing", "processing", "completed", "failed", "done"]
+    assert events[2]["activity_level"] == "ACTIVE"
+    assert events[2]["report_id"] == MOCK_BATCH_ID
+    assert ids == sorted(ids, key=int) and ids[-1] == ids[-2]
+    done = events[-1]
+    assert (done["completed"], done["failed"], done["total"]) == (1, 1, 2)
+    assert done["avg_activity_score"] == 40.0
+    assert done["level_distribution"] == {"ACTIVE": 1}
+    assert done["duration_s"] == 12.3
+
+
+async def test_tail_batch_resumes_from_last_event_id():
+    from backend.app.services.batch import tail_batch
+
+    polls = [(_batch_row("completed", 5, completed=2), [_item_row(1, "completed", 30)])]
+    conn = _tail_conn(polls)
+    cursor = datetime(2025, 6, 1, 0, 0, 20, tzinfo=timezone.utc)
+    last_event_id = str(int(cursor.timestamp() * 1_000_000))
+
+    with _patch_batch_conn(conn):
+        pairs = [p async for p in tail_batch(MOCK_BATCH_ID, last_event_id)]
+
+    # Only items changed after the cursor are read again
+    item_query = next(c for c in conn.fetch.await_args_list if "GROUP BY" not in c.args[0])
+    assert item_query.args[2] == cursor
+    assert [e["type"] for _, e in pairs] == ["completed", "done"]
+    assert pairs[-1][1]["completed"] == 2
+
+
+async def test_tail_batch_ignores_bad_last_event_id_and_sends_heartbeats():
+    from backend.app.services.batch import tail_batch
+
+    polls = [(_batch_row("processing"), []), (_batch_row("completed", 1), [])]
+    conn = _tail_conn(polls)
+
+    with _patch_batch_conn(conn), \
+         patch("backend.app.services.batch.settings.batch_poll_seconds", 0), \
+         patch("backend.app.services.batch.settings.batch_heartbeat_seconds", 0):
+        pairs = [p async for p in tail_batch(MOCK_BATCH_ID, "not-a-cursor")]
+
+    assert conn.fetch.await_args_list[0].args[2] is None
+    assert pairs[0] == (None, None)
+    assert pairs[-1][0] is None and pairs[-1][1]["type"] == "done"
+
+
+async def test_stream_formats_events_and_forwards_last_event_id(client):
+    seen_ids = []
+
+    async def fake_tail(batch_id, last_event_id=None):
+        seen_ids.append(last_event_id)
+        yield None, None
+        yield "1700000000000000", {"type": "completed", "row_index": 0}
+        yield "1700000000000000", {"type": "done"}
+
+    conn = AsyncMock()
+    conn.fetchrow = AsyncMock(return_value={"batch_id": UUID(MOCK_BATCH_ID)})
+
+    @asynccontextmanager
+    async def _gc():
+        yield conn
+
+    with patch("backend.app.routers.batch.decode_token", return_value={"type": "access", "sub": MOCK_BATCH_ID}), \
+         patch("backend.app.routers.batch.get_user_by_id", AsyncMock(return_value={"user_id": "u", "is_active": True})), \
+         patch("backend.app.routers.batch.get_conn", _gc), \
+         patch("backend.app.routers.batch.tail_batch", fake_tail):
+        resp = await client.get(
+            f"/api/v1/batch/{MOCK_BATCH_ID}/stream?token=t",
+            headers={"Last-Event-ID": "1690000000000000"},
+        )
+
+    assert resp.status_code == 200
+    assert seen_ids == ["1690000000000000"]
+    assert resp.text.startswith(": heartbeat\n\n")
+    assert 'id: 1700000000000000\ndata: {"type": "completed", "row_index": 0}\n\n' in resp.text
@@ -0,0 +1,37 @@
+"""
+Tests for backend.app.services.cache_events — civitas_data_refreshed handling.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from backend.app.services import socrata_proxy
+from backend.app.services.cache_events import handle_data_refreshed
+from backend.app.services.report_cache import MemoryReportCache
+
+
+def test_retires_reports_and_refreshed_dataset_freshness():
+    cache = MemoryReportCache(max_entries=10, max_bytes=10_000, ttl_seconds=60)
+    cache.set(1, 2, {"activity_score": 1})
+    cache.set(2, 3, {"activity_score": 2})
+    socrata_proxy._cache.clear()
+    socrata_proxy._cache_set("freshness:tax_annual", {})
+    socrata_proxy._cache_set("freshness:permits", {})
+
+    with patch("backend.app.services.report._report_cache", cache):
+        result = handle_data_refreshed(
+            '{"generation": 3, "mode": "incremental", "datasets": ["cook_county_tax_liens"]}'
+        )
+
+    assert result == {"generation": 3, "reports_retired": 1, "socrata_entries_dropped": 1}
+    assert cache.get(2, 3) is not None
+    assert "freshness:permits" in socrata_proxy._cache
+    socrata_proxy._cache.clear()
+
+
+def test_malformed_payload_ignored():
+    with patch("backend.app.services.cache_events.retire_report_cache") as retire:
+        assert handle_data_refreshed("not json") == {}
+        assert handle_data_refreshed('{"datasets": []}') == {}
+    retire.assert_not_called()
@@ -0,0 +1,350 @@
+"""
+Tests for backend.ingestion.base — ETL helpers (no database required).
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from unittest.mock import patch
+
+from backend.ingestion.base import (
+    AddressStandardizer,
+    CopyLoader,
+    LocationResolver,
+    ParsedAddress,
+    _copy_value,
+    last_watermark,
+    new_parse_pool,
+    parse_stream,
+)
+
+
+# ── Fake psycopg2 connection ────────────────────────────────────────────────
+
+class FakeCursor:
+    def __init__(self, rowcount: int = 0, fetchall_return=None):
+        self.executed: list[str] = []
+        self.params: list = []
+        self.copied: list[tuple[str, str]] = []
+        self.rowcount = rowcount
+        self.fetchall_return = fetchall_return or []
+
+    def execute(self, query, params=None):
+        self.executed.append(query)
+        self.params.append(params)
+
+    def fetchall(self):
+        return self.fetchall_return
+
+    def copy_expert(self, sql, file):
+        self.copied.append((sql, file.read()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class FakeConn:
+    def __init__(self, cursor: FakeCursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+
+# ── _copy_value ─────────────────────────────────────────────────────────────
+
+class TestCopyValue:
+    def test_none_is_null_marker(self):
+        assert _copy_value(None) == r"\N"
+
+    def test_bools(self):
+        assert _copy_value(True) == "t"
+        assert _copy_value(False) == "f"
+
+    def test_dates_use_iso_format(self):
+        assert _copy_value(date(2025, 1, 2)) == "2025-01-02"
+        assert _copy_value(datetime(2025, 1, 2, 3, 4, 5)) == "2025-01-02T03:04:05"
+
+    def test_escapes_control_characters(self):
+        assert _copy_value("a\tb\nc\\d\re") == "a\\tb\\nc\\\\d\\re"
+
+    def test_numbers(self):
+        assert _copy_value(42) == "42"
+        assert _copy_value(1.5) == "1.5"
+
+
+# ── CopyLoader ──────────────────────────────────────────────────────────────
+
+class TestCopyLoader:
+    def test_load_copies_merges_and_commits(self):
+        cur = FakeCursor(rowcount=2)
+        conn = FakeConn(cur)
+        loader = CopyLoader(conn, "fact_311", ("location_sk", "source_id"))
+
+        merged = loader.load([(1, "SR-1"), (2, None)])
+
+        assert merged == 2
+        assert loader.rows_loaded == 2
+        assert conn.commits == 1
+
+        copy_sql, payload = cur.copied[0]
+        assert copy_sql == "COPY stage_fact_311 (location_sk, source_id) FROM STDIN"
+        assert payload == "1\tSR-1\n2\t\\N\n"
+
+        assert "CREATE TEMP TABLE IF NOT EXISTS stage_fact_311" in cur.executed[0]
+        assert "INSERT INTO fact_311 (location_sk, source_id)" in cur.executed[1]
+        assert "ON CONFLICT DO NOTHING" in cur.executed[1]
+        assert len(cur.executed) == 2       # no ingestion_batch_id → nothing tracked
+
+    def test_touched_locations_recorded_per_batch(self):
+        cur = FakeCursor(rowcount=1)
+        loader = CopyLoader(
+            FakeConn(cur), "fact_permit", ("location_sk", "ingestion_batch_id"),
+        )
+        loader.load([(1, 9)])
+
+        track_sql = cur.executed[2]
+        assert "INSERT INTO ingestion_batch_location" in track_sql
+        assert "FROM stage_fact_permit" in track_sql
+
+    def test_rows_loaded_accumulates(self):
+        cur = FakeCursor(rowcount=3)
+        loader = CopyLoader(FakeConn(cur), "fact_permit", ("location_sk",))
+        loader.load([(1,), (2,), (3,)])
+        loader.load([(4,), (5,), (6,)])
+        assert loader.rows_loaded == 6
+        assert loader.rows_per_second > 0
+
+    def test_replace_on_deletes_earlier_versions_first(self):
+        cur = FakeCursor(rowcount=1)
+        loader = CopyLoader(
+            FakeConn(cur), "fact_vacant_building",
+            ("source_id", "violation_number", "ingestion_batch_id"),
+            replace_on=("source_id", "violation_number"),
+        )
+        loader.load([("D1", "V1", 7)])
+
+        delete_sql = cur.executed[1]
+        assert "DELETE FROM fact_vacant_building t USING stage_fact_vacant_building s" in delete_sql
+        assert "t.source_id = s.source_id" in delete_sql
+        assert "t.violation_number IS NOT DISTINCT FROM s.violation_number" in delete_sql
+        assert "t.ingestion_batch_id IS DISTINCT FROM s.ingestion_batch_id" in delete_sql
+        assert "INSERT INTO fact_vacant_building" in cur.executed[2]
+
+
+# ── Watermarks ──────────────────────────────────────────────────────────────
+
+class TestLastWatermark:
+    def test_returns_latest_completed_watermark(self):
+        cur = FakeCursor()
+        cur.fetchone = lambda: ({"annual": "2025-01-01T00:00:00.000Z"},)
+        assert last_watermark(FakeConn(cur), "cook_county_tax_liens") == {
+            "annual": "2025-01-01T00:00:00.000Z",
+        }
+        assert "status = 'complete'" in cur.executed[0]
+        assert cur.params[0] == ("cook_county_tax_liens",)
+
+    def test_empty_when_no_prior_batch(self):
+        cur = FakeCursor()
+        cur.fetchone = lambda: None
+        assert last_watermark(FakeConn(cur), "vacant_building_violations") == {}
+
+
+# ── AddressStandardizer cache ───────────────────────────────────────────────
+
+class TestAddressCache:
+    def test_repeat_input_is_a_hit(self):
+        std = AddressStandardizer(cache_size=10)
+        first = std.parse(raw_address="1600 W Madison St")
+        second = std.parse(raw_address="  1600 W Madison St ")
+        assert second is first
+        assert std.cache_stats()["hits"] == 1
+        assert std.cache_stats()["misses"] == 1
+
+    def test_cached_result_matches_uncached(self):
+        cached = AddressStandardizer(cache_size=10)
+        uncached = AddressStandardizer(cache_size=0)
+        for _ in range(2):
+            assert cached.parse(
+                street_number="10", street_direction="north", street_name="state",
+                street_type="street",
+            ) == uncached.parse(
+                street_number="10", street_direction="north", street_name="state",
+                street_type="street",
+            )
+        assert uncached.cache_stats()["size"] == 0
+
+    def test_lru_evicts_least_recently_used(self):
+        std = AddressStandardizer(cache_size=2)
+        std.parse(raw_address="1 N State St")
+        std.parse(raw_address="2 N State St")
+        std.parse(raw_address="1 N State St")     # refresh entry 1
+        std.parse(raw_address="3 N State St")     # evicts entry 2
+        std.parse(raw_address="1 N State St")
+
+        stats = std.cache_stats()
+        assert stats["size"] == 2
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 2
+        assert stats["hit_rate"] == 0.4
+
+    def test_lookup_and_store_wait_for_the_lock(self):
+        # The API parses on the event loop while bulk resolution parses on a
+        # worker thread; an eviction must not land between get() and
+        # move_to_end() of the other's lookup
+        import threading
+
+        std = AddressStandardizer(cache_size=2)
+        for call in (
+            threading.Thread(target=std.store, args=(("1",), _parsed("1 N MAIN ST"))),
+            threading.Thread(target=std.lookup, args=(("1",),)),
+        ):
+            with std._lock:
+                call.start()
+                call.join(0.05)
+                assert call.is_alive()
+            call.join()
+        assert std.cache_stats()["hits"] == 1
+
+
+# ── parse_stream ────────────────────────────────────────────────────────────
+
+_ROWS = [
+    {"addr": "1600 W Madison St", "zip": "60612"},
+    {"addr": "", "zip": ""},
+    {"addr": "233 S Wacker Dr"},
+    {"addr": "1600 W Madison St", "zip": "60612"},
+    {"skip": True},
+] * 5
+
+
+def _fields(row):
+    if row.get("skip"):
+        return None
+    return {"raw_address": row.get("addr", ""), "zip_code": row.get("zip", "")}
+
+
+class TestParseStream:
+    def test_serial_skips_rows_without_fields(self):
+        out = list(parse_stream(_ROWS[:5], _fields, AddressStandardizer(), workers=0))
+        assert [row for row, _ in out] == _ROWS[:5]
+        assert out[0][1].full_address_standardized == "1600 W MADISON ST, CHICAGO IL 60612"
+        assert out[1][1].confidence == "FAILED"
+        assert out[4][1] is None
+
+    def test_parallel_matches_serial_in_order(self):
+        serial = list(parse_stream(_ROWS, _fields, AddressStandardizer(), workers=0))
+        std = AddressStandardizer()
+        parallel = list(parse_stream(_ROWS, _fields, std, workers=2, chunk_size=3))
+
+        assert parallel == serial
+        stats = std.cache_stats()
+        assert stats["hits"] + stats["misses"] == 20   # every non-skipped row
+        assert stats["size"] == 3
+
+    def test_address_repeated_in_a_later_chunk_is_parsed_once(self):
+        # Chunks of two: the repeats land in chunks queued while the first
+        # chunk's parse is still in flight
+        rows = [
+            {"addr": "1600 W MADISON ST", "zip": "60612"},
+            {"addr": "233 S WACKER DR", "zip": "60606"},
+            {"addr": "1600 W MADISON ST", "zip": "60612"},
+            {"addr": "875 N MICHIGAN AVE", "zip": "60611"},
+            {"addr": "233 S WACKER DR", "zip": "60606"},
+            {"addr": "1600 W MADISON ST", "zip": "60612"},
+        ]
+        serial_std = AddressStandardizer()
+        serial = list(parse_stream(rows, _fields, serial_std, workers=0))
+        std = AddressStandardizer()
+        parallel = list(parse_stream(rows, _fields, std, workers=2, chunk_size=2))
+
+        assert parallel == serial
+        assert std.misses == 3                      # one parse per distinct address
+        assert std.cache_stats() == serial_std.cache_stats()
+
+
+    def test_supplied_pool_is_reused_and_left_running(self):
+        std = AddressStandardizer()
+        with new_parse_pool(2) as pool:
+            first = list(parse_stream(_ROWS, _fields, std, workers=2, chunk_size=3, pool=pool))
+            rows = [{"addr": "875 N Michigan Ave"}]
+            second = list(parse_stream(rows, _fields, std, workers=2, pool=pool))
+            assert pool.submit(len, "abc").result() == 3   # still usable
+
+        assert first == list(parse_stream(_ROWS, _fields, AddressStandardizer(), workers=0))
+        assert second[0][1].full_address_standardized.startswith("875 N MICHIGAN AVE")
+
+
+# ── LocationResolver ────────────────────────────────────────────────────────
+
+def _parsed(addr: str) -> ParsedAddress:
+    return ParsedAddress(
+        house_number="1", street_direction="N", street_name="MAIN",
+        street_type="ST", unit=None, zip=None,
+        full_address_standardized=addr, confidence="HIGH",
+    )
+
+
+class TestLocationResolver:
+    def test_inserts_only_unseen_addresses_once(self):
+        cur = FakeCursor()
+        conn = FakeConn(cur)
+        resolver = LocationResolver(conn, seed=False)
+        resolver._keys["1 N MAIN ST"] = 10
+
+        with patch(
+            "backend.ingestion.base.psycopg2.extras.execute_values",
+            return_value=[("2 N MAIN ST", 20)],
+        ) as ev:
+            sks = resolver.resolve([
+                (_parsed("1 N MAIN ST"), None, None),
+                (_parsed("2 N MAIN ST"), 41.9, -87.6),
+                (_parsed("2 N MAIN ST"), 41.9, -87.6),
+                (_parsed(""), None, None),
+            ])
+
+        assert sks == [10, 20, 20, None]
+        ev.assert_called_once()
+        inserted = ev.call_args[0][2]
+        assert [r[0] for r in inserted] == ["2 N MAIN ST"]
+        assert inserted[0][-1] == "2 N MAIN ST"   # street_key source
+        assert "normalize_street_key(%s)" in ev.call_args.kwargs["template"]
+        assert cur.executed == []           # nothing needed a follow-up SELECT
+        assert conn.commits == 1
+
+    def test_conflicting_keys_fetched_in_one_select(self):
+        cur = FakeCursor(fetchall_return=[("3 N MAIN ST", 30)])
+        conn = FakeConn(cur)
+        resolver = LocationResolver(conn, seed=False)
+
+        with patch(
+            "backend.ingestion.base.psycopg2.extras.execute_values",
+            return_value=[],
+        ):
+            sks = resolver.resolve([(_parsed("3 N MAIN ST"), None, None)])
+
+        assert sks == [30]
+        assert len(cur.executed) == 1
+        assert cur.params[0] == (["3 N MAIN ST"],)
+
+    def test_cached_addresses_issue_no_sql(self):
+        conn = FakeConn(FakeCursor())
+        resolver = LocationResolver(conn, seed=False)
+        resolver._keys["1 N MAIN ST"] = 10
+
+        with patch("backend.ingestion.base.psycopg2.extras.execute_values") as ev:
+            rows = resolver.attach([
+                (_parsed("1 N MAIN ST"), None, None, ("SR-1", "OPEN")),
+                (_parsed(""), None, None, ("SR-2", "OPEN")),
+            ])
+
+        ev.assert_not_called()
+        assert conn.commits == 0
+        assert rows == [(10, "SR-1", "OPEN")]
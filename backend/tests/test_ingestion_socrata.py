@@ -0,0 +1,169 @@
+"""
+Tests for backend.ingestion.socrata — streaming, keyset-paged Socrata
+iterator, exercised against a local HTTP stand-in for the SODA API.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from backend.ingestion import socrata
+
+
+# ── Fake SODA server ────────────────────────────────────────────────────────
+
+class FakeSoda:
+    """
+    Serves `rows` (dicts that include ':id') with the subset of SoQL the
+    iterator uses: $select (ignored), $order=:id, $limit and a $where of the
+    form `[(<clause>) AND ]:id > '<id>'`. `<clause>` may only be `kind='x'`.
+    """
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.requests: list[dict] = []
+        self.fail_requests: set[int] = set()   # 1-based request numbers answered with 503
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/resource/abcd-1234"
+
+    def _handle(self, h: BaseHTTPRequestHandler):
+        url = urlparse(h.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.requests.append(params)
+
+        if len(self.requests) in self.fail_requests:
+            h.send_response(503)
+            h.end_headers()
+            return
+
+        rows = sorted(self.rows, key=lambda r: r[":id"])
+        where = params.get("$where", "")
+        m = re.search(r":id > '([^']*)'", where)
+        if m:
+            rows = [r for r in rows if r[":id"] > m.group(1)]
+        k = re.search(r"kind='([^']*)'", where)
+        if k:
+            rows = [r for r in rows if r["kind"] == k.group(1)]
+        rows = rows[: int(params["$limit"])]
+
+        if url.path.endswith(".csv"):
+            buf = io.StringIO()
+            writer = csv.DictWriter(buf, fieldnames=[":id", "kind", "n"])
+            writer.writeheader()
+            writer.writerows(rows)
+            body, ctype = buf.getvalue().encode(), "text/csv"
+        else:
+            body, ctype = json.dumps(rows).encode(), "application/json"
+
+        h.send_response(200)
+        h.send_header("Content-Type", ctype)
+        h.send_header("Content-Length", str(len(body)))
+        h.end_headers()
+        h.wfile.write(body)
+
+
+@pytest.fixture
+def soda():
+    rows = [
+        {":id": f"row-{i:03d}", "kind": "a" if i % 2 else "b", "n": str(i)}
+        for i in range(1, 12)
+    ]
+    fake = FakeSoda(rows)
+    fake.thread.start()
+    yield fake
+    fake.server.shutdown()
+    fake.server.server_close()
+
+
+# ── iter_rows ───────────────────────────────────────────────────────────────
+
+class TestIterRows:
+    def test_pages_by_id_keyset(self, soda):
+        rows = list(socrata.iter_rows(soda.base_url + ".json", page_size=4))
+
+        assert [r["n"] for r in rows] == [str(i) for i in range(1, 12)]
+        assert [r.get("$where") for r in soda.requests] == [
+            None, ":id > 'row-004'", ":id > 'row-008'",
+        ]
+        assert all(r["$order"] == ":id" and r["$limit"] == "4" for r in soda.requests)
+        assert all("$offset" not in r for r in soda.requests)
+        assert soda.requests[0]["$select"] == ":id, *"
+
+    def test_csv_and_caller_where_combined(self, soda):
+        rows = list(socrata.iter_rows(
+            soda.base_url + ".csv",
+            {"$select": "kind,n", "$where": "kind='a'"},
+            page_size=3,
+        ))
+
+        assert [r["n"] for r in rows] == ["1", "3", "5", "7", "9", "11"]
+        assert soda.requests[0]["$select"] == ":id, kind,n"
+        assert soda.requests[1]["$where"] == "(kind='a') AND :id > 'row-005'"
+
+    def test_rows_inserted_mid_download_are_not_duplicated(self, soda):
+        it = socrata.iter_rows(soda.base_url + ".json", page_size=4)
+        first = [next(it) for _ in range(4)]
+        # A new row sorting before the cursor would shift $offset paging by one
+        soda.rows.append({":id": "row-000", "kind": "a", "n": "0"})
+        rest = list(it)
+
+        ns = [r["n"] for r in first + rest]
+        assert ns == [str(i) for i in range(1, 12)]
+
+    def test_failed_page_retried_from_last_id(self, soda):
+        soda.fail_requests = {2}   # the page after row-005 fails once
+        rows = list(socrata.iter_rows(soda.base_url + ".json", page_size=5, retry_delay=0))
+
+        assert [r["n"] for r in rows] == [str(i) for i in range(1, 12)]
+        retried = [r.get("$where") for r in soda.requests]
+        assert retried.count(":id > 'row-005'") == 2
+
+    def test_exhausted_retries_report_resume_point(self, soda):
+        seen = []
+        soda.fail_requests = {2, 3}
+        it = socrata.iter_rows(
+            soda.base_url + ".json", page_size=5, max_retries=1, retry_delay=0,
+        )
+        with pytest.raises(socrata.SocrataDownloadError) as exc_info:
+            for row in it:
+                seen.append(row)
+
+        assert exc_info.value.last_id == "row-005"
+        resumed = list(socrata.iter_rows(
+            soda.base_url + ".json", page_size=5, after_id=exc_info.value.last_id,
+        ))
+        assert [r["n"] for r in seen + resumed] == [str(i) for i in range(1, 12)]
+
+    def test_next_page_prefetched_while_current_is_consumed(self, soda):
+        it = socrata.iter_rows(soda.base_url + ".json", page_size=6)
+        assert next(it)["n"] == "1"
+
+        deadline = time.monotonic() + 2
+        while len(soda.requests) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(soda.requests) == 2
+        assert len(list(it)) == 10
@@ -0,0 +1,47 @@
+"""
+Tests for backend.app.services.json_text — RawJSON passthrough serialization.
+"""
+
+from __future__ import annotations
+
+import json
+
+from backend.app.services.json_text import RawJSON, dumps, plain
+
+
+def _response_bytes(obj) -> str:
+    """What fastapi.responses.JSONResponse renders for `obj`."""
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+
+RECORDS = {
+    "violations": [{"violation_date": "2025-01-02", "violation_description": 'café\t"q"'}],
+    "vacant_buildings": [{"total_fines": 100.0, "current_amount_due": 12.5}],
+}
+
+
+class TestDumps:
+    def test_matches_json_response_for_plain_values(self):
+        report = {"activity_score": 40, "ai_summary": "Ünïcode", "flags": [{"a": None}]}
+        assert dumps(report) == _response_bytes(report)
+
+    def test_raw_text_spliced_verbatim(self):
+        raw = RawJSON(_response_bytes(RECORDS))
+        report = {"report_id": "r1", "supporting_records": raw, "disclaimer": "x"}
+        assert dumps(report) == _response_bytes({**report, "supporting_records": RECORDS})
+
+    def test_nested_and_repeated_raw_values(self):
+        report = {"a": [RawJSON("[1,2]"), {"b": RawJSON('{"c":true}')}]}
+        assert dumps(report) == '{"a":[[1,2],{"b":{"c":true}}]}'
+
+
+class TestRawJSON:
+    def test_value_decoded_lazily_once(self):
+        raw = RawJSON('{"violations": []}')
+        assert raw._value is None
+        assert raw.get("violations") == []
+        assert raw.value is raw.value
+
+    def test_plain_decodes_everything(self):
+        report = {"supporting_records": RawJSON(json.dumps(RECORDS)), "n": [RawJSON("1")]}
+        assert plain(report) == {"supporting_records": RECORDS, "n": [1]}
@@ -0,0 +1,137 @@
+"""
+Tests for backend.app.services.report_cache — LRU backends and metrics.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from unittest.mock import patch
+
+from backend.app.services.json_text import RawJSON
+from backend.app.services.report_cache import MemoryReportCache, SqliteReportCache
+
+
+def _report(n: int, pad: int = 0) -> dict:
+    return {"activity_score": n, "supporting_records": RawJSON('{"violations":[]}'), "pad": "x" * pad}
+
+
+# ── Memory backend ──────────────────────────────────────────────────────────
+
+class TestMemoryReportCache:
+    def test_keyed_by_generation(self):
+        cache = MemoryReportCache(max_entries=10, max_bytes=10_000, ttl_seconds=60)
+        cache.set(1, 5, _report(10))
+
+        assert cache.get(1, 5)["activity_score"] == 10
+        assert cache.get(1, 6) is None          # newer data generation → miss
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+    def test_entry_limit_evicts_least_recently_used(self):
+        cache = MemoryReportCache(max_entries=2, max_bytes=10_000, ttl_seconds=60)
+        cache.set(1, 1, _report(1))
+        cache.set(2, 1, _report(2))
+        cache.get(1, 1)                         # refresh entry 1
+        cache.set(3, 1, _report(3))             # evicts entry 2
+
+        assert cache.get(2, 1) is None
+        assert cache.get(1, 1) is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["size"] == 2
+
+    def test_byte_limit(self):
+        cache = MemoryReportCache(max_entries=100, max_bytes=500, ttl_seconds=60)
+        cache.set(1, 1, _report(1, pad=200))
+        cache.set(2, 1, _report(2, pad=200))
+        cache.set(3, 1, _report(3, pad=1_000))  # larger than the whole cache: not stored
+
+        stats = cache.stats()
+        assert stats["bytes"] <= 500
+        assert cache.get(3, 1) is None
+        assert stats["size"] + stats["evictions"] == 2
+
+    def test_retire_drops_older_generations(self):
+        cache = MemoryReportCache(max_entries=10, max_bytes=10_000, ttl_seconds=60)
+        cache.set(1, 4, _report(1))
+        cache.set(2, 5, _report(2))
+
+        assert cache.retire(5) == 1
+        assert cache.get(1, 4) is None
+        assert cache.get(2, 5) is not None
+
+    def test_reuses_serialized_body_for_size(self):
+        cache = MemoryReportCache(max_entries=10, max_bytes=10_000, ttl_seconds=60)
+        with patch("backend.app.services.report_cache.json_text.dumps") as dumps:
+            cache.set(1, 1, _report(1), body="x" * 300)
+        dumps.assert_not_called()
+        assert cache.stats()["bytes"] == 300
+
+    def test_caller_changes_do_not_reach_the_entry(self):
+        cache = MemoryReportCache(max_entries=10, max_bytes=10_000, ttl_seconds=60)
+        report = _report(1)
+        cache.set(1, 1, report)
+        report["lat"] = 41.88                   # the router enriches the returned dict
+
+        assert "lat" not in cache.get(1, 1)
+
+    def test_expired_entry_is_a_miss(self):
+        cache = MemoryReportCache(max_entries=10, max_bytes=10_000, ttl_seconds=0)
+        cache.set(1, 1, _report(1))
+        assert cache.get(1, 1) is None
+        assert cache.stats()["size"] == 0
+
+
+# ── SQLite backend ──────────────────────────────────────────────────────────
+
+class TestSqliteReportCache:
+    def test_entries_shared_between_instances(self, tmp_path):
+        path = str(tmp_path / "reports.sqlite3")
+        worker_a = SqliteReportCache(path, max_entries=10, max_bytes=10_000, ttl_seconds=60)
+        worker_b = SqliteReportCache(path, max_entries=10, max_bytes=10_000, ttl_seconds=60)
+
+        worker_a.set(7, 3, _report(42))
+        hit = worker_b.get(7, 3)
+
+        assert hit["activity_score"] == 42
+        assert hit["supporting_records"] == {"violations": []}
+        assert worker_b.get(7, 4) is None
+        assert worker_b.stats()["size"] == 1
+
+        assert worker_b.retire(4) == 1
+        assert worker_a.get(7, 3) is None
+
+    def test_lru_eviction(self, tmp_path):
+        cache = SqliteReportCache(
+            str(tmp_path / "reports.sqlite3"), max_entries=2, max_bytes=10_000, ttl_seconds=60,
+        )
+        cache.set(1, 1, _report(1))
+        time.sleep(0.01)
+        cache.set(2, 1, _report(2))
+        time.sleep(0.01)
+        cache.get(1, 1)
+        time.sleep(0.01)
+        cache.set(3, 1, _report(3))
+
+        assert cache.get(2, 1) is None
+        assert cache.get(1, 1) is not None
+        assert cache.stats()["evictions"] == 1
+
+    async def test_async_access_runs_off_the_event_loop(self, tmp_path):
+        cache = SqliteReportCache(
+            str(tmp_path / "reports.sqlite3"), max_entries=10, max_bytes=10_000, ttl_seconds=60,
+        )
+        loop_thread = threading.current_thread()
+        threads = []
+        for name in ("get", "set"):
+            original = getattr(cache, name)
+
+            def record(*args, _original=original):
+                threads.append(threading.current_thread())
+                return _original(*args)
+
+            setattr(cache, name, record)
+
+        await cache.set_async(7, 3, _report(42))
+        assert (await cache.get_async(7, 3))["activity_score"] == 42
+        assert len(threads) == 2 and loop_thread not in threads
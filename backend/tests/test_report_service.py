@@ -71,6 +71,12 @@ def mock_deps():
     ]
     mocks = [p.start() for p in patches]
     rule_eng = mocks[1]
+    rule_eng.get_report_data = AsyncMock(return_value={
+        "score": SCORE,
+        "flags": FLAGS,
+        "supporting_records": RECORDS,
+        "freshness": {"violations_as_of": "2025-01-10"},
+    })
     rule_eng.get_score_and_flags = AsyncMock(return_value=(SCORE, FLAGS))
     rule_eng.get_all_supporting_records = AsyncMock(return_value=RECORDS)
     rule_eng.get_score = AsyncMock(return_value=SCORE)
@@ -143,8 +149,8 @@ async def test_generate_single_report_stores_audit(mock_deps):
     assert "report_audit" in call_args[0][0]
 
 
-async def test_generate_single_report_uses_parallel_queries(mock_deps):
-    """Verify that get_score_and_flags and get_all_supporting_records are called."""
+async def test_generate_single_report_uses_single_data_query(mock_deps):
+    """Score, flags, records and freshness come from one get_report_data call."""
     _, rule_eng = mock_deps
 
     from backend.app.services.report import generate_single_report
@@ -156,9 +162,55 @@ async def test_generate_single_report_uses_parallel_queries(mock_deps):
         skip_narrative=True,
     )
 
-    rule_eng.get_score_and_flags.assert_awaited_once_with(42)
-    rule_eng.get_all_supporting_records.assert_awaited_once_with(42)
-    rule_eng.get_data_freshness.assert_awaited_once()
+    rule_eng.get_report_data.assert_awaited_once_with(42)
+    rule_eng.get_score_and_flags.assert_not_awaited()
+    rule_eng.get_all_supporting_records.assert_not_awaited()
+
+
+async def test_generate_single_report_served_from_snapshot(mock_deps):
+    """A current report_snapshot row replaces the rule engine query."""
+    conn, rule_eng = mock_deps
+    from backend.app.services import rule_engine as real_rule_engine
+
+    rule_eng.decode_report_data = real_rule_engine.decode_report_data
+    records = '{"violations":[],"inspections":[],"permits":[],"tax_liens":[],"service_311":[],"vacant_buildings":[]}'
+    conn.fetchrow = AsyncMock(return_value={
+        **LOCATION_ROW,
+        "community_area_id": 8,
+        "data_generation": 5,
+        "snapshot_score": '{"raw_score" : 55, "activity_level" : "ACTIVE", "flag_count" : 1, "triggered_flags" : ["ACTIVE_MUNICIPAL_VIOLATION"]}',
+        "snapshot_flags": '[{"flag_code":"ACTIVE_MUNICIPAL_VIOLATION","category":"A","description":"Open building violations","severity_score":25,"supporting_count":3,"action_group":"Review Recommended"}]',
+        "snapshot_supporting_records": records,
+        "snapshot_freshness": '{"violations_as_of":"2025-01-10T00:00:00+00:00"}',
+        "ca_name": "NEAR NORTH SIDE",
+        "ca_property_count": 4,
+        "ca_avg_violations": 2.5,
+        "ca_avg_311_12mo": 1.0,
+        "ca_avg_permit_processing_days": 30,
+        "ca_avg_failed_inspections_24mo": 0.5,
+        "ca_total_lien_amount": 1000,
+    })
+
+    from backend.app.services.json_text import RawJSON
+    from backend.app.services.report import generate_single_report
+
+    report = await generate_single_report(
+        location_sk=42,
+        address="123 N MAIN ST",
+        user_id=UUID("00000000-0000-0000-0000-000000000001"),
+        skip_narrative=True,
+    )
+
+    rule_eng.get_report_data.assert_not_awaited()
+    assert conn.fetchrow.await_count == 1
+    assert conn.execute.await_count == 1
+    assert report["activity_level"] == "ACTIVE"
+    assert report["triggered_flags"] == FLAGS
+    assert isinstance(report["supporting_records"], RawJSON)
+    assert report["supporting_records"].text == records
+    assert report["data_freshness"]["violations_as_of"] == "2025-01-10T00:00:00+00:00"
+    assert report["neighborhood"]["community_area_name"] == "NEAR NORTH SIDE"
+    assert report["neighborhood"]["baselines"]["avg_tax_lien_amount"] == 250.0
 
 
 async def test_generate_single_report_cache_hit(mock_deps):
@@ -185,5 +237,4 @@ async def test_generate_single_report_cache_hit(mock_deps):
     assert r1["activity_score"] == r2["activity_score"]
 
     # Rule engine should only be called once (second call uses cache)
-    assert rule_eng.get_score_and_flags.await_count == 1
-    assert rule_eng.get_all_supporting_records.await_count == 1
+    assert rule_eng.get_report_data.await_count == 1
@@ -70,6 +70,48 @@ class TestGetFlags:
         assert result == []
 
 
+class TestBulk:
+    @pytest.mark.asyncio
+    async def test_scores_keyed_by_location_with_defaults(self):
+        from backend.app.services.rule_engine import get_scores
+
+        conn = FakeConnection(fetch_return=[
+            {"location_sk": 2, "raw_score": 40, "activity_level": "ACTIVE",
+             "flag_count": 1, "triggered_flags": ["A"]},
+        ])
+        with _patch_conn(conn):
+            result = await get_scores([2, 7, 2])
+        assert list(result) == [2, 7]
+        assert result[2]["raw_score"] == 40
+        assert "location_sk" not in result[2]
+        assert result[7]["activity_level"] == "QUIET"
+
+    @pytest.mark.asyncio
+    async def test_flags_grouped_per_location(self):
+        from backend.app.services.rule_engine import get_flags_many
+
+        flag = {"category": "A", "description": "d", "severity_score": 25,
+                "supporting_count": 1, "action_group": "Review Recommended"}
+        conn = FakeConnection(fetch_return=[
+            {"location_sk": 1, "flag_code": "X", **flag},
+            {"location_sk": 1, "flag_code": "Y", **flag},
+            {"location_sk": 3, "flag_code": "Z", **flag},
+        ])
+        with _patch_conn(conn):
+            result = await get_flags_many([1, 2, 3])
+        assert [f["flag_code"] for f in result[1]] == ["X", "Y"]
+        assert result[2] == []
+        assert "location_sk" not in result[3][0]
+
+    @pytest.mark.asyncio
+    async def test_empty_input_skips_query(self):
+        from backend.app.services.rule_engine import get_summaries
+
+        with patch("backend.app.services.rule_engine.get_conn") as get_conn:
+            assert await get_summaries([]) == {}
+        get_conn.assert_not_called()
+
+
 class TestGetDataFreshness:
     @pytest.mark.asyncio
     async def test_returns_formatted(self):
@@ -87,3 +129,35 @@ class TestGetDataFreshness:
             result = await get_data_freshness()
         assert result["violations_as_of"] == "2025-01-10T00:00:00"
         assert result["tax_liens_as_of"] == "2025-01-10T00:00:00"
+
+
+class TestGetReportData:
+    @pytest.mark.asyncio
+    async def test_records_passed_through_as_text(self):
+        from backend.app.services.json_text import RawJSON
+        from backend.app.services.rule_engine import get_report_data
+
+        records = '{"violations":[{"violation_date":"2025-01-02"}]}'
+        conn = FakeConnection(fetchrow_return={
+            "score": '{"raw_score" : 0, "activity_level" : "QUIET", "flag_count" : 0,'
+                     ' "triggered_flags" : []}',
+            "flags": "[]",
+            "supporting_records": records,
+            "freshness": '{"violations_as_of" : null}',
+        })
+        with _patch_conn(conn):
+            result = await get_report_data(1)
+        assert result["score"]["activity_level"] == "QUIET"
+        assert isinstance(result["supporting_records"], RawJSON)
+        assert result["supporting_records"].text == records
+        assert result["supporting_records"].get("violations")[0]["violation_date"] == "2025-01-02"
+
+    def test_sql_functions_cover_every_part(self):
+        from pathlib import Path
+
+        sql = (Path(__file__).resolve().parents[2] / "sql" / "views" / "06_report.sql").read_text()
+        for key in ('"violations"', '"inspections"', '"permits"', '"tax_liens"',
+                    '"service_311"', '"vacant_buildings"', '"vacant_buildings_as_of"'):
+            assert key in sql
+        for name in ("report_location_data(", "view_report_data_freshness", "refresh_report_snapshots("):
+            assert name in sql
@@ -160,6 +160,7 @@ export interface BatchUploadResponse {
   batch_id: string
   batch_name: string | null
   total_count: number
+  duplicate_count?: number
 }
 
 export interface BatchItemStatus {
@@ -207,6 +208,10 @@ export interface BatchSSEEvent {
   error?: string
   completed?: number
   failed?: number
+  total?: number
+  avg_activity_score?: number | null
+  level_distribution?: Record<string, number>
+  duration_s?: number
 }
 
 // ── Auth API calls ───────────────────────────────────────────────────────────
@@ -27,6 +27,8 @@ export default function BatchPage({ embedded = false }: { embedded?: boolean })
   const [avgScore, setAvgScore] = useState<number | null>(null)
   const [levelDist, setLevelDist] = useState<Record<string, number>>({})
   const esRef = useRef<EventSource | null>(null)
+  // Rows whose result was counted; a resumed stream may repeat a few results
+  const finishedRef = useRef<Set<number | undefined>>(new Set())
 
   // Load existing batch from URL params
   const loadBatchId = searchParams.get('id')
@@ -109,6 +111,7 @@ export default function BatchPage({ embedded = false }: { embedded?: boolean })
   }, [])
 
   function startSSE(id: string) {
+    finishedRef.current = new Set()
     const es = createBatchEventSource(id)
     esRef.current = es
 
@@ -122,6 +125,8 @@ export default function BatchPage({ embedded = false }: { embedded?: boolean })
           )
         )
       } else if (data.type === 'completed') {
+        if (finishedRef.current.has(data.row_index)) return
+        finishedRef.current.add(data.row_index)
         setCompletedCount((c) => c + 1)
         setItems((prev) =>
           prev.map((it) =>
@@ -138,6 +143,8 @@ export default function BatchPage({ embedded = false }: { embedded?: boolean })
           )
         )
       } else if (data.type === 'failed') {
+        if (finishedRef.current.has(data.row_index)) return
+        finishedRef.current.add(data.row_index)
         setFailedCount((c) => c + 1)
         setItems((prev) =>
           prev.map((it) =>
@@ -153,8 +160,8 @@ export default function BatchPage({ embedded = false }: { embedded?: boolean })
     }
 
     es.onerror = () => {
-      es.close()
-      handleSSEDone()
+      // While CONNECTING the browser reconnects and resumes from Last-Event-ID
+      if (es.readyState === EventSource.CLOSED) handleSSEDone()
     }
   }
 
@@ -178,7 +185,7 @@ export default function BatchPage({ embedded = false }: { embedded?: boolean })
           <div className="bg-white shadow-sm border border-gray-200 rounded-xl p-6">
             <h2 className="text-lg font-semibold text-gray-900 mb-4">Upload CSV</h2>
             <p className="text-sm text-gray-500 mb-4">
-              Upload a CSV file with an address column. Maximum 50 rows.
+              Upload a CSV file with an address column. Maximum 100,000 rows.
               Accepted column names: address, property_address, full_address, street_address.
             </p>
 
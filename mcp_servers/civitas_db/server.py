@@ -45,49 +45,23 @@ async def query_property(address: str, pin: str | None = None) -> dict[str, Any]
     """
     Resolve an address (and optional PIN) to a property in the Civitas database.
     Returns location details, parcel info, and match confidence.
-    Uses the same tier 1-4 resolution as the main application.
+    Uses the main application's tier 1-3 resolution (resolve_addresses),
+    then a substring match on the standardized address as a last resort.
+    Every match has the same keys, whichever tier found it.
     """
+    # The API stack is only needed by this tool
+    from backend.app.services.address import resolve_addresses
+
     async with db.get_conn() as conn:
-        # Tier 1: PIN match
-        if pin:
-            norm_pin = re.sub(r"\D", "", pin or "")
-            if len(norm_pin) == 14:
-                row = await conn.fetchrow(
-                    """
-                    SELECT p.parcel_sk, p.parcel_id,
-                           l.location_sk, l.full_address_standardized,
-                           l.house_number, l.street_direction, l.street_name,
-                           l.street_type, l.zip, l.lat, l.lon
-                    FROM dim_parcel p
-                    JOIN dim_location l ON l.location_sk = p.location_sk
-                    WHERE p.parcel_id = $1
-                    """,
-                    norm_pin,
-                )
-                if row:
-                    return _row_dict(row) | {"match_confidence": "EXACT_PIN"}
-
-        # Tier 2: Address matching
-        address_upper = address.strip().upper()
-        if address_upper:
-            # Try exact full address match
-            row = await conn.fetchrow(
-                """
-                SELECT l.location_sk, l.full_address_standardized,
-                       l.house_number, l.street_direction, l.street_name,
-                       l.street_type, l.zip, l.lat, l.lon,
-                       p.parcel_id
-                FROM dim_location l
-                LEFT JOIN dim_parcel p ON p.location_sk = l.location_sk
-                WHERE l.full_address_standardized = $1
-                LIMIT 1
-                """,
-                address_upper,
+        [result] = await resolve_addresses([address], [pin], conn=conn)
+        if result["resolved"]:
+            return _property_dict(
+                result | {"full_address_standardized": result["full_address"]},
+                result["match_confidence"],
             )
-            if row:
-                return _row_dict(row) | {"match_confidence": "EXACT_ADDRESS"}
 
-            # Try ILIKE fallback
+        address_upper = address.strip().upper()
+        if address_upper:
             row = await conn.fetchrow(
                 """
                 SELECT l.location_sk, l.full_address_standardized,
@@ -102,7 +76,7 @@ async def query_property(address: str, pin: str | None = None) -> dict[str, Any]
                 f"%{address_upper}%",
             )
             if row:
-                return _row_dict(row) | {"match_confidence": "FUZZY_ADDRESS"}
+                return _property_dict(row, "FUZZY_ADDRESS")
 
     return {"resolved": False, "warning": "No matching property found"}
 
@@ -120,7 +94,7 @@ async def get_flags(location_sk: int) -> list[dict[str, Any]]:
                    supporting_count, action_group
             FROM view_property_flags
             WHERE location_sk = $1
-            ORDER BY category, severity_score DESC
+            ORDER BY category, severity_score DESC, flag_code
             """,
             location_sk,
         )
@@ -220,6 +194,18 @@ async def run_sql(query: str, params: list[Any] | None = None) -> list[dict[str,
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
+_PROPERTY_KEYS = (
+    "location_sk", "full_address_standardized",
+    "house_number", "street_direction", "street_name", "street_type",
+    "zip", "lat", "lon", "parcel_id",
+)
+
+
+def _property_dict(values, confidence: str) -> dict[str, Any]:
+    """query_property match: _PROPERTY_KEYS plus match_confidence."""
+    return _row_dict({k: values[k] for k in _PROPERTY_KEYS}) | {"match_confidence": confidence}
+
+
 def _row_dict(row) -> dict[str, Any]:
     """Convert asyncpg Record to JSON-safe dict."""
     from decimal import Decimal
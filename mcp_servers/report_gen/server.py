@@ -50,8 +50,9 @@ async def generate_report(
     Set skip_narrative=True to skip AI summary generation.
     """
     from backend.app.services.report import generate_single_report
+    from backend.app.services.json_text import plain
     result = await generate_single_report(address, pin=pin, skip_narrative=skip_narrative)
-    return result
+    return plain(result)
 
 
 @mcp.tool()
@@ -65,8 +65,9 @@ class TestQueryProperty:
             "house_number": "123", "street_direction": "N",
             "street_name": "MAIN", "street_type": "ST",
             "zip": "60601", "lat": 41.878, "lon": -87.629,
+            "community_area_id": 32, "idx": 0,
         })
-        conn = FakeConnection(fetchrow_return=row)
+        conn = FakeConnection(fetch_return=[row])
 
         with _get_conn_patch(conn):
             from mcp_servers.civitas_db.server import query_property
@@ -77,28 +78,70 @@ class TestQueryProperty:
 
     async def test_exact_address_match(self):
         row = FakeRecord({
-            "location_sk": 42, "full_address_standardized": "123 N MAIN ST 60601",
+            "location_sk": 42, "full_address_standardized": "123 N MAIN ST",
             "house_number": "123", "street_direction": "N",
             "street_name": "MAIN", "street_type": "ST",
             "zip": "60601", "lat": 41.878, "lon": -87.629,
-            "parcel_id": "12345678901234",
+            "community_area_id": 32, "parcel_id": "12345678901234", "idx": 0,
         })
-        call_count = 0
-        async def mock_fetchrow(query, *args):
-            nonlocal call_count
-            call_count += 1
-            if call_count <= 1:
-                return None
-            return row
+        queries = []
+
+        async def mock_fetch(query, *args):
+            queries.append(query)
+            return [row]
 
         conn = FakeConnection()
-        conn.fetchrow = mock_fetchrow
+        conn.fetch = mock_fetch
 
         with _get_conn_patch(conn):
             from mcp_servers.civitas_db.server import query_property
             result = await query_property("123 N MAIN ST 60601")
 
         assert result["match_confidence"] == "EXACT_ADDRESS"
+        assert result["full_address_standardized"] == "123 N MAIN ST"
+        assert len(queries) == 1  # no PIN, so the street-only tier runs first
+
+    async def test_fuzzy_fallback(self):
+        row = FakeRecord({
+            "location_sk": 42, "full_address_standardized": "123 N MAIN ST",
+            "house_number": "123", "street_direction": "N",
+            "street_name": "MAIN", "street_type": "ST",
+            "zip": "60601", "lat": 41.878, "lon": -87.629,
+            "parcel_id": None,
+        })
+        conn = FakeConnection(fetchrow_return=row)
+
+        with _get_conn_patch(conn):
+            from mcp_servers.civitas_db.server import query_property
+            result = await query_property("MAIN ST")
+
+        assert result["match_confidence"] == "FUZZY_ADDRESS"
+
+    async def test_same_keys_for_every_tier(self):
+        location = {
+            "location_sk": 42, "full_address_standardized": "123 N MAIN ST",
+            "house_number": "123", "street_direction": "N",
+            "street_name": "MAIN", "street_type": "ST",
+            "zip": "60601", "lat": Decimal("41.878"), "lon": Decimal("-87.629"),
+            "parcel_id": None,
+        }
+        from mcp_servers.civitas_db.server import query_property
+
+        exact_conn = FakeConnection(
+            fetch_return=[FakeRecord(location | {"community_area_id": 32, "idx": 0})],
+        )
+        with _get_conn_patch(exact_conn):
+            exact = await query_property("123 N MAIN ST")
+
+        fuzzy_conn = FakeConnection(fetchrow_return=FakeRecord(location))
+        with _get_conn_patch(fuzzy_conn):
+            fuzzy = await query_property("MAIN ST")
+
+        assert exact["match_confidence"] == "EXACT_ADDRESS"
+        assert fuzzy["match_confidence"] == "FUZZY_ADDRESS"
+        assert exact.keys() == fuzzy.keys()
+        assert exact == fuzzy | {"match_confidence": "EXACT_ADDRESS"}
+        assert isinstance(exact["lat"], float)
 
     async def test_no_match(self):
         conn = FakeConnection(fetchrow_return=None)
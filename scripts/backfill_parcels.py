@@ -8,16 +8,15 @@ Usage:
 
 from __future__ import annotations
 
-import csv
-import io
 import logging
 import os
 import re
-from typing import Optional
+from typing import Iterator, Optional
 
 import psycopg2
 import psycopg2.extras
-import requests
+
+from backend.ingestion.socrata import iter_rows
 
 log = logging.getLogger(__name__)
 
@@ -45,36 +44,18 @@ def standardize_address(street: str, city: str, zip_code: str) -> Optional[str]:
     return f"{street}, {city}, IL {(zip_code or '').strip()[:5]}".rstrip()
 
 
-def fetch_pages(token: Optional[str] = None) -> list[dict]:
-    headers = {}
-    if token:
-        headers["X-App-Token"] = token
-    offset = 0
-    all_rows: list[dict] = []
-
-    while True:
-        log.info("  fetching offset=%d ...", offset)
-        resp = requests.get(
-            ASSESSOR_URL,
-            params={
-                "$limit": PAGE_SIZE,
-                "$offset": offset,
-                "$select": "pin,property_address,property_city,property_zip,latitude,longitude",
-                "$where": "property_city='CHICAGO'",
-            },
-            headers=headers,
-            timeout=120,
-        )
-        resp.raise_for_status()
-        reader = csv.DictReader(io.StringIO(resp.text))
-        page = list(reader)
-        all_rows.extend(page)
-        log.info("  got %d rows (total=%d)", len(page), len(all_rows))
-        if len(page) < PAGE_SIZE:
-            break
-        offset += PAGE_SIZE
-
-    return all_rows
+def fetch_pages(token: Optional[str] = None) -> Iterator[dict]:
+    """Stream Chicago parcel rows from the Assessor crosswalk, page by page."""
+    return iter_rows(
+        ASSESSOR_URL,
+        {
+            "$select": "pin,property_address,property_city,property_zip,latitude,longitude",
+            "$where": "property_city='CHICAGO'",
+        },
+        token,
+        page_size=PAGE_SIZE,
+        timeout=120,
+    )
 
 
 def run():
@@ -85,9 +66,9 @@ def run():
     # Actually, we deleted those. We need to know which PINs the tax lien data has.
     # Better approach: download ALL Chicago parcels and build the crosswalk.
 
+    # Step 2 consumes the download as it streams in (next page prefetched meanwhile)
     log.info("Step 1: Downloading Cook County Assessor parcel data (Chicago only)...")
     rows = fetch_pages(token)
-    log.info("Downloaded %d parcel records", len(rows))
 
     # Step 2: Build dim_location + dim_parcel entries
     log.info("Step 2: Upserting dim_location and dim_parcel...")
@@ -130,15 +111,16 @@ def run():
             cur.execute(
                 """
                 INSERT INTO dim_location
-                    (full_address_standardized, house_number, street_name, zip, lat, lon, source_address_raw)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    (full_address_standardized, house_number, street_name, zip, lat, lon,
+                     source_address_raw, street_key)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, normalize_street_key(%s))
                 ON CONFLICT (full_address_standardized)
                     DO UPDATE SET lat = COALESCE(dim_location.lat, EXCLUDED.lat),
                                   lon = COALESCE(dim_location.lon, EXCLUDED.lon),
                                   updated_at = NOW()
                 RETURNING location_sk
                 """,
-                (addr, house_number, street_rest, zip5, lat, lon, parts),
+                (addr, house_number, street_rest, zip5, lat, lon, parts, addr),
             )
             loc_sk = cur.fetchone()[0]
             inserted_loc += 1
@@ -157,7 +139,7 @@ def run():
 
             if (i + 1) % 10_000 == 0:
                 conn.commit()
-                log.info("  processed %d / %d rows...", i + 1, len(rows))
+                log.info("  processed %d rows...", i + 1)
 
     conn.commit()
     log.info(
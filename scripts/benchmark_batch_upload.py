@@ -0,0 +1,144 @@
+"""
+Benchmark batch CSV upload: the original per-row INSERT loop (one
+round trip per address, no transaction) against one unnest() INSERT and
+against COPY (services/batch.create_batch, what the API uses).
+
+For each size a synthetic CSV is generated with a share of repeated
+addresses (differing only in case and spacing, as pasted spreadsheets do).
+Parsing and deduplication are timed with parse_address_csv(); each insert
+method then writes the same unique addresses into a fresh batch_job.
+Reports seconds and rows per second. The benchmark batches are deleted
+afterwards.
+
+Reads DATABASE_URL like the API does.
+
+Usage:
+    python3 -m scripts.benchmark_batch_upload                      # 10k and 100k rows
+    python3 -m scripts.benchmark_batch_upload --rows 10000 --methods unnest copy
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import logging
+import random
+import time
+
+from backend.app import database
+from backend.app.services.batch import create_batch, parse_address_csv
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+STREETS = ["N MAIN ST", "S OAK AVE", "W ELM ST", "E 63RD ST", "N LAKE SHORE DR", "S HALSTED ST"]
+
+
+def _csv(rows: int, duplicates: float) -> bytes:
+    rng = random.Random(rows)
+    lines = ["address,owner"]
+    seen: list[str] = []
+    for i in range(rows):
+        if seen and rng.random() < duplicates:
+            lines.append(f"  {rng.choice(seen).lower()} ,dup")
+            continue
+        address = f"{i + 100} {STREETS[i % len(STREETS)]}"
+        seen.append(address)
+        lines.append(f"{address},owner {i}")
+    return "\n".join(lines).encode()
+
+
+async def _insert_loop(batch_name: str, addresses: list[str]) -> str:
+    async with database.get_conn() as conn:
+        batch_id = await conn.fetchval(
+            "INSERT INTO batch_job (batch_name, total_count) VALUES ($1, $2) RETURNING batch_id",
+            batch_name, len(addresses),
+        )
+        for idx, address in enumerate(addresses):
+            await conn.execute(
+                "INSERT INTO batch_job_item (batch_id, row_index, input_address) VALUES ($1, $2, $3)",
+                batch_id, idx, address,
+            )
+    return str(batch_id)
+
+
+async def _insert_unnest(batch_name: str, addresses: list[str]) -> str:
+    async with database.get_conn() as conn:
+        async with conn.transaction():
+            batch_id = await conn.fetchval(
+                "INSERT INTO batch_job (batch_name, total_count) VALUES ($1, $2) RETURNING batch_id",
+                batch_name, len(addresses),
+            )
+            await conn.execute(
+                """
+                INSERT INTO batch_job_item (batch_id, row_index, input_address)
+                SELECT $1, u.ord - 1, u.address
+                FROM unnest($2::text[]) WITH ORDINALITY AS u(address, ord)
+                """,
+                batch_id, addresses,
+            )
+    return str(batch_id)
+
+
+async def _insert_copy(batch_name: str, addresses: list[str]) -> str:
+    return await create_batch(None, batch_name, addresses)
+
+
+METHODS = {
+    "loop":   _insert_loop,
+    "unnest": _insert_unnest,
+    "copy":   _insert_copy,
+}
+
+
+async def run(sizes: list[int], methods: list[str], duplicates: float) -> list[dict]:
+    await database.init_pool()
+    results = []
+    try:
+        for rows in sizes:
+            raw = _csv(rows, duplicates)
+            start = time.perf_counter()
+            addresses, read = parse_address_csv(io.BytesIO(raw), max_rows=rows)
+            parse_s = time.perf_counter() - start
+            log.info("%d rows: parsed in %.3fs, %d unique", read, parse_s, len(addresses))
+
+            for name in methods:
+                start = time.perf_counter()
+                batch_id = await METHODS[name](f"benchmark {name} {rows}", addresses)
+                elapsed = time.perf_counter() - start
+                async with database.get_conn() as conn:
+                    stored = await conn.fetchval(
+                        "SELECT COUNT(*) FROM batch_job_item WHERE batch_id = $1", batch_id,
+                    )
+                    await conn.execute("DELETE FROM batch_job WHERE batch_id = $1", batch_id)
+                assert stored == len(addresses), (name, stored)
+                log.info("%-6s %d items in %.3fs", name, stored, elapsed)
+                results.append({
+                    "rows": rows, "unique": len(addresses), "method": name,
+                    "parse_s": round(parse_s, 3), "insert_s": round(elapsed, 3),
+                    "rows_per_s": round(len(addresses) / elapsed) if elapsed else None,
+                })
+    finally:
+        await database.close_pool()
+
+    print(f"\n{'rows':>8} {'unique':>8} {'method':<7} {'parse s':>8} {'insert s':>9} {'items/s':>9}")
+    for r in results:
+        print(
+            f"{r['rows']:>8} {r['unique']:>8} {r['method']:<7} {r['parse_s']:>8} "
+            f"{r['insert_s']:>9} {r['rows_per_s']:>9}"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--methods", nargs="+", choices=list(METHODS), default=list(METHODS))
+    parser.add_argument("--duplicates", type=float, default=0.1, help="share of repeated rows")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.methods, args.duplicates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Benchmark the rule layer: the original 15-branch UNION ALL (rule_config
+joined per branch, a correlated fact_violation subquery for
+AGED_ENFORCEMENT_RISK) against the current single-pass evaluation in
+sql/views/02_flags.sql.
+
+Reuses the synthetic dataset from scripts.benchmark_summary, stores its
+property summary as `view_property_summary` in the scratch schema, and then
+times both rule queries citywide and for a sample of single locations.
+Finally it checks that both queries return the same flags.
+
+Usage:
+    python3 -m scripts.benchmark_rules
+    python3 -m scripts.benchmark_rules --scale 0.1 --locations 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import re
+from pathlib import Path
+
+from scripts.benchmark_summary import (
+    SCHEMA, build_dataset, current_summary_sql, get_conn, measure,
+)
+
+log = logging.getLogger(__name__)
+
+FLAGS_SQL = Path(__file__).parents[1] / "sql" / "views" / "02_flags.sql"
+
+# The rule evaluation as it stood before the single-pass rewrite
+LEGACY_FLAGS_SQL = """
+-- ─────────────────────────────────────────────────────────────────────────────
+-- Category A: Active Enforcement Risk
+-- ─────────────────────────────────────────────────────────────────────────────
+
+-- A1: ACTIVE_MUNICIPAL_VIOLATION – any open violation
+SELECT
+    s.location_sk,
+    'ACTIVE_MUNICIPAL_VIOLATION'                    AS flag_code,
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.active_violation_count                        AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'ACTIVE_MUNICIPAL_VIOLATION' AND rc.is_active = TRUE
+WHERE s.active_violation_count > 0
+
+UNION ALL
+
+-- A2: AGED_ENFORCEMENT_RISK – open violation older than 180 days
+SELECT
+    s.location_sk,
+    'AGED_ENFORCEMENT_RISK',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    -- count of specifically aged-open violations
+    (
+        SELECT COUNT(*)
+        FROM fact_violation fv2
+        WHERE fv2.location_sk    = s.location_sk
+          AND UPPER(fv2.violation_status) = 'OPEN'
+          AND fv2.violation_date  < NOW() - INTERVAL '180 days'
+    )                                               AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'AGED_ENFORCEMENT_RISK' AND rc.is_active = TRUE
+WHERE s.oldest_open_violation_days > 180
+
+UNION ALL
+
+-- A3: SEVERE_ENFORCEMENT_ACTION – violation where inspection_status indicates failure
+SELECT
+    s.location_sk,
+    'SEVERE_ENFORCEMENT_ACTION',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.failed_violation_count                        AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'SEVERE_ENFORCEMENT_ACTION' AND rc.is_active = TRUE
+WHERE s.failed_violation_count > 0
+
+UNION ALL
+
+-- A4: DEMOLITION_PERMIT_ISSUED – wrecking/demolition permit at this address
+SELECT
+    s.location_sk,
+    'DEMOLITION_PERMIT_ISSUED',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.demolition_permit_count                     AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'DEMOLITION_PERMIT_ISSUED' AND rc.is_active = TRUE
+WHERE s.demolition_permit_count > 0
+
+UNION ALL
+
+-- A5: VACANT_BUILDING_VIOLATION – vacant building violation recorded
+SELECT
+    s.location_sk,
+    'VACANT_BUILDING_VIOLATION',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.vacant_violation_count                      AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'VACANT_BUILDING_VIOLATION' AND rc.is_active = TRUE
+WHERE s.vacant_violation_count > 0
+
+UNION ALL
+
+-- ─────────────────────────────────────────────────────────────────────────────
+-- Category B: Recurring Compliance Risk
+-- ─────────────────────────────────────────────────────────────────────────────
+
+-- B1: REPEAT_COMPLIANCE_ISSUE – 3+ total violations at address
+SELECT
+    s.location_sk,
+    'REPEAT_COMPLIANCE_ISSUE',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.total_violations                              AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'REPEAT_COMPLIANCE_ISSUE' AND rc.is_active = TRUE
+WHERE s.total_violations >= 3
+
+UNION ALL
+
+-- B2: ABOVE_NORMAL_INSPECTION_FAIL – 2+ failed food inspections in 24 months
+SELECT
+    s.location_sk,
+    'ABOVE_NORMAL_INSPECTION_FAIL',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.failed_inspection_count_24mo                  AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'ABOVE_NORMAL_INSPECTION_FAIL' AND rc.is_active = TRUE
+WHERE s.failed_inspection_count_24mo >= 2
+
+UNION ALL
+
+-- ─────────────────────────────────────────────────────────────────────────────
+-- Category C: Regulatory Friction
+-- ─────────────────────────────────────────────────────────────────────────────
+
+-- C1: PERMIT_PROCESSING_DELAY – avg processing time > 90 days
+SELECT
+    s.location_sk,
+    'PERMIT_PROCESSING_DELAY',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.delayed_permit_count                          AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'PERMIT_PROCESSING_DELAY' AND rc.is_active = TRUE
+WHERE s.delayed_permit_count > 0
+
+UNION ALL
+
+-- C2: ELEVATED_DISTRESS_SIGNALS – 5+ 311 requests in last 12 months
+SELECT
+    s.location_sk,
+    'ELEVATED_DISTRESS_SIGNALS',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.sr_count_12mo                                 AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'ELEVATED_DISTRESS_SIGNALS' AND rc.is_active = TRUE
+WHERE s.sr_count_12mo >= 5
+
+UNION ALL
+
+-- C3: ENFORCEMENT_INTENSITY_INCREASE – violation count rose year-over-year
+SELECT
+    s.location_sk,
+    'ENFORCEMENT_INTENSITY_INCREASE',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.violations_this_year                          AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'ENFORCEMENT_INTENSITY_INCREASE' AND rc.is_active = TRUE
+WHERE s.violations_prev_year > 0
+  AND s.violations_this_year > s.violations_prev_year
+
+UNION ALL
+
+-- ─────────────────────────────────────────────────────────────────────────────
+-- Category D: Tax & Financial Risk
+-- ─────────────────────────────────────────────────────────────────────────────
+
+-- D1: ACTIVE_TAX_LIEN – offered at tax sale in current or prior year
+SELECT
+    s.location_sk,
+    'ACTIVE_TAX_LIEN',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.total_lien_events                             AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'ACTIVE_TAX_LIEN' AND rc.is_active = TRUE
+WHERE s.latest_lien_year >= EXTRACT(YEAR FROM NOW()) - 1
+
+UNION ALL
+
+-- D2: AGED_TAX_LIEN – lien event older than 3 years with no resolution
+SELECT
+    s.location_sk,
+    'AGED_TAX_LIEN',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.total_lien_events                             AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'AGED_TAX_LIEN' AND rc.is_active = TRUE
+WHERE s.total_lien_events > 0
+  AND s.latest_lien_year <= EXTRACT(YEAR FROM NOW()) - 3
+
+UNION ALL
+
+-- D3: MULTIPLE_LIEN_EVENTS – appeared at tax sale 2+ times
+SELECT
+    s.location_sk,
+    'MULTIPLE_LIEN_EVENTS',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.total_lien_events                             AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'MULTIPLE_LIEN_EVENTS' AND rc.is_active = TRUE
+WHERE s.total_lien_events >= 2
+
+UNION ALL
+
+-- D4: HIGH_VALUE_LIEN – total lien amount > $10,000
+SELECT
+    s.location_sk,
+    'HIGH_VALUE_LIEN',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.total_lien_events                             AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'HIGH_VALUE_LIEN' AND rc.is_active = TRUE
+WHERE s.total_lien_amount > 10000
+
+UNION ALL
+
+-- D5: HIGH_VACANT_BUILDING_FINES – outstanding vacant building fines > $5,000
+SELECT
+    s.location_sk,
+    'HIGH_VACANT_BUILDING_FINES',
+    rc.category,
+    rc.description,
+    rc.severity_score,
+    s.vacant_violation_count                      AS supporting_count,
+    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
+      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
+FROM view_property_summary s
+JOIN rule_config rc
+    ON rc.rule_code = 'HIGH_VACANT_BUILDING_FINES' AND rc.is_active = TRUE
+WHERE s.total_vacant_fines_due > 5000
+"""
+
+
+def current_flags_sql() -> str:
+    """The SELECT behind view_property_flags_source, read from the repo."""
+    text = FLAGS_SQL.read_text()
+    m = re.search(
+        r"CREATE VIEW view_property_flags_source AS\s*(SELECT.*?);\s*$",
+        text, re.S | re.M,
+    )
+    if not m:
+        raise RuntimeError(f"view_property_flags_source not found in {FLAGS_SQL}")
+    return m.group(1)
+
+
+def run(scale: float, hot_share: float, n_single: int, keep: bool):
+    conn = get_conn()
+    conn.autocommit = True
+    conn.set_client_encoding("UTF8")
+    try:
+        with conn.cursor() as cur:
+            log.info("Building synthetic dataset (scale=%.2f) in schema %s …", scale, SCHEMA)
+            n_loc = build_dataset(cur, scale, hot_share)
+            cur.execute(f"SET search_path = {SCHEMA}, public")
+            cur.execute(f"CREATE TABLE view_property_summary AS {current_summary_sql()}")
+            cur.execute("ALTER TABLE view_property_summary ADD PRIMARY KEY (location_sk)")
+            cur.execute("ANALYZE view_property_summary")
+
+            rng = random.Random(42)
+            singles = rng.sample(range(1, n_loc + 1), min(n_single, n_loc))
+            queries = {"union all": LEGACY_FLAGS_SQL, "single pass": current_flags_sql()}
+
+            print(f"\n{n_loc} locations, {len(singles)} single-location lookups")
+            print(f"{'query':<14}{'citywide ms':>14}{'flags':>10}{'single avg ms':>16}")
+            for name, sql in queries.items():
+                city = measure(cur, sql)
+                single = [measure(cur, sql, [sk])["ms"] for sk in singles]
+                print(
+                    f"{name:<14}{city['ms']:>14}{city['rows']:>10}"
+                    f"{sum(single) / len(single):>16.3f}"
+                )
+
+            legacy = f"SELECT * FROM ({queries['union all']}) a"
+            current = f"SELECT * FROM ({queries['single pass']}) b"
+            cur.execute(
+                f"""
+                SELECT (SELECT COUNT(*) FROM ({legacy} EXCEPT ALL {current}) x),
+                       (SELECT COUNT(*) FROM ({current} EXCEPT ALL {legacy}) y)
+                """
+            )
+            only_legacy, only_current = cur.fetchone()
+            if only_legacy or only_current:
+                print(f"\nMISMATCH: {only_legacy} flags only in union all, "
+                      f"{only_current} only in single pass")
+            else:
+                print("\nOutput identical.")
+    finally:
+        if not keep:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="fraction of the city-scale row counts to generate")
+    parser.add_argument("--hot-share", type=float, default=0.05,
+                        help="share of each fact table's rows that go to hot-spot addresses")
+    parser.add_argument("--locations", type=int, default=200,
+                        help="number of single-location lookups to time")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+    run(args.scale, args.hot_share, args.locations, args.keep)
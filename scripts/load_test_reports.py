@@ -0,0 +1,136 @@
+"""
+Load-test the report data fetch: the original fan-out (get_score_and_flags +
+get_all_supporting_records + get_data_freshness, up to 9 pooled connections
+per report) against rule_engine.get_report_data() (one statement, one
+connection).
+
+Both run through the application's own pool (backend.app.database, 20
+connections) with N simulated users, each requesting reports back to back
+for locations drawn from the database, weighted towards locations with
+findings. Reports p50 / p95 / p99 latency and throughput for each mode.
+
+Reads DATABASE_URL like the API does.
+
+Usage:
+    python3 -m scripts.load_test_reports                       # 50 users
+    python3 -m scripts.load_test_reports --users 100 --requests 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+
+from backend.app import database
+from backend.app.services import rule_engine
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+
+async def _fanout(location_sk: int):
+    return await asyncio.gather(
+        rule_engine.get_score_and_flags(location_sk),
+        rule_engine.get_all_supporting_records(location_sk),
+        rule_engine.get_data_freshness(),
+    )
+
+
+MODES = {
+    "fanout": _fanout,
+    "single": rule_engine.get_report_data,
+}
+
+
+async def _sample_locations(n: int) -> list[int]:
+    """Half flagged locations (bigger reports), half uniform."""
+    async with database.get_conn() as conn:
+        flagged = await conn.fetch(
+            "SELECT location_sk FROM property_score ORDER BY random() LIMIT $1", n // 2,
+        )
+        anywhere = await conn.fetch(
+            "SELECT location_sk FROM dim_location ORDER BY random() LIMIT $1", n - len(flagged),
+        )
+    sks = [r["location_sk"] for r in flagged] + [r["location_sk"] for r in anywhere]
+    random.shuffle(sks)
+    return sks
+
+
+async def _user(fetch, sks: list[int], requests: int, latencies: list[float]):
+    for _ in range(requests):
+        sk = random.choice(sks)
+        start = time.perf_counter()
+        await fetch(sk)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+async def run_mode(name: str, sks: list[int], users: int, requests: int) -> dict:
+    fetch = MODES[name]
+    # Warm up plans and the buffer cache so both modes start equal
+    await asyncio.gather(*(fetch(sk) for sk in sks[:20]))
+
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_user(fetch, sks, requests, latencies) for _ in range(users)))
+    wall = time.perf_counter() - start
+
+    return {
+        "mode": name,
+        "requests": len(latencies),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "p99_ms": round(_percentile(latencies, 99), 1),
+        "throughput_rps": round(len(latencies) / wall, 1),
+    }
+
+
+async def run(users: int, requests: int, sample: int, modes: list[str]):
+    await database.init_pool()
+    try:
+        sks = await _sample_locations(sample)
+        if not sks:
+            raise SystemExit("No locations found – load data first")
+        log.info("%d users × %d requests over %d locations", users, requests, len(sks))
+
+        results = []
+        for name in modes:
+            res = await run_mode(name, sks, users, requests)
+            log.info(
+                "%-7s p50=%.1fms  p95=%.1fms  p99=%.1fms  %.1f req/s",
+                name, res["p50_ms"], res["p95_ms"], res["p99_ms"], res["throughput_rps"],
+            )
+            results.append(res)
+    finally:
+        await database.close_pool()
+
+    print(f"\n{'mode':<8} {'requests':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for r in results:
+        print(
+            f"{r['mode']:<8} {r['requests']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+            f"{r['p99_ms']:>8} {r['throughput_rps']:>8}"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=50, help="concurrent simulated users")
+    parser.add_argument("--requests", type=int, default=20, help="reports per user")
+    parser.add_argument("--sample", type=int, default=1000, help="distinct locations to draw from")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.requests, args.sample, args.modes))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,4 +6,6 @@ set -e
 psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" \
     -f /docker-entrypoint-initdb.d/views/01_summary.sql \
     -f /docker-entrypoint-initdb.d/views/02_flags.sql \
-    -f /docker-entrypoint-initdb.d/views/03_score.sql
+    -f /docker-entrypoint-initdb.d/views/03_score.sql \
+    -f /docker-entrypoint-initdb.d/views/05_refresh.sql \
+    -f /docker-entrypoint-initdb.d/views/06_report.sql
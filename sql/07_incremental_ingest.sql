@@ -0,0 +1,15 @@
+-- CIVITAS – Incremental Socrata ingestion
+-- Run after 00_schema.sql
+
+-- High-water mark recorded by each completed batch, keyed by sub-dataset,
+-- e.g. {"annual": "2025-03-01T04:12:55.000Z", "scavenger": "..."}.
+-- Later runs request only rows with :updated_at past this mark.
+ALTER TABLE ingestion_batch
+    ADD COLUMN IF NOT EXISTS watermark JSONB;
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_batch_source
+    ON ingestion_batch(source_dataset, ingestion_batch_id DESC);
+
+-- Changed rows replace their earlier version by source key
+CREATE INDEX IF NOT EXISTS idx_fact_tax_lien_src
+    ON fact_tax_lien(source_id);
@@ -0,0 +1,35 @@
+-- CIVITAS – Incremental property summary maintenance
+-- Run after 00_schema.sql
+
+-- Locations whose facts a batch inserted, replaced or deleted (filled by the
+-- ETL loader). refresh_property_summary() recomputes only these, plus rows
+-- whose time-window aggregates can drift, instead of every location.
+CREATE TABLE IF NOT EXISTS ingestion_batch_location (
+    ingestion_batch_id INTEGER NOT NULL REFERENCES ingestion_batch(ingestion_batch_id),
+    location_sk        INTEGER NOT NULL,
+    PRIMARY KEY (ingestion_batch_id, location_sk)
+);
+
+-- Set once a batch's locations have been folded into property_summary
+ALTER TABLE ingestion_batch
+    ADD COLUMN IF NOT EXISTS summary_refreshed_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_batch_pending_summary
+    ON ingestion_batch(ingestion_batch_id) WHERE summary_refreshed_at IS NULL;
+
+-- Window-exit lookups: rows that aged out of the 12/24-month aggregates
+CREATE INDEX IF NOT EXISTS idx_fact_311_created
+    ON fact_311(created_date);
+
+CREATE INDEX IF NOT EXISTS idx_fact_inspection_date
+    ON fact_inspection(inspection_date);
+
+-- One row per summary refresh (audit trail + data generation counter)
+CREATE TABLE IF NOT EXISTS property_summary_refresh (
+    refresh_id      SERIAL PRIMARY KEY,
+    mode            VARCHAR(20) NOT NULL,            -- incremental | full
+    started_at      TIMESTAMPTZ DEFAULT NOW(),
+    completed_at    TIMESTAMPTZ,
+    rows_recomputed INTEGER,
+    batch_ids       INTEGER[]
+);
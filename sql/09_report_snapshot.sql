@@ -0,0 +1,28 @@
+-- CIVITAS – Precomputed report snapshots
+-- Run after 08_summary_refresh.sql
+
+-- Locations each incremental refresh recomputed (NULL for a full rebuild),
+-- so downstream stages can follow the same dirty set
+ALTER TABLE property_summary_refresh
+    ADD COLUMN IF NOT EXISTS location_sks INTEGER[];
+
+-- Set once refresh_report_snapshots() has folded the refresh in
+ALTER TABLE property_summary_refresh
+    ADD COLUMN IF NOT EXISTS snapshots_built_at TIMESTAMPTZ;
+
+-- Per-location report data (everything except report_id, timestamps, the
+-- narrative and the parts shared by many locations: data freshness and
+-- neighborhood baselines). Maintained by refresh_report_snapshots()
+-- (sql/views/06_report.sql) for a bounded set of locations.
+CREATE TABLE IF NOT EXISTS report_snapshot (
+    location_sk        INTEGER PRIMARY KEY,
+    refresh_id         INTEGER NOT NULL,      -- generation the snapshot was built at
+    score              JSON NOT NULL,
+    flags              JSON NOT NULL,
+    supporting_records JSON NOT NULL,         -- compact text, served as-is
+    built_at           TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Recently reported locations are part of the snapshot set
+CREATE INDEX IF NOT EXISTS idx_report_audit_generated_at
+    ON report_audit(generated_at);
@@ -0,0 +1,27 @@
+-- CIVITAS – batch_job_item as a durable work queue
+-- Run after 04_batch.sql
+--
+-- Batch workers (tasks/batch_worker.py) claim pending items with
+-- SELECT ... FOR UPDATE SKIP LOCKED and mark them processing under a lease
+-- (locked_by / locked_at). A worker that dies leaves its items processing;
+-- once the lease expires another worker claims them again. Transient
+-- failures go back to pending until next_attempt_at.
+
+ALTER TABLE batch_job_item
+    ADD COLUMN IF NOT EXISTS attempts        INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS locked_by       TEXT,
+    ADD COLUMN IF NOT EXISTS locked_at       TIMESTAMPTZ;
+
+-- Claim scan: each active batch's unfinished items, in upload order (claims
+-- go round-robin across batches)
+DROP INDEX IF EXISTS idx_batch_job_item_queue;
+CREATE INDEX IF NOT EXISTS idx_batch_job_item_claim
+    ON batch_job_item(batch_id, item_id) WHERE status IN ('pending', 'processing');
+
+CREATE INDEX IF NOT EXISTS idx_batch_job_active
+    ON batch_job(created_at) WHERE status IN ('pending', 'processing');
+
+-- Progress tailing by the SSE stream
+CREATE INDEX IF NOT EXISTS idx_batch_job_item_progress
+    ON batch_job_item(batch_id, updated_at);
@@ -0,0 +1,40 @@
+-- CIVITAS – Normalized street-only address key
+-- Run after 01_indexes.sql
+--
+-- ETL addresses carry a ", CHICAGO IL 606xx" suffix, while lookups and
+-- autocomplete prefixes usually do not. street_key is the street part only
+-- (house number, direction, name, type), upper-cased with whitespace
+-- collapsed and street-type spelling variants folded (PKY → PKWY, ...), so
+-- both sides compare on one indexed column. Writers set it with
+-- normalize_street_key(full_address_standardized).
+
+CREATE OR REPLACE FUNCTION normalize_street_key(address TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT NULLIF(string_agg(COALESCE(a.canonical, t.token), ' ' ORDER BY t.ord), '')
+    FROM regexp_split_to_table(
+             upper(btrim(split_part(address, ',', 1))), '\s+'
+         ) WITH ORDINALITY AS t(token, ord)
+    LEFT JOIN (VALUES
+        ('PKY', 'PKWY'), ('PKW', 'PKWY'), ('PWY', 'PKWY'), ('PARKWY', 'PKWY'),
+        ('AV', 'AVE'), ('AVN', 'AVE'),
+        ('BL', 'BLVD'), ('BLV', 'BLVD'), ('BOUL', 'BLVD'),
+        ('TERR', 'TER'),
+        ('EXPWY', 'EXPY'), ('EXPW', 'EXPY'),
+        ('CRT', 'CT'),
+        ('HWAY', 'HWY')
+    ) AS a(alias, canonical) ON a.alias = t.token
+$$;
+
+ALTER TABLE dim_location
+    ADD COLUMN IF NOT EXISTS street_key TEXT;
+
+-- One-time backfill (re-running only touches rows whose key is stale);
+-- updated_at is left alone so the summary refresh does not see the rows as new
+UPDATE dim_location
+   SET street_key = normalize_street_key(full_address_standardized)
+ WHERE street_key IS DISTINCT FROM normalize_street_key(full_address_standardized);
+
+-- Equality (address resolution) and prefix range scans (autocomplete)
+CREATE INDEX IF NOT EXISTS idx_dim_location_street_key
+    ON dim_location(street_key text_pattern_ops);
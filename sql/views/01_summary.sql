@@ -1,18 +1,29 @@
--- CIVITAS – Layer 1: VIEW_PROPERTY_SUMMARY (Materialized)
+-- CIVITAS – Layer 1: VIEW_PROPERTY_SUMMARY
 -- Aggregates all fact table metrics per location_sk.
 -- Run after schema and data load.
 --
--- This is a materialized view for performance — the 6-table LEFT JOIN with
--- 28+ aggregates is expensive to compute on-the-fly.  Refresh after ETL
--- ingestion or on a schedule.
-
--- Drop the old regular view if it exists (safe — only runs on first migration)
+-- Aggregating six fact tables for every location is expensive to compute
+-- on-the-fly, so its output is persisted:
+--   view_property_summary_source – the aggregate query itself
+--   property_summary             – one stored row per location_sk, maintained
+--                                  incrementally by refresh_property_summary()
+--                                  (views/05_refresh.sql) after ETL
+--   view_property_summary        – thin select over property_summary; what
+--                                  every reader queries
+
+-- Drop the old views if they exist (safe — only runs on first migration)
 DROP VIEW IF EXISTS view_property_score CASCADE;
 DROP VIEW IF EXISTS view_property_flags CASCADE;
-DROP MATERIALIZED VIEW IF EXISTS view_property_summary;
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_matviews WHERE matviewname = 'view_property_summary') THEN
+        DROP MATERIALIZED VIEW view_property_summary CASCADE;
+    END IF;
+END $$;
 DROP VIEW IF EXISTS view_property_summary CASCADE;
+DROP VIEW IF EXISTS view_property_summary_source CASCADE;
 
-CREATE MATERIALIZED VIEW view_property_summary AS
+CREATE VIEW view_property_summary_source AS
 SELECT
     l.location_sk,
     l.full_address_standardized,
@@ -25,87 +36,131 @@ SELECT
     l.lon,
 
     -- ── Violation aggregates ──────────────────────────────────────
-    COUNT(DISTINCT v.violation_sk)                                                  AS total_violations,
-
-    COUNT(DISTINCT v.violation_sk)
-        FILTER (WHERE UPPER(v.violation_status) = 'OPEN')                           AS active_violation_count,
-
-    COALESCE(
-        MAX(NOW()::DATE - v.violation_date)
-            FILTER (WHERE UPPER(v.violation_status) = 'OPEN'),
-        0
-    )                                                                               AS oldest_open_violation_days,
-
-    -- violations in the prior calendar year
-    COUNT(DISTINCT v.violation_sk)
-        FILTER (WHERE v.violation_date >= DATE_TRUNC('year', NOW()) - INTERVAL '1 year'
-                  AND v.violation_date  < DATE_TRUNC('year', NOW()))                AS violations_prev_year,
-
-    -- violations in the current calendar year
-    COUNT(DISTINCT v.violation_sk)
-        FILTER (WHERE v.violation_date >= DATE_TRUNC('year', NOW()))                AS violations_this_year,
-
-    -- failed inspections linked to violations
-    COUNT(DISTINCT v.violation_sk)
-        FILTER (WHERE UPPER(v.inspection_status) LIKE '%FAIL%')                     AS failed_violation_count,
+    v.total_violations,
+    v.active_violation_count,
+    COALESCE(v.oldest_open_violation_days, 0)                                       AS oldest_open_violation_days,
+    v.aged_open_violation_count,
+    v.violations_prev_year,
+    v.violations_this_year,
+    v.failed_violation_count,
 
     -- ── Inspection aggregates (food_inspections) ──────────────────
-    COUNT(DISTINCT i.inspection_sk)
-        FILTER (WHERE i.results ILIKE '%fail%'
-                  AND i.inspection_date >= NOW() - INTERVAL '24 months')            AS failed_inspection_count_24mo,
+    i.failed_inspection_count_24mo,
 
     -- ── Permit aggregates ─────────────────────────────────────────
-    ROUND(AVG(p.processing_time))                                                   AS avg_permit_processing_days,
-
-    COUNT(DISTINCT p.permit_sk)
-        FILTER (WHERE p.processing_time > 90)                                       AS delayed_permit_count,
-
-    COUNT(DISTINCT p.permit_sk)
-        FILTER (WHERE UPPER(p.permit_type) LIKE '%WRECKING%DEMOLITION%')            AS demolition_permit_count,
+    p.avg_permit_processing_days,
+    p.delayed_permit_count,
+    p.demolition_permit_count,
 
     -- ── 311 aggregates ────────────────────────────────────────────
-    COUNT(DISTINCT sr.sr_sk)
-        FILTER (WHERE sr.created_date >= NOW() - INTERVAL '12 months')              AS sr_count_12mo,
+    sr.sr_count_12mo,
 
     -- ── Tax lien aggregates ───────────────────────────────────────
-    COUNT(DISTINCT tl.lien_sk)                                                      AS total_lien_events,
-
-    MAX(tl.tax_sale_year)                                                           AS latest_lien_year,
-
-    COALESCE(SUM(tl.total_amount_offered), 0)                                       AS total_lien_amount,
+    tl.total_lien_events,
+    tl.latest_lien_year,
+    COALESCE(tl.total_lien_amount, 0)                                               AS total_lien_amount,
 
     -- ── Vacant building aggregates ──────────────────────────────
-    COUNT(DISTINCT vb.vacant_building_sk)                                            AS vacant_violation_count,
-
-    COALESCE(SUM(vb.current_amount_due), 0)                                         AS total_vacant_fines_due,
+    vb.vacant_violation_count,
+    COALESCE(vb.total_vacant_fines_due, 0)                                          AS total_vacant_fines_due,
 
     -- data freshness helpers
-    MAX(v.updated_at)                                                               AS violations_updated_at,
-    MAX(p.updated_at)                                                               AS permits_updated_at,
-    MAX(i.updated_at)                                                               AS inspections_updated_at,
-    MAX(sr.updated_at)                                                              AS sr_updated_at,
-    MAX(tl.updated_at)                                                              AS liens_updated_at,
-    MAX(vb.updated_at)                                                              AS vacant_buildings_updated_at
+    v.violations_updated_at,
+    p.permits_updated_at,
+    i.inspections_updated_at,
+    sr.sr_updated_at,
+    tl.liens_updated_at,
+    vb.vacant_buildings_updated_at
 
 FROM dim_location l
-LEFT JOIN fact_violation  v  ON v.location_sk  = l.location_sk
-LEFT JOIN fact_inspection i  ON i.location_sk  = l.location_sk
-LEFT JOIN fact_permit     p  ON p.location_sk  = l.location_sk
-LEFT JOIN fact_311        sr ON sr.location_sk = l.location_sk
-LEFT JOIN fact_tax_lien   tl ON tl.location_sk = l.location_sk
-LEFT JOIN fact_vacant_building vb ON vb.location_sk = l.location_sk
-
-GROUP BY
-    l.location_sk,
-    l.full_address_standardized,
-    l.house_number,
-    l.street_direction,
-    l.street_name,
-    l.street_type,
-    l.zip,
-    l.lat,
-    l.lon;
 
--- Unique index for fast single-location lookups
-CREATE UNIQUE INDEX IF NOT EXISTS idx_matview_summary_loc
-    ON view_property_summary(location_sk);
+-- Each fact table is aggregated on its own, so a location's rows are read
+-- once per table instead of once per combination of rows across tables.
+-- LATERAL keeps the location_sk filter of an incremental refresh inside
+-- each aggregate (an index range scan per location); an aggregate without
+-- GROUP BY always returns one row, so counts come out as 0, never NULL.
+
+LEFT JOIN LATERAL (
+    SELECT
+        COUNT(*)                                                                    AS total_violations,
+        COUNT(*) FILTER (WHERE UPPER(fv.violation_status) = 'OPEN')                 AS active_violation_count,
+        MAX(NOW()::DATE - fv.violation_date)
+            FILTER (WHERE UPPER(fv.violation_status) = 'OPEN')                      AS oldest_open_violation_days,
+        -- open violations older than 180 days (AGED_ENFORCEMENT_RISK support)
+        COUNT(*)
+            FILTER (WHERE UPPER(fv.violation_status) = 'OPEN'
+                      AND fv.violation_date < NOW() - INTERVAL '180 days')          AS aged_open_violation_count,
+        -- violations in the prior calendar year
+        COUNT(*)
+            FILTER (WHERE fv.violation_date >= DATE_TRUNC('year', NOW()) - INTERVAL '1 year'
+                      AND fv.violation_date  < DATE_TRUNC('year', NOW()))           AS violations_prev_year,
+        -- violations in the current calendar year
+        COUNT(*)
+            FILTER (WHERE fv.violation_date >= DATE_TRUNC('year', NOW()))           AS violations_this_year,
+        -- failed inspections linked to violations
+        COUNT(*) FILTER (WHERE UPPER(fv.inspection_status) LIKE '%FAIL%')           AS failed_violation_count,
+        MAX(fv.updated_at)                                                          AS violations_updated_at
+    FROM fact_violation fv
+    WHERE fv.location_sk = l.location_sk
+) v ON TRUE
+
+LEFT JOIN LATERAL (
+    SELECT
+        COUNT(*)
+            FILTER (WHERE fi.results ILIKE '%fail%'
+                      AND fi.inspection_date >= NOW() - INTERVAL '24 months')       AS failed_inspection_count_24mo,
+        MAX(fi.updated_at)                                                          AS inspections_updated_at
+    FROM fact_inspection fi
+    WHERE fi.location_sk = l.location_sk
+) i ON TRUE
+
+LEFT JOIN LATERAL (
+    SELECT
+        ROUND(AVG(fp.processing_time))                                              AS avg_permit_processing_days,
+        COUNT(*) FILTER (WHERE fp.processing_time > 90)                             AS delayed_permit_count,
+        COUNT(*)
+            FILTER (WHERE UPPER(fp.permit_type) LIKE '%WRECKING%DEMOLITION%')       AS demolition_permit_count,
+        MAX(fp.updated_at)                                                          AS permits_updated_at
+    FROM fact_permit fp
+    WHERE fp.location_sk = l.location_sk
+) p ON TRUE
+
+LEFT JOIN LATERAL (
+    SELECT
+        COUNT(*) FILTER (WHERE f3.created_date >= NOW() - INTERVAL '12 months')     AS sr_count_12mo,
+        MAX(f3.updated_at)                                                          AS sr_updated_at
+    FROM fact_311 f3
+    WHERE f3.location_sk = l.location_sk
+) sr ON TRUE
+
+LEFT JOIN LATERAL (
+    SELECT
+        COUNT(*)                                                                    AS total_lien_events,
+        MAX(ft.tax_sale_year)                                                       AS latest_lien_year,
+        SUM(ft.total_amount_offered)                                                AS total_lien_amount,
+        MAX(ft.updated_at)                                                          AS liens_updated_at
+    FROM fact_tax_lien ft
+    WHERE ft.location_sk = l.location_sk
+) tl ON TRUE
+
+LEFT JOIN LATERAL (
+    SELECT
+        COUNT(*)                                                                    AS vacant_violation_count,
+        SUM(fb.current_amount_due)                                                  AS total_vacant_fines_due,
+        MAX(fb.updated_at)                                                          AS vacant_buildings_updated_at
+    FROM fact_vacant_building fb
+    WHERE fb.location_sk = l.location_sk
+) vb ON TRUE;
+
+-- ── Persisted summary ─────────────────────────────────────────────────────────
+
+DROP TABLE IF EXISTS property_summary;
+
+CREATE TABLE property_summary AS
+SELECT * FROM view_property_summary_source;
+
+-- Primary key doubles as the index for fast single-location lookups
+ALTER TABLE property_summary ADD PRIMARY KEY (location_sk);
+
+CREATE VIEW view_property_summary AS
+SELECT * FROM property_summary;
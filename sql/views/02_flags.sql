@@ -1,284 +1,155 @@
 -- CIVITAS – Layer 2: VIEW_PROPERTY_FLAGS
 -- One row per triggered flag per location_sk.
--- Joins to rule_config for severity_score and description.
+-- Evaluates all 15 rules in one pass over the summary and joins to
+-- rule_config (once) for severity_score and description.
 -- Run after 01_summary.sql view exists.
-
-CREATE OR REPLACE VIEW view_property_flags AS
-
--- ─────────────────────────────────────────────────────────────────────────────
--- Category A: Active Enforcement Risk
--- ─────────────────────────────────────────────────────────────────────────────
-
--- A1: ACTIVE_MUNICIPAL_VIOLATION – any open violation
-SELECT
-    s.location_sk,
-    'ACTIVE_MUNICIPAL_VIOLATION'                    AS flag_code,
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.active_violation_count                        AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'ACTIVE_MUNICIPAL_VIOLATION' AND rc.is_active = TRUE
-WHERE s.active_violation_count > 0
-
-UNION ALL
-
--- A2: AGED_ENFORCEMENT_RISK – open violation older than 180 days
-SELECT
-    s.location_sk,
-    'AGED_ENFORCEMENT_RISK',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    -- count of specifically aged-open violations
-    (
-        SELECT COUNT(*)
-        FROM fact_violation fv2
-        WHERE fv2.location_sk    = s.location_sk
-          AND UPPER(fv2.violation_status) = 'OPEN'
-          AND fv2.violation_date  < NOW() - INTERVAL '180 days'
-    )                                               AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'AGED_ENFORCEMENT_RISK' AND rc.is_active = TRUE
-WHERE s.oldest_open_violation_days > 180
-
-UNION ALL
-
--- A3: SEVERE_ENFORCEMENT_ACTION – violation where inspection_status indicates failure
-SELECT
-    s.location_sk,
-    'SEVERE_ENFORCEMENT_ACTION',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.failed_violation_count                        AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'SEVERE_ENFORCEMENT_ACTION' AND rc.is_active = TRUE
-WHERE s.failed_violation_count > 0
-
-UNION ALL
-
--- A4: DEMOLITION_PERMIT_ISSUED – wrecking/demolition permit at this address
-SELECT
-    s.location_sk,
-    'DEMOLITION_PERMIT_ISSUED',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.demolition_permit_count                     AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'DEMOLITION_PERMIT_ISSUED' AND rc.is_active = TRUE
-WHERE s.demolition_permit_count > 0
-
-UNION ALL
-
--- A5: VACANT_BUILDING_VIOLATION – vacant building violation recorded
-SELECT
-    s.location_sk,
-    'VACANT_BUILDING_VIOLATION',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.vacant_violation_count                      AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'VACANT_BUILDING_VIOLATION' AND rc.is_active = TRUE
-WHERE s.vacant_violation_count > 0
-
-UNION ALL
-
--- ─────────────────────────────────────────────────────────────────────────────
--- Category B: Recurring Compliance Risk
--- ─────────────────────────────────────────────────────────────────────────────
-
--- B1: REPEAT_COMPLIANCE_ISSUE – 3+ total violations at address
-SELECT
-    s.location_sk,
-    'REPEAT_COMPLIANCE_ISSUE',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.total_violations                              AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'REPEAT_COMPLIANCE_ISSUE' AND rc.is_active = TRUE
-WHERE s.total_violations >= 3
-
-UNION ALL
-
--- B2: ABOVE_NORMAL_INSPECTION_FAIL – 2+ failed food inspections in 24 months
-SELECT
-    s.location_sk,
-    'ABOVE_NORMAL_INSPECTION_FAIL',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.failed_inspection_count_24mo                  AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'ABOVE_NORMAL_INSPECTION_FAIL' AND rc.is_active = TRUE
-WHERE s.failed_inspection_count_24mo >= 2
-
-UNION ALL
-
--- ─────────────────────────────────────────────────────────────────────────────
--- Category C: Regulatory Friction
--- ─────────────────────────────────────────────────────────────────────────────
-
--- C1: PERMIT_PROCESSING_DELAY – avg processing time > 90 days
-SELECT
-    s.location_sk,
-    'PERMIT_PROCESSING_DELAY',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.delayed_permit_count                          AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'PERMIT_PROCESSING_DELAY' AND rc.is_active = TRUE
-WHERE s.delayed_permit_count > 0
-
-UNION ALL
-
--- C2: ELEVATED_DISTRESS_SIGNALS – 5+ 311 requests in last 12 months
-SELECT
-    s.location_sk,
-    'ELEVATED_DISTRESS_SIGNALS',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.sr_count_12mo                                 AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'ELEVATED_DISTRESS_SIGNALS' AND rc.is_active = TRUE
-WHERE s.sr_count_12mo >= 5
-
-UNION ALL
-
--- C3: ENFORCEMENT_INTENSITY_INCREASE – violation count rose year-over-year
-SELECT
-    s.location_sk,
-    'ENFORCEMENT_INTENSITY_INCREASE',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.violations_this_year                          AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'ENFORCEMENT_INTENSITY_INCREASE' AND rc.is_active = TRUE
-WHERE s.violations_prev_year > 0
-  AND s.violations_this_year > s.violations_prev_year
-
-UNION ALL
-
--- ─────────────────────────────────────────────────────────────────────────────
--- Category D: Tax & Financial Risk
--- ─────────────────────────────────────────────────────────────────────────────
-
--- D1: ACTIVE_TAX_LIEN – offered at tax sale in current or prior year
+--
+-- Like the summary, the rules are evaluated once and stored:
+--   view_property_flags_source – the rule evaluation itself
+--   property_flag              – stored flags, refreshed for the same
+--                                locations as property_summary by
+--                                refresh_property_summary()
+--   view_property_flags        – thin select over property_flag
+
+DROP VIEW IF EXISTS view_property_flags CASCADE;
+DROP VIEW IF EXISTS view_property_flags_source CASCADE;
+
+-- A triggered rule, as produced by the per-location evaluation below
+DROP TYPE IF EXISTS property_rule_hit CASCADE;
+CREATE TYPE property_rule_hit AS (
+    flag_code        TEXT,
+    supporting_count BIGINT
+);
+
+CREATE VIEW view_property_flags_source AS
 SELECT
-    s.location_sk,
-    'ACTIVE_TAX_LIEN',
+    h.location_sk,
+    (h.hit).flag_code                               AS flag_code,
     rc.category,
     rc.description,
     rc.severity_score,
-    s.total_lien_events                             AS supporting_count,
+    (h.hit).supporting_count                        AS supporting_count,
     CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
       WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
+FROM (
+    -- One scan of the summary evaluates every rule: each element is a hit
+    -- when its predicate holds and NULL otherwise (dropped by the join below)
+    SELECT
+        s.location_sk,
+        UNNEST(ARRAY[
+        -- ─────────────────────────────────────────────────────────────────────
+        -- Category A: Active Enforcement Risk
+        -- ─────────────────────────────────────────────────────────────────────
+
+        -- A1: ACTIVE_MUNICIPAL_VIOLATION – any open violation
+        CASE WHEN s.active_violation_count > 0
+             THEN ('ACTIVE_MUNICIPAL_VIOLATION', s.active_violation_count)::property_rule_hit END,
+
+        -- A2: AGED_ENFORCEMENT_RISK – open violation older than 180 days
+        --     (supporting count: aged-open violations, precomputed in the summary)
+        CASE WHEN s.oldest_open_violation_days > 180
+             THEN ('AGED_ENFORCEMENT_RISK', s.aged_open_violation_count)::property_rule_hit END,
+
+        -- A3: SEVERE_ENFORCEMENT_ACTION – violation where inspection_status indicates failure
+        CASE WHEN s.failed_violation_count > 0
+             THEN ('SEVERE_ENFORCEMENT_ACTION', s.failed_violation_count)::property_rule_hit END,
+
+        -- A4: DEMOLITION_PERMIT_ISSUED – wrecking/demolition permit at this address
+        CASE WHEN s.demolition_permit_count > 0
+             THEN ('DEMOLITION_PERMIT_ISSUED', s.demolition_permit_count)::property_rule_hit END,
+
+        -- A5: VACANT_BUILDING_VIOLATION – vacant building violation recorded
+        CASE WHEN s.vacant_violation_count > 0
+             THEN ('VACANT_BUILDING_VIOLATION', s.vacant_violation_count)::property_rule_hit END,
+
+        -- ─────────────────────────────────────────────────────────────────────
+        -- Category B: Recurring Compliance Risk
+        -- ─────────────────────────────────────────────────────────────────────
+
+        -- B1: REPEAT_COMPLIANCE_ISSUE – 3+ total violations at address
+        CASE WHEN s.total_violations >= 3
+             THEN ('REPEAT_COMPLIANCE_ISSUE', s.total_violations)::property_rule_hit END,
+
+        -- B2: ABOVE_NORMAL_INSPECTION_FAIL – 2+ failed food inspections in 24 months
+        CASE WHEN s.failed_inspection_count_24mo >= 2
+             THEN ('ABOVE_NORMAL_INSPECTION_FAIL', s.failed_inspection_count_24mo)::property_rule_hit END,
+
+        -- ─────────────────────────────────────────────────────────────────────
+        -- Category C: Regulatory Friction
+        -- ─────────────────────────────────────────────────────────────────────
+
+        -- C1: PERMIT_PROCESSING_DELAY – avg processing time > 90 days
+        CASE WHEN s.delayed_permit_count > 0
+             THEN ('PERMIT_PROCESSING_DELAY', s.delayed_permit_count)::property_rule_hit END,
+
+        -- C2: ELEVATED_DISTRESS_SIGNALS – 5+ 311 requests in last 12 months
+        CASE WHEN s.sr_count_12mo >= 5
+             THEN ('ELEVATED_DISTRESS_SIGNALS', s.sr_count_12mo)::property_rule_hit END,
+
+        -- C3: ENFORCEMENT_INTENSITY_INCREASE – violation count rose year-over-year
+        CASE WHEN s.violations_prev_year > 0
+              AND s.violations_this_year > s.violations_prev_year
+             THEN ('ENFORCEMENT_INTENSITY_INCREASE', s.violations_this_year)::property_rule_hit END,
+
+        -- ─────────────────────────────────────────────────────────────────────
+        -- Category D: Tax & Financial Risk
+        -- ─────────────────────────────────────────────────────────────────────
+
+        -- D1: ACTIVE_TAX_LIEN – offered at tax sale in current or prior year
+        CASE WHEN s.latest_lien_year >= EXTRACT(YEAR FROM NOW()) - 1
+             THEN ('ACTIVE_TAX_LIEN', s.total_lien_events)::property_rule_hit END,
+
+        -- D2: AGED_TAX_LIEN – lien event older than 3 years with no resolution
+        CASE WHEN s.total_lien_events > 0
+              AND s.latest_lien_year <= EXTRACT(YEAR FROM NOW()) - 3
+             THEN ('AGED_TAX_LIEN', s.total_lien_events)::property_rule_hit END,
+
+        -- D3: MULTIPLE_LIEN_EVENTS – appeared at tax sale 2+ times
+        CASE WHEN s.total_lien_events >= 2
+             THEN ('MULTIPLE_LIEN_EVENTS', s.total_lien_events)::property_rule_hit END,
+
+        -- D4: HIGH_VALUE_LIEN – total lien amount > $10,000
+        CASE WHEN s.total_lien_amount > 10000
+             THEN ('HIGH_VALUE_LIEN', s.total_lien_events)::property_rule_hit END,
+
+        -- D5: HIGH_VACANT_BUILDING_FINES – outstanding vacant building fines > $5,000
+        CASE WHEN s.total_vacant_fines_due > 5000
+             THEN ('HIGH_VACANT_BUILDING_FINES', s.vacant_violation_count)::property_rule_hit END
+        ]) AS hit
+    FROM view_property_summary s
+) h
+
+-- rule_config is joined once, for all rules
 JOIN rule_config rc
-    ON rc.rule_code = 'ACTIVE_TAX_LIEN' AND rc.is_active = TRUE
-WHERE s.latest_lien_year >= EXTRACT(YEAR FROM NOW()) - 1
+    ON rc.rule_code = (h.hit).flag_code AND rc.is_active = TRUE;
 
-UNION ALL
+-- ── Persisted flags ───────────────────────────────────────────────────────────
 
--- D2: AGED_TAX_LIEN – lien event older than 3 years with no resolution
-SELECT
-    s.location_sk,
-    'AGED_TAX_LIEN',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.total_lien_events                             AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'AGED_TAX_LIEN' AND rc.is_active = TRUE
-WHERE s.total_lien_events > 0
-  AND s.latest_lien_year <= EXTRACT(YEAR FROM NOW()) - 3
+DROP TABLE IF EXISTS property_flag;
 
-UNION ALL
+CREATE TABLE property_flag AS
+SELECT * FROM view_property_flags_source;
 
--- D3: MULTIPLE_LIEN_EVENTS – appeared at tax sale 2+ times
-SELECT
-    s.location_sk,
-    'MULTIPLE_LIEN_EVENTS',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.total_lien_events                             AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'MULTIPLE_LIEN_EVENTS' AND rc.is_active = TRUE
-WHERE s.total_lien_events >= 2
+CREATE INDEX idx_property_flag_loc
+    ON property_flag(location_sk);
 
-UNION ALL
+CREATE INDEX idx_property_flag_code
+    ON property_flag(flag_code);
 
--- D4: HIGH_VALUE_LIEN – total lien amount > $10,000
-SELECT
-    s.location_sk,
-    'HIGH_VALUE_LIEN',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.total_lien_events                             AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'HIGH_VALUE_LIEN' AND rc.is_active = TRUE
-WHERE s.total_lien_amount > 10000
+CREATE VIEW view_property_flags AS
+SELECT * FROM property_flag;
 
-UNION ALL
+-- Stored flags carry rule_config values, so any rule edit must be visible to
+-- the next refresh (which then rebuilds in full)
+CREATE OR REPLACE FUNCTION rule_config_touch() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$;
 
--- D5: HIGH_VACANT_BUILDING_FINES – outstanding vacant building fines > $5,000
-SELECT
-    s.location_sk,
-    'HIGH_VACANT_BUILDING_FINES',
-    rc.category,
-    rc.description,
-    rc.severity_score,
-    s.vacant_violation_count                      AS supporting_count,
-    CASE rc.category WHEN 'C' THEN 'Informational' WHEN 'B' THEN 'Worth Noting'
-      WHEN 'A' THEN 'Review Recommended' WHEN 'D' THEN 'Action Required' END AS action_group
-FROM view_property_summary s
-JOIN rule_config rc
-    ON rc.rule_code = 'HIGH_VACANT_BUILDING_FINES' AND rc.is_active = TRUE
-WHERE s.total_vacant_fines_due > 5000;
+DROP TRIGGER IF EXISTS trg_rule_config_touch ON rule_config;
+CREATE TRIGGER trg_rule_config_touch
+    BEFORE UPDATE ON rule_config
+    FOR EACH ROW EXECUTE FUNCTION rule_config_touch();
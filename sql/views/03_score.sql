@@ -1,8 +1,15 @@
 -- CIVITAS – Layer 3: VIEW_PROPERTY_SCORE
 -- Aggregates triggered flags into a single activity score and level per location.
 -- Run after 02_flags.sql view exists.
+--
+-- view_property_score_source aggregates the stored flags; its output is kept
+-- in property_score (refreshed alongside property_flag) and
+-- view_property_score is a thin select over that table.
 
-CREATE OR REPLACE VIEW view_property_score AS
+DROP VIEW IF EXISTS view_property_score CASCADE;
+DROP VIEW IF EXISTS view_property_score_source CASCADE;
+
+CREATE VIEW view_property_score_source AS
 SELECT
     vpf.location_sk,
     SUM(vpf.severity_score)                         AS raw_score,
@@ -13,7 +20,23 @@ SELECT
         ELSE                                     'QUIET'
     END                                             AS activity_level,
     COUNT(*)                                        AS flag_count,
-    ARRAY_AGG(vpf.flag_code ORDER BY vpf.category, vpf.severity_score DESC)
+    -- flag_code breaks severity ties so stored and recomputed arrays agree
+    ARRAY_AGG(vpf.flag_code ORDER BY vpf.category, vpf.severity_score DESC, vpf.flag_code)
                                                     AS triggered_flags
-FROM view_property_flags vpf
+FROM property_flag vpf
 GROUP BY vpf.location_sk;
+
+-- ── Persisted score ───────────────────────────────────────────────────────────
+
+DROP TABLE IF EXISTS property_score;
+
+CREATE TABLE property_score AS
+SELECT * FROM view_property_score_source;
+
+ALTER TABLE property_score ADD PRIMARY KEY (location_sk);
+
+CREATE INDEX idx_property_score_level
+    ON property_score(activity_level);
+
+CREATE VIEW view_property_score AS
+SELECT * FROM property_score;
@@ -0,0 +1,174 @@
+-- CIVITAS – Layers 1–3 maintenance: refresh_property_summary() and
+-- notify_data_refreshed()
+-- Brings property_summary, property_flag and property_score up to date with
+-- the fact tables, recomputing the same set of locations in all three.
+-- Run after 01_summary.sql – 03_score.sql, sql/08_summary_refresh.sql and
+-- sql/09_report_snapshot.sql.
+--
+-- Incremental mode recomputes, in one transaction:
+--   • locations touched by batches not yet folded in (ingestion_batch_location)
+--   • locations with open violations (oldest_open_violation_days ages daily)
+--   • locations with a 311 request or inspection that has aged out of the
+--     12- / 24-month window since the last refresh
+--   • dim_location rows that are new or updated since the last refresh
+-- Falls back to a full rebuild when asked to, when no refresh has completed
+-- yet, when a calendar year has rolled over (prev/this-year counts and the
+-- tax lien rules shift for every location), when rule_config has changed,
+-- or when the dirty set exceeds p_full_threshold of the table.
+-- DELETE + INSERT (not TRUNCATE) keeps the table readable throughout.
+
+CREATE OR REPLACE FUNCTION refresh_property_summary(
+    p_full           BOOLEAN DEFAULT FALSE,
+    p_full_threshold REAL    DEFAULT 0.25
+)
+RETURNS TABLE (refresh_id INTEGER, mode TEXT, rows_recomputed BIGINT)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_refresh_id INTEGER;
+    v_last       TIMESTAMPTZ;
+    v_batches    INTEGER[];
+    v_total      BIGINT;
+    v_sks        INTEGER[];
+    v_mode       TEXT;
+    v_rows       BIGINT;
+BEGIN
+    -- One refresh at a time
+    PERFORM pg_advisory_xact_lock(hashtext('refresh_property_summary'));
+
+    SELECT MAX(r.started_at) INTO v_last
+      FROM property_summary_refresh r
+     WHERE r.completed_at IS NOT NULL;
+
+    SELECT COALESCE(ARRAY_AGG(b.ingestion_batch_id), '{}') INTO v_batches
+      FROM ingestion_batch b
+     WHERE b.summary_refreshed_at IS NULL
+       AND (b.status <> 'running' OR b.started_at < NOW() - INTERVAL '1 day');
+
+    SELECT COUNT(*) INTO v_total FROM property_summary;
+
+    v_mode := CASE WHEN p_full OR v_last IS NULL OR v_total = 0
+                     OR DATE_TRUNC('year', v_last) <> DATE_TRUNC('year', NOW())
+                     OR EXISTS (SELECT 1 FROM rule_config rc WHERE rc.updated_at >= v_last)
+                   THEN 'full' ELSE 'incremental' END;
+
+    IF v_mode = 'incremental' THEN
+        SELECT COALESCE(ARRAY_AGG(d.location_sk), '{}') INTO v_sks
+          FROM (
+                SELECT bl.location_sk
+                  FROM ingestion_batch_location bl
+                 WHERE bl.ingestion_batch_id = ANY(v_batches)
+                UNION
+                SELECT s.location_sk
+                  FROM property_summary s
+                 WHERE s.active_violation_count > 0
+                UNION
+                SELECT sr.location_sk
+                  FROM fact_311 sr
+                 WHERE sr.created_date >= v_last - INTERVAL '12 months'
+                   AND sr.created_date <  NOW()  - INTERVAL '12 months'
+                UNION
+                SELECT i.location_sk
+                  FROM fact_inspection i
+                 WHERE i.inspection_date >= v_last - INTERVAL '24 months'
+                   AND i.inspection_date <  NOW()  - INTERVAL '24 months'
+                UNION
+                SELECT l.location_sk
+                  FROM dim_location l
+                 WHERE l.updated_at >= v_last
+                    OR NOT EXISTS (
+                           SELECT 1 FROM property_summary s
+                            WHERE s.location_sk = l.location_sk)
+          ) d;
+
+        IF CARDINALITY(v_sks) > v_total * p_full_threshold THEN
+            v_mode := 'full';
+        END IF;
+    END IF;
+
+    INSERT INTO property_summary_refresh (mode, batch_ids, location_sks)
+    VALUES (v_mode, v_batches, CASE WHEN v_mode = 'incremental' THEN v_sks END)
+    RETURNING property_summary_refresh.refresh_id INTO v_refresh_id;
+
+    IF v_mode = 'full' THEN
+        DELETE FROM property_summary;
+        INSERT INTO property_summary
+        SELECT * FROM view_property_summary_source;
+        GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+        DELETE FROM property_flag;
+        INSERT INTO property_flag
+        SELECT * FROM view_property_flags_source;
+
+        DELETE FROM property_score;
+        INSERT INTO property_score
+        SELECT * FROM view_property_score_source;
+    ELSE
+        DELETE FROM property_summary s
+         WHERE s.location_sk = ANY(v_sks);
+        -- location_sk is a grouping column, so the filter is pushed down into
+        -- the aggregate and only the dirty locations' facts are read
+        INSERT INTO property_summary
+        SELECT * FROM view_property_summary_source src
+         WHERE src.location_sk = ANY(v_sks);
+        GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+        -- Flags and scores depend only on the location's own summary row
+        DELETE FROM property_flag f
+         WHERE f.location_sk = ANY(v_sks);
+        INSERT INTO property_flag
+        SELECT * FROM view_property_flags_source src
+         WHERE src.location_sk = ANY(v_sks);
+
+        DELETE FROM property_score sc
+         WHERE sc.location_sk = ANY(v_sks);
+        INSERT INTO property_score
+        SELECT * FROM view_property_score_source src
+         WHERE src.location_sk = ANY(v_sks);
+    END IF;
+
+    UPDATE ingestion_batch b
+       SET summary_refreshed_at = NOW()
+     WHERE b.ingestion_batch_id = ANY(v_batches);
+
+    UPDATE property_summary_refresh r
+       SET completed_at = clock_timestamp(), rows_recomputed = v_rows
+     WHERE r.refresh_id = v_refresh_id;
+
+    RETURN QUERY SELECT v_refresh_id, v_mode, v_rows;
+END;
+$$;
+
+-- notify_data_refreshed(): announce data generation p_refresh_id to the API
+-- workers (backend/app/services/cache_events.py). The payload carries the
+-- generation, the refresh mode and the source datasets whose batches the
+-- refresh folded in; it is delivered on commit and returned, or NULL when
+-- there is no such refresh. The refresh task and the admin endpoint both
+-- call this, so they cannot send different payloads.
+
+CREATE OR REPLACE FUNCTION notify_data_refreshed(
+    p_refresh_id INTEGER,
+    p_channel    TEXT DEFAULT 'civitas_data_refreshed'
+)
+RETURNS TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_payload TEXT;
+BEGIN
+    SELECT json_build_object(
+               'generation', r.refresh_id,
+               'mode', r.mode,
+               'datasets', COALESCE(
+                   (SELECT json_agg(DISTINCT b.source_dataset ORDER BY b.source_dataset)
+                      FROM ingestion_batch b
+                     WHERE b.ingestion_batch_id = ANY(r.batch_ids)),
+                   '[]'::json))::text
+      INTO v_payload
+      FROM property_summary_refresh r
+     WHERE r.refresh_id = p_refresh_id;
+
+    IF v_payload IS NOT NULL THEN
+        PERFORM pg_notify(p_channel, v_payload);
+    END IF;
+    RETURN v_payload;
+END;
+$$;
@@ -0,0 +1,259 @@
+-- CIVITAS – Report data functions and report_snapshot maintenance
+-- Run after 01_summary.sql – 03_score.sql, sql/08_summary_refresh.sql and
+-- sql/09_report_snapshot.sql.
+--
+-- report_location_data() renders the per-location part of a report (score,
+-- flags, supporting records) as compact JSON text, byte-identical to the
+-- API's own serialization of the equivalent Python values, so the text can
+-- be passed straight through to responses and report_audit.
+-- view_report_data_freshness renders the data_freshness block.
+--
+-- refresh_report_snapshots() stores report_location_data() for a bounded
+-- set of locations (top-N by activity score plus recently reported ones),
+-- rebuilding only locations that summary refreshes have touched since its
+-- last run. The API serves a report from report_snapshot when the latest
+-- refresh has been folded in (property_summary_refresh.snapshots_built_at).
+
+-- ── JSON text helpers ─────────────────────────────────────────────────────────
+-- Each renders one value as the text json.dumps() gives for its asyncpg value.
+
+CREATE OR REPLACE FUNCTION json_text(v ANYELEMENT)
+RETURNS TEXT LANGUAGE sql STABLE AS $$
+    SELECT COALESCE(to_json(v)::text, 'null')
+$$;
+
+-- datetime.isoformat() of a UTC timestamp: microseconds only when non-zero
+CREATE OR REPLACE FUNCTION json_text_ts(v TIMESTAMPTZ)
+RETURNS TEXT LANGUAGE sql STABLE AS $$
+    SELECT COALESCE(
+        '"' || to_char(v AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS')
+            || CASE WHEN EXTRACT(MICROSECONDS FROM v)::bigint % 1000000 <> 0
+                    THEN to_char(v AT TIME ZONE 'UTC', '.US') ELSE '' END
+            || '+00:00"',
+        'null')
+$$;
+
+-- Decimal → float → repr: 12.50 → 12.5, 100.00 → 100.0
+CREATE OR REPLACE FUNCTION json_text_num(v NUMERIC)
+RETURNS TEXT LANGUAGE sql IMMUTABLE AS $$
+    SELECT COALESCE(
+        CASE WHEN v = trunc(v) THEN trunc(v)::text || '.0' ELSE rtrim(v::text, '0') END,
+        'null')
+$$;
+
+-- ── Per-location report data ──────────────────────────────────────────────────
+-- Same columns, order and limits as rule_engine's get_<type>() functions.
+
+CREATE OR REPLACE FUNCTION report_location_data(p_location_sk INTEGER, p_limit INTEGER DEFAULT 50)
+RETURNS TABLE (score TEXT, flags TEXT, supporting_records TEXT)
+LANGUAGE sql STABLE AS $$
+SELECT
+    COALESCE(
+        (SELECT json_build_object(
+                    'raw_score', sc.raw_score, 'activity_level', sc.activity_level,
+                    'flag_count', sc.flag_count, 'triggered_flags', sc.triggered_flags)
+           FROM view_property_score sc
+          WHERE sc.location_sk = p_location_sk),
+        json_build_object('raw_score', 0, 'activity_level', 'QUIET',
+                          'flag_count', 0, 'triggered_flags', '[]'::json)
+    )::text,
+
+    (SELECT '[' || COALESCE(string_agg(
+                '{"flag_code":'         || json_text(r.flag_code)
+             || ',"category":'          || json_text(r.category)
+             || ',"description":'       || json_text(r.description)
+             || ',"severity_score":'    || json_text(r.severity_score)
+             || ',"supporting_count":'  || json_text(r.supporting_count)
+             || ',"action_group":'      || json_text(r.action_group)
+             || '}', ','), '') || ']'
+       FROM (SELECT f.* FROM view_property_flags f
+              WHERE f.location_sk = p_location_sk
+              ORDER BY f.category, f.severity_score DESC, f.flag_code) r),
+
+    '{"violations":'
+    || (SELECT '[' || COALESCE(string_agg(
+                '{"violation_date":'        || json_text(r.violation_date)
+             || ',"violation_code":'        || json_text(r.violation_code)
+             || ',"violation_status":'      || json_text(r.violation_status)
+             || ',"violation_description":' || json_text(r.violation_description)
+             || ',"inspection_status":'     || json_text(r.inspection_status)
+             || '}', ','), '') || ']'
+          FROM (SELECT v.* FROM fact_violation v
+                 WHERE v.location_sk = p_location_sk
+                 ORDER BY v.violation_date DESC NULLS LAST LIMIT p_limit) r)
+
+    || ',"inspections":'
+    || (SELECT '[' || COALESCE(string_agg(
+                '{"inspection_date":'  || json_text(r.inspection_date)
+             || ',"dba_name":'         || json_text(r.dba_name)
+             || ',"facility_type":'    || json_text(r.facility_type)
+             || ',"risk_level":'       || json_text(r.risk_level)
+             || ',"inspection_type":'  || json_text(r.inspection_type)
+             || ',"results":'          || json_text(r.results)
+             || '}', ','), '') || ']'
+          FROM (SELECT i.* FROM fact_inspection i
+                 WHERE i.location_sk = p_location_sk
+                 ORDER BY i.inspection_date DESC NULLS LAST LIMIT p_limit) r)
+
+    || ',"permits":'
+    || (SELECT '[' || COALESCE(string_agg(
+                '{"permit_number":'           || json_text(r.permit_number)
+             || ',"permit_type":'             || json_text(r.permit_type)
+             || ',"permit_status":'           || json_text(r.permit_status)
+             || ',"application_start_date":'  || json_text(r.application_start_date)
+             || ',"issue_date":'              || json_text(r.issue_date)
+             || ',"processing_time":'         || json_text(r.processing_time)
+             || '}', ','), '') || ']'
+          FROM (SELECT p.* FROM fact_permit p
+                 WHERE p.location_sk = p_location_sk
+                 ORDER BY p.application_start_date DESC NULLS LAST LIMIT p_limit) r)
+
+    || ',"tax_liens":'
+    || (SELECT '[' || COALESCE(string_agg(
+                '{"tax_sale_year":'         || json_text(r.tax_sale_year)
+             || ',"lien_type":'             || json_text(r.lien_type)
+             || ',"sold_at_sale":'          || json_text(r.sold_at_sale)
+             || ',"total_amount_offered":'  || json_text_num(r.total_amount_offered)
+             || ',"buyer_name":'            || json_text(r.buyer_name)
+             || '}', ','), '') || ']'
+          FROM (SELECT tl.* FROM fact_tax_lien tl
+                 WHERE tl.location_sk = p_location_sk
+                    OR tl.parcel_sk IN (SELECT dp.parcel_sk FROM dim_parcel dp
+                                         WHERE dp.location_sk = p_location_sk)
+                 ORDER BY tl.tax_sale_year DESC) r)
+
+    || ',"service_311":'
+    || (SELECT '[' || COALESCE(string_agg(
+                '{"source_id":'      || json_text(r.source_id)
+             || ',"sr_type":'        || json_text(r.sr_type)
+             || ',"sr_short_code":'  || json_text(r.sr_short_code)
+             || ',"status":'         || json_text(r.status)
+             || ',"created_date":'   || json_text_ts(r.created_date)
+             || ',"closed_date":'    || json_text_ts(r.closed_date)
+             || '}', ','), '') || ']'
+          FROM (SELECT s.* FROM fact_311 s
+                 WHERE s.location_sk = p_location_sk
+                 ORDER BY s.created_date DESC NULLS LAST LIMIT p_limit) r)
+
+    || ',"vacant_buildings":'
+    || (SELECT '[' || COALESCE(string_agg(
+                '{"docket_number":'            || json_text(r.docket_number)
+             || ',"violation_number":'         || json_text(r.violation_number)
+             || ',"issued_date":'              || json_text(r.issued_date)
+             || ',"last_hearing_date":'        || json_text(r.last_hearing_date)
+             || ',"violation_type":'           || json_text(r.violation_type)
+             || ',"entity_or_person":'         || json_text(r.entity_or_person)
+             || ',"disposition_description":'  || json_text(r.disposition_description)
+             || ',"total_fines":'              || json_text_num(r.total_fines)
+             || ',"current_amount_due":'       || json_text_num(r.current_amount_due)
+             || ',"total_paid":'               || json_text_num(r.total_paid)
+             || '}', ','), '') || ']'
+          FROM (SELECT vb.* FROM fact_vacant_building vb
+                 WHERE vb.location_sk = p_location_sk
+                 ORDER BY vb.issued_date DESC NULLS LAST LIMIT p_limit) r)
+    || '}'
+$$;
+
+-- ── Data freshness ────────────────────────────────────────────────────────────
+-- Latest completed batch per source dataset (same keys as get_data_freshness).
+-- A view rather than a function so it is inlined into the caller's plan.
+
+CREATE OR REPLACE VIEW view_report_data_freshness AS
+SELECT '{"violations_as_of":'        || json_text_ts(MAX(b.completed_at) FILTER (WHERE b.source_dataset = 'building_violations'))
+    || ',"inspections_as_of":'       || json_text_ts(MAX(b.completed_at) FILTER (WHERE b.source_dataset = 'food_inspections'))
+    || ',"permits_as_of":'           || json_text_ts(MAX(b.completed_at) FILTER (WHERE b.source_dataset = 'building_permits'))
+    || ',"tax_liens_as_of":'         || json_text_ts(MAX(b.completed_at) FILTER (WHERE b.source_dataset = 'cook_county_tax_liens'))
+    || ',"service_311_as_of":'       || json_text_ts(MAX(b.completed_at) FILTER (WHERE b.source_dataset = '311_service_requests'))
+    || ',"vacant_buildings_as_of":'  || json_text_ts(MAX(b.completed_at) FILTER (WHERE b.source_dataset = 'vacant_building_violations'))
+    || '}' AS freshness
+  FROM ingestion_batch b
+ WHERE b.status = 'complete';
+
+-- ── Snapshot maintenance ──────────────────────────────────────────────────────
+-- Target set: the p_top_n highest-scoring locations plus every location
+-- reported on in the last p_recent_days days. Snapshots outside the set are
+-- dropped; inside it, a snapshot is (re)built when it is missing or its
+-- location was recomputed by a refresh not yet folded in. A full summary
+-- refresh (location_sks IS NULL) rebuilds the whole set.
+
+CREATE OR REPLACE FUNCTION refresh_report_snapshots(
+    p_top_n       INTEGER DEFAULT 10000,
+    p_recent_days INTEGER DEFAULT 30
+)
+RETURNS TABLE (refresh_id INTEGER, mode TEXT, snapshots_built BIGINT, snapshots_removed BIGINT)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_refresh_id INTEGER;
+    v_pending    INTEGER[];
+    v_full       BOOLEAN;
+    v_changed    INTEGER[];
+    v_targets    INTEGER[];
+    v_built      BIGINT;
+    v_removed    BIGINT;
+BEGIN
+    -- One snapshot run at a time
+    PERFORM pg_advisory_xact_lock(hashtext('refresh_report_snapshots'));
+
+    SELECT MAX(r.refresh_id) INTO v_refresh_id
+      FROM property_summary_refresh r
+     WHERE r.completed_at IS NOT NULL;
+
+    IF v_refresh_id IS NULL THEN
+        RETURN;   -- nothing to snapshot before the first summary refresh
+    END IF;
+
+    SELECT COALESCE(ARRAY_AGG(r.refresh_id), '{}'),
+           COALESCE(BOOL_OR(r.location_sks IS NULL), FALSE)
+      INTO v_pending, v_full
+      FROM property_summary_refresh r
+     WHERE r.completed_at IS NOT NULL
+       AND r.snapshots_built_at IS NULL;
+
+    SELECT COALESCE(ARRAY_AGG(DISTINCT c.location_sk), '{}') INTO v_changed
+      FROM property_summary_refresh r,
+           UNNEST(r.location_sks) AS c(location_sk)
+     WHERE r.refresh_id = ANY(v_pending);
+
+    SELECT COALESCE(ARRAY_AGG(t.location_sk), '{}') INTO v_targets
+      FROM (
+            (SELECT sc.location_sk
+               FROM property_score sc
+              ORDER BY sc.raw_score DESC, sc.location_sk
+              LIMIT GREATEST(p_top_n, 0))
+            UNION
+            SELECT a.location_sk
+              FROM report_audit a
+             WHERE a.generated_at >= NOW() - MAKE_INTERVAL(days => GREATEST(p_recent_days, 0))
+               AND a.location_sk IS NOT NULL
+      ) t;
+
+    DELETE FROM report_snapshot s
+     WHERE s.location_sk <> ALL(v_targets);
+    GET DIAGNOSTICS v_removed = ROW_COUNT;
+
+    INSERT INTO report_snapshot AS s
+           (location_sk, refresh_id, score, flags, supporting_records, built_at)
+    SELECT t.location_sk, v_refresh_id,
+           d.score::json, d.flags::json, d.supporting_records::json, clock_timestamp()
+      FROM UNNEST(v_targets) AS t(location_sk)
+     CROSS JOIN LATERAL report_location_data(t.location_sk) d
+     WHERE v_full
+        OR t.location_sk = ANY(v_changed)
+        OR NOT EXISTS (SELECT 1 FROM report_snapshot e WHERE e.location_sk = t.location_sk)
+    ON CONFLICT (location_sk) DO UPDATE
+       SET refresh_id         = EXCLUDED.refresh_id,
+           score              = EXCLUDED.score,
+           flags              = EXCLUDED.flags,
+           supporting_records = EXCLUDED.supporting_records,
+           built_at           = EXCLUDED.built_at;
+    GET DIAGNOSTICS v_built = ROW_COUNT;
+
+    UPDATE property_summary_refresh r
+       SET snapshots_built_at = clock_timestamp()
+     WHERE r.refresh_id = ANY(v_pending);
+
+    RETURN QUERY SELECT v_refresh_id,
+                        CASE WHEN v_full THEN 'full' ELSE 'incremental' END,
+                        v_built, v_removed;
+END;
+$$;
@@ -35,6 +35,13 @@ psql "$DATABASE_URL" -f sql/views/03_score.sql -q
 psql "$DATABASE_URL" -f sql/views/04_neighborhood.sql -q
 psql "$DATABASE_URL" -f sql/05_tasks_and_quality.sql -q
 psql "$DATABASE_URL" -f sql/06_neighborhood.sql -q
+psql "$DATABASE_URL" -f sql/07_incremental_ingest.sql -q
+psql "$DATABASE_URL" -f sql/08_summary_refresh.sql -q
+psql "$DATABASE_URL" -f sql/09_report_snapshot.sql -q
+psql "$DATABASE_URL" -f sql/10_batch_queue.sql -q
+psql "$DATABASE_URL" -f sql/11_street_key.sql -q
+psql "$DATABASE_URL" -f sql/views/05_refresh.sql -q
+psql "$DATABASE_URL" -f sql/views/06_report.sql -q
 echo "Schema applied."
 
 # ── 3. Backend API ──────────────────────────────────────────────────
@@ -54,6 +61,11 @@ if [ "${SCHEDULER_ENABLED:-false}" = "true" ]; then
   echo "Starting task scheduler..."
   python3 -m tasks.common.runner --scheduler &
   SCHEDULER_PID=$!
+else
+  # Batch uploads are processed by queue workers, not by the API
+  echo "Starting batch workers..."
+  python3 -m tasks.common.runner --batch-worker &
+  SCHEDULER_PID=$!
 fi
 
 echo ""
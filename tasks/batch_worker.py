@@ -0,0 +1,109 @@
+"""
+CIVITAS Tasks – Batch queue workers.
+
+Each worker process runs backend.app.services.batch.run_worker(): it claims
+pending batch_job_item rows (FOR UPDATE SKIP LOCKED), resolves the address,
+generates the report and records the outcome. Workers share nothing but the
+table, so throughput grows with the number of processes, on this host or
+any other that can reach the database.
+
+The scheduler starts BATCH_WORKERS of them next to the cron jobs;
+`python -m tasks.common.runner --batch-worker` runs them on their own.
+SIGTERM stops a worker after handing its unfinished items back to the queue.
+A worker that exits with a non-zero code (crash, OOM kill) is restarted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+log = logging.getLogger(__name__)
+
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 1))
+
+# How often crashed workers are looked for and replaced
+SUPERVISE_SECONDS = 10
+
+
+def worker_id() -> str:
+    """Lease owner recorded in batch_job_item.locked_by."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def _serve() -> None:
+    # The API stack is only needed inside worker processes
+    from backend.app.database import close_pool, init_pool
+    from backend.app.services.address import shutdown_parse_pool
+    from backend.app.services.batch import run_worker
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    await init_pool()
+    try:
+        await run_worker(worker_id(), stop)
+    finally:
+        await close_pool()
+        shutdown_parse_pool()
+
+
+def _worker_main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    asyncio.run(_serve())
+
+
+def _spawn(ctx, name: str) -> multiprocessing.Process:
+    proc = ctx.Process(target=_worker_main, name=name, daemon=True)
+    proc.start()
+    return proc
+
+
+def start_workers(count: int = BATCH_WORKERS) -> list[multiprocessing.Process]:
+    """Start `count` worker processes; they exit with the parent."""
+    ctx = multiprocessing.get_context("spawn")
+    procs = [_spawn(ctx, f"batch-worker-{i}") for i in range(count)]
+    log.info("Started %d batch worker(s)", len(procs))
+    return procs
+
+
+def restart_crashed(procs: list[multiprocessing.Process]) -> int:
+    """
+    Replace, in place, workers that exited with a non-zero code; returns
+    how many were restarted. A clean exit (SIGTERM) is left alone.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    restarted = 0
+    for i, proc in enumerate(procs):
+        if proc.exitcode in (None, 0):
+            continue
+        log.error("Batch worker %s exited with code %s; restarting", proc.name, proc.exitcode)
+        procs[i] = _spawn(ctx, proc.name)
+        restarted += 1
+    return restarted
+
+
+def run_workers(count: int = BATCH_WORKERS) -> None:
+    """
+    Run `count` worker processes in the foreground until they all exit
+    cleanly, restarting any that crash.
+    """
+    procs = start_workers(max(1, count))
+    try:
+        while any(proc.exitcode != 0 for proc in procs):
+            time.sleep(SUPERVISE_SECONDS)
+            restart_crashed(procs)
+    except KeyboardInterrupt:
+        log.info("Batch workers shutting down")
+        for proc in procs:
+            proc.join()
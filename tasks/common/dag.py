@@ -0,0 +1,145 @@
+"""
+CIVITAS Tasks – Dependency-aware parallel executor.
+
+run_dag() runs a set of named nodes, each starting as soon as all of its
+dependencies have succeeded, with at most `max_workers` running at once.
+By default nodes run in a ProcessPoolExecutor (spawn context), so each gets
+its own interpreter and DB connections and CPU-bound work is not serialized
+by the GIL. Node callables must therefore be picklable (module-level
+functions or functools.partial over them).
+
+Nodes whose dependencies failed are not run and are reported as "skipped".
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Node:
+    name: str
+    func: Callable[[], Any]
+    deps: tuple[str, ...] = ()
+
+
+def _timed(func: Callable[[], Any]) -> float:
+    """Run func in the worker and return its wall time in seconds."""
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.INFO)
+    start = time.time()
+    func()
+    return time.time() - start
+
+
+def _check(nodes: list[Node]):
+    """Reject duplicate names, unknown dependencies and cycles."""
+    names = [n.name for n in nodes]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate DAG node names: {names}")
+    known = set(names)
+    for node in nodes:
+        missing = set(node.deps) - known
+        if missing:
+            raise ValueError(f"Node {node.name!r} depends on unknown {sorted(missing)}")
+
+    deps = {n.name: set(n.deps) for n in nodes}
+    done: set[str] = set()
+    while deps:
+        ready = [name for name, d in deps.items() if d <= done]
+        if not ready:
+            raise ValueError(f"Dependency cycle among {sorted(deps)}")
+        for name in ready:
+            done.add(name)
+            del deps[name]
+
+
+def run_dag(
+    nodes: list[Node],
+    max_workers: int,
+    executor: Optional[Executor] = None,
+) -> list[dict[str, Any]]:
+    """
+    Execute `nodes` respecting dependencies; returns one result per node
+    (in declaration order) with status ok | failed | skipped, start and
+    finish offsets from the DAG start, and the node's own duration.
+    """
+    _check(nodes)
+    max_workers = max(1, max_workers)
+    by_name = {n.name: n for n in nodes}
+    results: dict[str, dict[str, Any]] = {}
+    t0 = time.time()
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    running: dict[Any, str] = {}
+    started: dict[str, float] = {}
+
+    def _status(name: str) -> Optional[str]:
+        return results[name]["status"] if name in results else None
+
+    try:
+        while len(results) < len(nodes):
+            # Skip nodes whose dependencies did not succeed
+            for node in nodes:
+                if node.name in results or node.name in started:
+                    continue
+                bad = [d for d in node.deps if _status(d) in ("failed", "skipped")]
+                if bad:
+                    results[node.name] = {
+                        "name": node.name,
+                        "status": "skipped",
+                        "error": f"dependency failed: {', '.join(bad)}",
+                    }
+                    log.warning("DAG %s skipped (dependency failed: %s)", node.name, bad)
+
+            # Start every ready node while under the concurrency cap
+            for node in nodes:
+                if len(running) >= max_workers:
+                    break
+                if node.name in results or node.name in started:
+                    continue
+                if all(_status(d) == "ok" for d in node.deps):
+                    started[node.name] = time.time()
+                    running[executor.submit(_timed, node.func)] = node.name
+                    log.info("DAG %s started", node.name)
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                end = time.time()
+                result = {
+                    "name": name,
+                    "started_s": round(started[name] - t0, 1),
+                    "finished_s": round(end - t0, 1),
+                }
+                try:
+                    result["duration_s"] = round(fut.result(), 1)
+                    result["status"] = "ok"
+                    log.info("DAG %s completed in %.1fs", name, result["duration_s"])
+                except Exception as e:
+                    result["duration_s"] = round(end - started[name], 1)
+                    result["status"] = "failed"
+                    result["error"] = str(e)
+                    log.error("DAG %s failed: %s", name, e)
+                results[name] = result
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True)
+
+    return [results[n.name] for n in by_name.values()]
@@ -85,3 +85,126 @@ def log_task_failure(run_id: int, error: str):
         log.error("Task run_id=%d failed: %s", run_id, error)
     finally:
         conn.close()
+
+
+def refresh_property_summary(full: bool = False) -> dict[str, Any]:
+    """
+    Bring property_summary up to date via refresh_property_summary().
+
+    Only locations touched since the last refresh are recomputed unless
+    `full` is set (the SQL function also falls back to a full rebuild on its
+    own when the dirty set is large or the year has rolled over).
+    """
+    start = time.time()
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT refresh_id, mode, rows_recomputed FROM refresh_property_summary(%s)",
+                (full,),
+            )
+            refresh_id, mode, rows = cur.fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    duration = round(time.time() - start, 1)
+    log.info(
+        "Property summary refreshed (%s): %d rows recomputed in %.1fs",
+        mode, rows, duration,
+    )
+    return {
+        "refresh_id": refresh_id,
+        "mode": mode,
+        "rows_recomputed": rows,
+        "duration_s": duration,
+    }
+
+
+# Optional post-refresh stage: precomputed report data for a bounded set of
+# locations (the REPORT_SNAPSHOT_TOP_N highest scores plus everything reported
+# on in the last REPORT_SNAPSHOT_RECENT_DAYS days)
+REPORT_SNAPSHOTS_ENABLED    = os.environ.get("REPORT_SNAPSHOTS_ENABLED", "false").lower() == "true"
+REPORT_SNAPSHOT_TOP_N       = int(os.environ.get("REPORT_SNAPSHOT_TOP_N", 10000))
+REPORT_SNAPSHOT_RECENT_DAYS = int(os.environ.get("REPORT_SNAPSHOT_RECENT_DAYS", 30))
+
+
+def refresh_report_snapshots() -> Optional[dict[str, Any]]:
+    """
+    Bring report_snapshot up to date via refresh_report_snapshots().
+
+    Only locations recomputed by summary refreshes since the last run (or
+    newly in the top-N / recently reported set) are rebuilt. Returns None
+    when the stage is disabled, nothing has been refreshed yet, or it
+    failed; the API then simply builds those reports from the live tables.
+    """
+    if not REPORT_SNAPSHOTS_ENABLED:
+        return None
+    start = time.time()
+    conn = None
+    try:
+        conn = get_conn()
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT refresh_id, mode, snapshots_built, snapshots_removed"
+                " FROM refresh_report_snapshots(%s, %s)",
+                (REPORT_SNAPSHOT_TOP_N, REPORT_SNAPSHOT_RECENT_DAYS),
+            )
+            row = cur.fetchone()
+        conn.commit()
+    except psycopg2.Error as e:
+        log.warning("Report snapshot refresh failed: %s", e)
+        return None
+    finally:
+        if conn is not None:
+            conn.close()
+    if row is None:
+        return None
+    refresh_id, mode, built, removed = row
+    duration = round(time.time() - start, 1)
+    log.info(
+        "Report snapshots at generation %d (%s): %d built, %d removed in %.1fs",
+        refresh_id, mode, built, removed, duration,
+    )
+    return {
+        "refresh_id": refresh_id,
+        "mode": mode,
+        "snapshots_built": built,
+        "snapshots_removed": removed,
+        "duration_s": duration,
+    }
+
+
+DATA_REFRESHED_CHANNEL = "civitas_data_refreshed"
+
+
+def notify_data_refreshed(refresh_id: int) -> Optional[dict[str, Any]]:
+    """
+    NOTIFY API workers that data generation `refresh_id` is live.
+
+    The payload carries the generation, the refresh mode and the source
+    datasets whose batches the refresh folded in; workers use it to retire
+    cached reports and Socrata freshness entries (backend/app/services/
+    cache_events.py). Returns the payload, or None if it could not be sent;
+    a missed notification only means caches fall back to their TTLs.
+    """
+    conn = None
+    try:
+        conn = get_conn()
+        with conn.cursor() as cur:
+            # The payload is built by notify_data_refreshed() (sql/views/05_refresh.sql)
+            cur.execute(
+                "SELECT notify_data_refreshed(%s, %s)", (refresh_id, DATA_REFRESHED_CHANNEL),
+            )
+            row = cur.fetchone()
+            if row is None or row[0] is None:
+                return None
+        conn.commit()
+    except psycopg2.Error as e:
+        log.warning("Could not send %s notification: %s", DATA_REFRESHED_CHANNEL, e)
+        return None
+    finally:
+        if conn is not None:
+            conn.close()
+    payload = json.loads(row[0])
+    log.info("Notified %s: %s", DATA_REFRESHED_CHANNEL, payload)
+    return payload
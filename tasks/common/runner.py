@@ -3,7 +3,8 @@ CIVITAS Tasks – CLI runner and APScheduler daemon.
 
 Usage:
     python -m tasks.common.runner --task nightly_etl     # Run one task now
-    python -m tasks.common.runner --scheduler            # Start APScheduler loop
+    python -m tasks.common.runner --scheduler            # Start APScheduler loop + batch workers
+    python -m tasks.common.runner --batch-worker         # Run BATCH_WORKERS batch queue workers
     python -m tasks.common.runner --list                 # List registered tasks
 """
 
@@ -11,9 +12,13 @@ from __future__ import annotations
 
 import argparse
 import logging
+import signal
 import sys
 import traceback
 
+from tasks.batch_worker import (
+    BATCH_WORKERS, SUPERVISE_SECONDS, restart_crashed, run_workers, start_workers,
+)
 from tasks.common.db import log_task_start, log_task_complete, log_task_failure
 from tasks.common.registry import _register_all, get_task, list_tasks
 
@@ -41,8 +46,11 @@ def run_task(task_name: str, triggered_by: str = "cli"):
             sys.exit(1)
 
 
-def start_scheduler():
-    """Start APScheduler with cron triggers for all registered tasks."""
+def start_scheduler(workers=None):
+    """
+    Start APScheduler with cron triggers for all registered tasks. If batch
+    worker processes are given, an interval job restarts any that crash.
+    """
     from apscheduler.schedulers.blocking import BlockingScheduler
     from apscheduler.triggers.cron import CronTrigger
 
@@ -72,6 +80,17 @@ def start_scheduler():
         )
         log.info("Scheduled task %s with cron %s", name, cron_expr)
 
+    if workers:
+        scheduler.add_job(
+            restart_crashed,
+            "interval",
+            seconds=SUPERVISE_SECONDS,
+            args=[workers],
+            id="batch_workers",
+            name="batch_workers",
+            coalesce=True,
+        )
+
     log.info("Scheduler started with %d tasks", len(tasks))
     try:
         scheduler.start()
@@ -79,6 +98,12 @@ def start_scheduler():
         log.info("Scheduler shutting down")
 
 
+def _exit_on_sigterm(signum, frame):
+    # Unwind normally so daemon worker processes are terminated (and hand
+    # their items back) instead of being orphaned
+    sys.exit(0)
+
+
 def main():
     logging.basicConfig(
         level=logging.INFO,
@@ -89,6 +114,7 @@ def main():
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--task", help="Run a specific task by name")
     group.add_argument("--scheduler", action="store_true", help="Start the scheduler daemon")
+    group.add_argument("--batch-worker", action="store_true", help="Run batch queue workers")
     group.add_argument("--list", action="store_true", help="List all registered tasks")
     args = parser.parse_args()
 
@@ -104,8 +130,15 @@ def main():
         run_task(args.task)
         return
 
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
+    if args.batch_worker:
+        run_workers(BATCH_WORKERS)
+        return
+
     if args.scheduler:
-        start_scheduler()
+        workers = start_workers(BATCH_WORKERS) if BATCH_WORKERS > 0 else []
+        start_scheduler(workers)
 
 
 if __name__ == "__main__":
@@ -1,71 +1,80 @@
 """
 CIVITAS Task – Nightly ETL.
 
-Runs all 6 ingestion scripts sequentially, then refreshes the materialized view.
+Runs the 6 ingestion scripts as a dependency DAG, each in its own process
+(at most ETL_MAX_PARALLEL at once), then folds the loaded batches into
+property_summary (only the locations they touched are recomputed) and
+NOTIFYs API workers of the new data generation.
+Only tax liens waits on another script: it links to dim_parcel rows that
+permits populate.
 Schedule: 0 2 * * * (2 AM daily)
 """
 
 from __future__ import annotations
 
+import functools
+import importlib
 import logging
+import os
 import time
 from typing import Any
 
-from tasks.common.db import get_conn
+from tasks.common.dag import Node, run_dag
+from tasks.common.db import (
+    notify_data_refreshed,
+    refresh_property_summary,
+    refresh_report_snapshots,
+)
 from tasks.common.registry import register
 
 log = logging.getLogger(__name__)
 
-# Ingestion modules and their run() functions
+MAX_PARALLEL = int(os.environ.get("ETL_MAX_PARALLEL", "4"))
+
+# Ingestion modules (their run() functions) and the scripts they depend on
 SCRIPTS = [
-    ("violations", "backend.ingestion.ingest_violations"),
-    ("inspections", "backend.ingestion.ingest_inspections"),
-    ("permits", "backend.ingestion.ingest_permits"),
-    ("311", "backend.ingestion.ingest_311"),
-    ("tax_liens", "backend.ingestion.ingest_tax_liens"),
-    ("vacant_buildings", "backend.ingestion.ingest_vacant_buildings"),
+    ("violations", "backend.ingestion.ingest_violations", ()),
+    ("inspections", "backend.ingestion.ingest_inspections", ()),
+    ("permits", "backend.ingestion.ingest_permits", ()),
+    ("311", "backend.ingestion.ingest_311", ()),
+    ("tax_liens", "backend.ingestion.ingest_tax_liens", ("permits",)),
+    ("vacant_buildings", "backend.ingestion.ingest_vacant_buildings", ()),
 ]
 
 
+def _run_script(module_path: str):
+    importlib.import_module(module_path).run()
+
+
 def run() -> dict[str, Any]:
-    """Execute all ingestion scripts and refresh materialized view."""
+    """Execute all ingestion scripts and refresh the property summary."""
     total_start = time.time()
-    results = []
-
-    for name, module_path in SCRIPTS:
-        script_start = time.time()
-        try:
-            import importlib
-            mod = importlib.import_module(module_path)
-            mod.run()
-            duration = round(time.time() - script_start, 1)
-            results.append({"name": name, "status": "ok", "duration_s": duration})
-            log.info("ETL %s completed in %.1fs", name, duration)
-        except Exception as e:
-            duration = round(time.time() - script_start, 1)
-            results.append({"name": name, "status": "failed", "error": str(e), "duration_s": duration})
-            log.error("ETL %s failed: %s", name, e)
+    nodes = [
+        Node(name, functools.partial(_run_script, module_path), deps)
+        for name, module_path, deps in SCRIPTS
+    ]
+    results = run_dag(nodes, max_workers=MAX_PARALLEL)
 
-    # Refresh materialized view
-    matview_refreshed = False
+    summary_refresh = None
+    report_snapshots = None
     try:
-        conn = get_conn()
-        with conn.cursor() as cur:
-            cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY view_property_summary")
-        conn.commit()
-        conn.close()
-        matview_refreshed = True
-        log.info("Materialized view refreshed")
+        summary_refresh = refresh_property_summary()
     except Exception as e:
-        log.error("Materialized view refresh failed: %s", e)
+        log.error("Property summary refresh failed: %s", e)
+    else:
+        report_snapshots = refresh_report_snapshots()
+        notify_data_refreshed(summary_refresh["refresh_id"])
 
     total_duration = round(time.time() - total_start, 1)
     return {
         "scripts": results,
         "total_duration_s": total_duration,
-        "matview_refreshed": matview_refreshed,
+        "max_parallel": MAX_PARALLEL,
+        "summary_refresh": summary_refresh,
+        "report_snapshots": report_snapshots,
         "succeeded": sum(1 for r in results if r["status"] == "ok"),
         "failed": sum(1 for r in results if r["status"] == "failed"),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
     }
 
 
@@ -1,5 +1,12 @@
 """
-CIVITAS Task – Refresh Materialized View.
+CIVITAS Task – Refresh property summary.
+
+Recomputes property_summary for the locations touched since the last
+refresh (full rebuild on demand or when too many are dirty), then refreshes
+the community area materialized view built on top of it, optionally updates
+report_snapshot for the recomputed locations (REPORT_SNAPSHOTS_ENABLED),
+and finally NOTIFYs API workers so their caches move to the new data
+generation.
 
 Schedule: 0 3 * * * (3 AM daily, after ETL)
 """
@@ -10,26 +17,44 @@ import logging
 import time
 from typing import Any
 
-from tasks.common.db import get_conn
+from tasks.common.db import (
+    get_conn,
+    notify_data_refreshed,
+    refresh_property_summary,
+    refresh_report_snapshots,
+)
 from tasks.common.registry import register
 
 log = logging.getLogger(__name__)
 
 
-def run() -> dict[str, Any]:
-    """Refresh the property summary materialized view."""
+def run(full: bool = False) -> dict[str, Any]:
+    """Refresh property_summary and the community area summary view."""
     start = time.time()
+    summary = refresh_property_summary(full=full)
+
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY view_property_summary")
             cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY view_community_area_summary")
         conn.commit()
-        duration = round(time.time() - start, 1)
-        log.info("Materialized view refreshed in %.1fs", duration)
-        return {"duration_s": duration, "status": "refreshed"}
     finally:
         conn.close()
 
+    snapshots = refresh_report_snapshots()
+    notified = notify_data_refreshed(summary["refresh_id"])
+
+    duration = round(time.time() - start, 1)
+    log.info("Scores refreshed in %.1fs", duration)
+    return {
+        "refresh_id": summary["refresh_id"],
+        "mode": summary["mode"],
+        "rows_recomputed": summary["rows_recomputed"],
+        "duration_s": duration,
+        "report_snapshots": snapshots,
+        "datasets": notified["datasets"] if notified else None,
+        "status": "refreshed",
+    }
+
 
 register("refresh_scores", run, "0 3 * * *")
@@ -0,0 +1,85 @@
+"""
+Tests for tasks.batch_worker and the runner's --batch-worker / --scheduler wiring.
+"""
+
+from __future__ import annotations
+
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from tasks import batch_worker
+from tasks.common import runner
+
+
+class TestStartWorkers:
+    def test_starts_daemon_processes(self):
+        ctx = MagicMock()
+        with patch("tasks.batch_worker.multiprocessing.get_context", return_value=ctx) as get_ctx:
+            procs = batch_worker.start_workers(3)
+
+        get_ctx.assert_called_once_with("spawn")
+        assert len(procs) == 3
+        assert ctx.Process.call_count == 3
+        assert all(c.kwargs["daemon"] for c in ctx.Process.call_args_list)
+        assert all(p.start.called for p in procs)
+
+    def test_worker_id_names_host_and_pid(self):
+        with patch("tasks.batch_worker.socket.gethostname", return_value="box"), \
+             patch("tasks.batch_worker.os.getpid", return_value=42):
+            assert batch_worker.worker_id() == "box:42"
+
+
+class TestRestartCrashed:
+    def test_replaces_only_workers_that_exited_non_zero(self):
+        running = SimpleNamespace(name="batch-worker-0", exitcode=None)
+        stopped = SimpleNamespace(name="batch-worker-1", exitcode=0)
+        crashed = SimpleNamespace(name="batch-worker-2", exitcode=-9)
+        procs = [running, stopped, crashed]
+        ctx = MagicMock()
+        with patch("tasks.batch_worker.multiprocessing.get_context", return_value=ctx):
+            assert batch_worker.restart_crashed(procs) == 1
+
+        assert procs[:2] == [running, stopped]
+        assert procs[2] is ctx.Process.return_value
+        ctx.Process.assert_called_once_with(
+            target=batch_worker._worker_main, name="batch-worker-2", daemon=True,
+        )
+        procs[2].start.assert_called_once()
+
+    def test_run_workers_restarts_until_clean_exit(self):
+        crashed = SimpleNamespace(name="batch-worker-0", exitcode=1)
+        ctx = MagicMock()
+        ctx.Process.return_value.exitcode = 0
+        with patch("tasks.batch_worker.start_workers", return_value=[crashed]), \
+             patch("tasks.batch_worker.multiprocessing.get_context", return_value=ctx), \
+             patch("tasks.batch_worker.time.sleep") as sleep:
+            batch_worker.run_workers(1)
+
+        ctx.Process.assert_called_once()
+        sleep.assert_called_once_with(batch_worker.SUPERVISE_SECONDS)
+
+
+class TestRunnerWiring:
+    def _main(self, *argv):
+        with patch.object(sys, "argv", ["runner", *argv]), \
+             patch("tasks.common.runner._register_all"), \
+             patch("tasks.common.runner.signal.signal"), \
+             patch("tasks.common.runner.run_workers") as run_workers, \
+             patch("tasks.common.runner.start_workers") as start_workers, \
+             patch("tasks.common.runner.start_scheduler") as start_scheduler, \
+             patch("tasks.common.runner.BATCH_WORKERS", 2):
+            runner.main()
+        return run_workers, start_workers, start_scheduler
+
+    def test_batch_worker_flag_runs_workers_only(self):
+        run_workers, start_workers, start_scheduler = self._main("--batch-worker")
+        run_workers.assert_called_once_with(2)
+        start_workers.assert_not_called()
+        start_scheduler.assert_not_called()
+
+    def test_scheduler_starts_workers_alongside(self):
+        run_workers, start_workers, start_scheduler = self._main("--scheduler")
+        start_workers.assert_called_once_with(2)
+        start_scheduler.assert_called_once_with(start_workers.return_value)
+        run_workers.assert_not_called()
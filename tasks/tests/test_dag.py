@@ -0,0 +1,110 @@
+"""
+Tests for tasks.common.dag.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tasks.common.dag import Node, run_dag
+
+
+def _noop():
+    pass
+
+
+class Recorder:
+    """Node callables that record start/end order and peak concurrency."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events: list[tuple[str, str]] = []
+        self.active = 0
+        self.peak = 0
+
+    def node(self, name: str, delay: float = 0.05, fail: bool = False):
+        def _run():
+            with self.lock:
+                self.events.append(("start", name))
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(delay)
+            with self.lock:
+                self.active -= 1
+                self.events.append(("end", name))
+            if fail:
+                raise RuntimeError(f"{name} broke")
+        return _run
+
+    def index(self, kind: str, name: str) -> int:
+        return self.events.index((kind, name))
+
+
+class TestRunDag:
+    """Test the run_dag executor (threads stand in for processes)."""
+
+    def test_dependencies_run_after_parents(self):
+        rec = Recorder()
+        nodes = [
+            Node("permits", rec.node("permits")),
+            Node("tax_liens", rec.node("tax_liens"), ("permits",)),
+            Node("violations", rec.node("violations")),
+        ]
+        with ThreadPoolExecutor(3) as pool:
+            results = run_dag(nodes, max_workers=3, executor=pool)
+
+        assert [r["name"] for r in results] == ["permits", "tax_liens", "violations"]
+        assert all(r["status"] == "ok" for r in results)
+        assert rec.index("end", "permits") < rec.index("start", "tax_liens")
+        # Independent nodes overlap
+        assert rec.index("start", "violations") < rec.index("end", "permits")
+
+    def test_concurrency_cap(self):
+        rec = Recorder()
+        nodes = [Node(f"n{i}", rec.node(f"n{i}")) for i in range(5)]
+        with ThreadPoolExecutor(5) as pool:
+            results = run_dag(nodes, max_workers=2, executor=pool)
+
+        assert rec.peak == 2
+        assert len(results) == 5
+
+    def test_failure_skips_dependents_only(self):
+        rec = Recorder()
+        nodes = [
+            Node("permits", rec.node("permits", fail=True)),
+            Node("tax_liens", rec.node("tax_liens"), ("permits",)),
+            Node("311", rec.node("311")),
+        ]
+        with ThreadPoolExecutor(2) as pool:
+            results = {r["name"]: r for r in run_dag(nodes, max_workers=2, executor=pool)}
+
+        assert results["permits"]["status"] == "failed"
+        assert "broke" in results["permits"]["error"]
+        assert results["tax_liens"]["status"] == "skipped"
+        assert results["311"]["status"] == "ok"
+        assert ("start", "tax_liens") not in rec.events
+
+    def test_timings_recorded(self):
+        rec = Recorder()
+        with ThreadPoolExecutor(1) as pool:
+            [result] = run_dag([Node("a", rec.node("a", delay=0.1))], 1, executor=pool)
+
+        assert result["duration_s"] >= 0.1
+        assert result["started_s"] <= result["finished_s"]
+
+    def test_cycle_rejected(self):
+        nodes = [Node("a", _noop, ("b",)), Node("b", _noop, ("a",))]
+        with pytest.raises(ValueError, match="cycle"):
+            run_dag(nodes, max_workers=2)
+
+    def test_unknown_dependency_rejected(self):
+        with pytest.raises(ValueError, match="unknown"):
+            run_dag([Node("a", _noop, ("missing",))], max_workers=1)
+
+    def test_default_executor_uses_processes(self):
+        results = run_dag([Node("a", _noop), Node("b", _noop, ("a",))], max_workers=2)
+        assert [r["status"] for r in results] == ["ok", "ok"]
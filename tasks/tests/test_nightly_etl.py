@@ -0,0 +1,51 @@
+"""
+Tests for tasks.nightly_etl.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+
+class TestNightlyEtl:
+    """Test the nightly_etl task."""
+
+    def test_builds_dag_and_summarizes(self):
+        from tasks import nightly_etl
+
+        fake_results = [
+            {"name": "permits", "status": "ok", "duration_s": 5.0},
+            {"name": "tax_liens", "status": "skipped", "error": "dependency failed: permits"},
+            {"name": "311", "status": "failed", "duration_s": 1.0, "error": "boom"},
+        ]
+        refreshed = {"refresh_id": 3, "mode": "incremental", "rows_recomputed": 42}
+        with patch("tasks.nightly_etl.run_dag", return_value=fake_results) as run_dag, \
+             patch("tasks.nightly_etl.refresh_property_summary", return_value=refreshed), \
+             patch("tasks.nightly_etl.notify_data_refreshed") as notify:
+            summary = nightly_etl.run()
+
+        notify.assert_called_once_with(3)
+
+        nodes = run_dag.call_args[0][0]
+        deps = {n.name: n.deps for n in nodes}
+        assert deps["tax_liens"] == ("permits",)
+        assert all(d == () for name, d in deps.items() if name != "tax_liens")
+        assert run_dag.call_args[1]["max_workers"] == nightly_etl.MAX_PARALLEL
+
+        assert summary["scripts"] == fake_results
+        assert summary["succeeded"] == 1
+        assert summary["failed"] == 1
+        assert summary["skipped"] == 1
+        assert summary["summary_refresh"] == refreshed
+
+    def test_refresh_failure_does_not_fail_run(self):
+        from tasks import nightly_etl
+
+        with patch("tasks.nightly_etl.run_dag", return_value=[]), \
+             patch("tasks.nightly_etl.refresh_property_summary",
+                   side_effect=RuntimeError("db down")), \
+             patch("tasks.nightly_etl.notify_data_refreshed") as notify:
+            summary = nightly_etl.run()
+
+        assert summary["summary_refresh"] is None
+        notify.assert_not_called()
@@ -0,0 +1,139 @@
+"""
+Tests for tasks.refresh_scores and the summary refresh / snapshot helpers.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from tasks.tests.conftest import FakeConn, FakeCursor
+
+
+class TestRefreshPropertySummary:
+    """Test tasks.common.db.refresh_property_summary."""
+
+    def test_reports_mode_and_rows(self):
+        from tasks.common.db import refresh_property_summary
+
+        cur = FakeCursor(fetchone_return=(7, "incremental", 120))
+        with patch("tasks.common.db.get_conn", return_value=FakeConn(cursor=cur)):
+            result = refresh_property_summary()
+
+        query, params = cur.executed[0]
+        assert "refresh_property_summary(%s)" in query
+        assert params == (False,)
+        assert result["refresh_id"] == 7
+        assert result["mode"] == "incremental"
+        assert result["rows_recomputed"] == 120
+        assert result["duration_s"] >= 0
+
+    def test_full_flag_passed_through(self):
+        from tasks.common.db import refresh_property_summary
+
+        cur = FakeCursor(fetchone_return=(8, "full", 5000))
+        with patch("tasks.common.db.get_conn", return_value=FakeConn(cursor=cur)):
+            refresh_property_summary(full=True)
+
+        assert cur.executed[0][1] == (True,)
+
+
+class TestNotifyDataRefreshed:
+    """Test tasks.common.db.notify_data_refreshed."""
+
+    def test_sends_generation_and_datasets(self):
+        from tasks.common.db import DATA_REFRESHED_CHANNEL, notify_data_refreshed
+
+        payload = '{"generation" : 7, "mode" : "incremental", "datasets" : ["building_permits"]}'
+        cur = FakeCursor(fetchone_return=(payload,))
+        conn = FakeConn(cursor=cur)
+        with patch("tasks.common.db.get_conn", return_value=conn):
+            result = notify_data_refreshed(7)
+
+        assert cur.executed == [
+            ("SELECT notify_data_refreshed(%s, %s)", (7, DATA_REFRESHED_CHANNEL)),
+        ]
+        assert result == {"generation": 7, "mode": "incremental", "datasets": ["building_permits"]}
+
+    def test_unknown_refresh_sends_nothing(self):
+        from tasks.common.db import notify_data_refreshed
+
+        cur = FakeCursor(fetchone_return=(None,))
+        with patch("tasks.common.db.get_conn", return_value=FakeConn(cursor=cur)):
+            assert notify_data_refreshed(7) is None
+
+    def test_connection_failure_is_not_fatal(self):
+        import psycopg2
+
+        from tasks.common.db import notify_data_refreshed
+
+        with patch("tasks.common.db.get_conn", side_effect=psycopg2.OperationalError("down")):
+            assert notify_data_refreshed(7) is None
+
+
+class TestRefreshReportSnapshots:
+    """Test tasks.common.db.refresh_report_snapshots."""
+
+    def test_disabled_by_default(self):
+        from tasks.common.db import refresh_report_snapshots
+
+        with patch("tasks.common.db.get_conn") as get_conn:
+            assert refresh_report_snapshots() is None
+        get_conn.assert_not_called()
+
+    def test_passes_bounds_and_reports_counts(self):
+        from tasks.common.db import refresh_report_snapshots
+
+        cur = FakeCursor(fetchone_return=(9, "incremental", 120, 4))
+        with patch("tasks.common.db.REPORT_SNAPSHOTS_ENABLED", True), \
+             patch("tasks.common.db.REPORT_SNAPSHOT_TOP_N", 500), \
+             patch("tasks.common.db.REPORT_SNAPSHOT_RECENT_DAYS", 7), \
+             patch("tasks.common.db.get_conn", return_value=FakeConn(cursor=cur)):
+            result = refresh_report_snapshots()
+
+        query, params = cur.executed[0]
+        assert "refresh_report_snapshots(%s, %s)" in query
+        assert params == (500, 7)
+        assert result["refresh_id"] == 9
+        assert result["snapshots_built"] == 120
+        assert result["snapshots_removed"] == 4
+
+    def test_failure_is_not_fatal(self):
+        import psycopg2
+
+        from tasks.common.db import refresh_report_snapshots
+
+        with patch("tasks.common.db.REPORT_SNAPSHOTS_ENABLED", True), \
+             patch("tasks.common.db.get_conn", side_effect=psycopg2.OperationalError("down")):
+            assert refresh_report_snapshots() is None
+
+
+class TestRefreshScores:
+    """Test the refresh_scores task."""
+
+    def test_refreshes_summary_then_community_areas(self):
+        from tasks import refresh_scores
+
+        refreshed = {
+            "refresh_id": 3, "mode": "incremental",
+            "rows_recomputed": 42, "duration_s": 0.4,
+        }
+        cur = FakeCursor()
+        notified = {"generation": 3, "mode": "incremental", "datasets": ["311_service_requests"]}
+        with patch("tasks.refresh_scores.refresh_property_summary",
+                   return_value=refreshed) as refresh, \
+             patch("tasks.refresh_scores.get_conn", return_value=FakeConn(cursor=cur)), \
+             patch("tasks.refresh_scores.refresh_report_snapshots",
+                   return_value={"snapshots_built": 10}) as snapshots, \
+             patch("tasks.refresh_scores.notify_data_refreshed",
+                   return_value=notified) as notify:
+            result = refresh_scores.run()
+
+        refresh.assert_called_once_with(full=False)
+        snapshots.assert_called_once_with()
+        notify.assert_called_once_with(3)
+        assert result["report_snapshots"] == {"snapshots_built": 10}
+        assert result["datasets"] == ["311_service_requests"]
+        assert "view_community_area_summary" in cur.executed[0][0]
+        assert result["mode"] == "incremental"
+        assert result["rows_recomputed"] == 42
+        assert result["status"] == "refreshed"